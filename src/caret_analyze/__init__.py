@@ -18,6 +18,7 @@ from .architecture import Architecture, check_procedure
 from .common import Progress
 from .infra.lttng.lttng import Lttng, LttngEventFilter
 from .runtime.application import Application
+from .runtime.trace_comparison import compare_path_latencies
 
 __all__ = [
     'Application',
@@ -25,7 +26,8 @@ __all__ = [
     'Lttng',
     'LttngEventFilter',
     'Progress',
-    'check_procedure'
+    'check_procedure',
+    'compare_path_latencies',
 ]
 
 
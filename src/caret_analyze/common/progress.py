@@ -12,11 +12,108 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from __future__ import annotations
+
+from contextlib import contextmanager
+import json
+import os
+import resource
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import pandas as pd
 from tqdm import tqdm
 
 
+class StageRecord:
+    """
+    Measurement of a stage.
+
+    Times are in seconds, and sizes are in bytes.
+    rss_delta is the change of the resident set size from the start to the end of the stage,
+    which is 0 where /proc/self/statm is not available.
+    process_peak_rss is the peak resident set size of the whole process
+    up to the end of the stage, including the stages before it.
+
+    """
+
+    def __init__(self, name: str, depth: int) -> None:
+        self.name = name
+        self.depth = depth
+        self.start = 0.0
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.rss_delta = 0
+        self.process_peak_rss = 0
+        self.rows: Optional[int] = None
+        self.thread_id = threading.get_ident()
+
+
+class StageAccumulator:
+    """
+    Accumulation of repeated calls as a stage.
+
+    Used for functions called for each event, such as the event handler.
+
+    """
+
+    def __init__(self, name: str) -> None:
+        self._record = StageRecord(name, Progress._depth)
+        self._record.start = time.perf_counter()
+        self._record.rows = 0
+        self._rss_start = Progress._get_rss()
+
+    def wrap(self, f: Callable[..., Any]) -> Callable[..., Any]:
+        """
+        Wrap a function to accumulate its time.
+
+        Parameters
+        ----------
+        f : Callable[..., Any]
+            Function to measure. Each call is counted as a row.
+
+        Returns
+        -------
+        Callable[..., Any]
+            Wrapped function.
+
+        """
+        record = self._record
+
+        def wrapper(*args, **kwargs):
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                record.wall_time += time.perf_counter() - wall_start
+                record.cpu_time += time.process_time() - cpu_start
+                record.rows += 1  # type: ignore
+        return wrapper
+
+    def close(self) -> None:
+        """Record the accumulated stage."""
+        self._record.rss_delta = Progress._get_rss() - self._rss_start
+        self._record.process_peak_rss = Progress._get_peak_rss()
+        Progress._stages.append(self._record)
+
+
 class Progress:
+    """
+    Progress display and stage instrumentation.
+
+    Set enable to True to display progress bars.
+    Set instrument to True to record the wall time, CPU time, RSS growth and rows
+    of each stage of loading and analysis.
+    The recorded stages are available by report and export_chrome_trace.
+
+    """
+
     enable = False
+    instrument = False
+    _stages: List[StageRecord] = []
+    _depth = 0
 
     @classmethod
     def tqdm(cls, it, *args):
@@ -29,3 +126,134 @@ class Progress:
         if cls.enable:
             return label
         return ''
+
+    @classmethod
+    @contextmanager
+    def stage(cls, name: str) -> Iterator[StageRecord]:
+        """
+        Measure a stage.
+
+        Parameters
+        ----------
+        name : str
+            Stage name.
+
+        Yields
+        ------
+        StageRecord
+            Measurement of the stage. Set rows to record the number of processed rows.
+
+        """
+        record = StageRecord(name, cls._depth)
+        if not cls.instrument:
+            yield record
+            return
+
+        cls._depth += 1
+        record.start = time.perf_counter()
+        cpu_start = time.process_time()
+        rss_start = cls._get_rss()
+        try:
+            yield record
+        finally:
+            record.wall_time = time.perf_counter() - record.start
+            record.cpu_time = time.process_time() - cpu_start
+            record.rss_delta = cls._get_rss() - rss_start
+            record.process_peak_rss = cls._get_peak_rss()
+            cls._depth -= 1
+            cls._stages.append(record)
+
+    @classmethod
+    def accumulate(cls, name: str) -> Optional[StageAccumulator]:
+        """
+        Start accumulating repeated calls as a stage.
+
+        Parameters
+        ----------
+        name : str
+            Stage name.
+
+        Returns
+        -------
+        Optional[StageAccumulator]
+            Accumulator. None if instrument is disabled.
+
+        """
+        if not cls.instrument:
+            return None
+        return StageAccumulator(name)
+
+    @classmethod
+    def clear(cls) -> None:
+        """Clear the recorded stages."""
+        cls._stages = []
+
+    @classmethod
+    def report(cls) -> pd.DataFrame:
+        """
+        Get the recorded stages.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Stages in the order of their start.
+            Columns are name, depth, start [s], wall_time [s], cpu_time [s],
+            rss_delta [byte], process_peak_rss [byte] and rows.
+            See StageRecord for the RSS columns.
+
+        """
+        columns = ['name', 'depth', 'start', 'wall_time', 'cpu_time',
+                   'rss_delta', 'process_peak_rss', 'rows']
+        stages = sorted(cls._stages, key=lambda x: x.start)
+        origin = stages[0].start if len(stages) > 0 else 0
+        return pd.DataFrame(
+            [[s.name, s.depth, s.start - origin, s.wall_time, s.cpu_time,
+              s.rss_delta, s.process_peak_rss, s.rows]
+             for s in stages],
+            columns=columns)
+
+    @classmethod
+    def export_chrome_trace(cls, path: str) -> None:
+        """
+        Export the recorded stages as Chrome trace event JSON.
+
+        The file can be opened with chrome://tracing or Perfetto.
+
+        Parameters
+        ----------
+        path : str
+            Output file path.
+
+        """
+        events: List[Dict[str, Any]] = []
+        for s in cls._stages:
+            events.append({
+                'name': s.name,
+                'ph': 'X',
+                'ts': s.start * 1.0e6,
+                'dur': s.wall_time * 1.0e6,
+                'pid': os.getpid(),
+                'tid': s.thread_id,
+                'args': {
+                    'cpu_time': s.cpu_time,
+                    'rss_delta': s.rss_delta,
+                    'process_peak_rss': s.process_peak_rss,
+                    'rows': s.rows,
+                },
+            })
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    @staticmethod
+    def _get_rss() -> int:
+        # The second field is the current resident set size in pages.
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * resource.getpagesize()
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _get_peak_rss() -> int:
+        # ru_maxrss is in kilobytes on Linux.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
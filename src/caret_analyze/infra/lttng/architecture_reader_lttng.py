@@ -14,7 +14,6 @@
 
 from typing import Dict, List, Sequence
 
-from .lttng import LttngEventFilter
 from ...architecture.reader_interface import ArchitectureReader
 from ...value_objects import (
     CallbackGroupValue,
@@ -37,9 +36,7 @@ class ArchitectureReaderLttng(ArchitectureReader):
         trace_dir: str
     ) -> None:
         from .lttng import Lttng
-        self._lttng = Lttng(
-            trace_dir, event_filters=[LttngEventFilter.init_pass_filter()],
-            validate=False)
+        self._lttng = Lttng(trace_dir, validate=False, architecture_only=True)
 
     def get_nodes(self) -> Sequence[NodeValueWithId]:
         return self._lttng.get_nodes()
@@ -0,0 +1,260 @@
+# Copyright 2021 Research Institute of Systems Planning, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+from logging import getLogger
+import os
+from typing import AbstractSet, Any, Dict, Iterator, List, Optional, Tuple
+
+import bt2
+
+logger = getLogger(__name__)
+
+
+class CtfEventReader:
+    """
+    Single pass reader for CTF traces.
+
+    Iterating over this reader yields trace events converted to dictionaries.
+    The trace range and the discarded events are collected in the same sweep,
+    so the trace is decoded only once.
+
+    When begin or end is given, only the events with begin <= timestamp < end
+    are yielded, and the packets outside the range are not decoded.
+    When event_names is given, only the events with those names are converted and yielded.
+
+    """
+
+    # Margin of the trimmer range, which is given in seconds as float.
+    _TRIM_MARGIN_NS = 1000
+
+    def __init__(
+        self,
+        trace_dir: str,
+        begin: Optional[int] = None,
+        end: Optional[int] = None,
+        event_names: Optional[AbstractSet[str]] = None
+    ) -> None:
+        self._trace_dir = trace_dir
+        self._begin = begin
+        self._end = end
+        self._event_names = event_names
+        self._begin_time: Optional[int] = None
+        self._end_time: Optional[int] = None
+        self._discarded_count = 0
+        self._event_count = 0
+        self._skipped_counts: Dict[str, int] = {}
+
+    @property
+    def begin_time(self) -> Optional[int]:
+        """
+        Get trace begin time.
+
+        Returns
+        -------
+        Optional[int]
+            Timestamp of the first packet beginning. None before iteration.
+
+        """
+        return self._begin_time
+
+    @property
+    def end_time(self) -> Optional[int]:
+        """
+        Get trace end time.
+
+        Returns
+        -------
+        Optional[int]
+            Timestamp of the last packet end. None before iteration.
+
+        """
+        return self._end_time
+
+    @property
+    def discarded_count(self) -> int:
+        """
+        Get the number of events discarded by the tracer.
+
+        Returns
+        -------
+        int
+            Total count of discarded events found so far.
+
+        """
+        return self._discarded_count
+
+    @property
+    def event_count(self) -> int:
+        """
+        Get the number of events read.
+
+        Returns
+        -------
+        int
+            Total count of events yielded so far.
+
+        """
+        return self._event_count
+
+    @property
+    def skipped_counts(self) -> Dict[str, int]:
+        """
+        Get the number of events skipped since they are not in event_names.
+
+        Returns
+        -------
+        Dict[str, int]
+            Count of the skipped events for each event name.
+
+        """
+        return self._skipped_counts
+
+    def query_range(self) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Get trace range without decoding events.
+
+        The range is obtained from the packet index of each stream,
+        so the cost does not depend on the number of events.
+
+        Returns
+        -------
+        Tuple[Optional[int], Optional[int]]
+            Trace begin time and end time. None for an empty trace.
+
+        """
+        stream_ranges = self._query_stream_ranges()
+        if len(stream_ranges) == 0:
+            return None, None
+        return min(begin for begin, _ in stream_ranges), max(end for _, end in stream_ranges)
+
+    def query_flushed_end(self) -> Optional[int]:
+        """
+        Get the time until which all streams of the trace are flushed.
+
+        Streams of a trace being recorded are flushed independently,
+        so events before this time are not added to the trace afterwards.
+
+        Returns
+        -------
+        Optional[int]
+            The earliest end time of the streams. None for an empty trace.
+
+        """
+        stream_ranges = self._query_stream_ranges()
+        if len(stream_ranges) == 0:
+            return None
+        return min(end for _, end in stream_ranges)
+
+    def _query_stream_ranges(self) -> List[Tuple[int, int]]:
+        fs_cls = bt2.find_plugin('ctf').source_component_classes['fs']
+        stream_ranges: List[Tuple[int, int]] = []
+        for trace_path in self._find_trace_paths():
+            trace_infos = bt2.QueryExecutor(
+                fs_cls, 'babeltrace.trace-infos', {'inputs': [trace_path]}).query()
+            for trace_info in trace_infos:
+                for stream_info in trace_info['stream-infos']:
+                    stream_ranges.append((
+                        int(stream_info['range-ns']['begin']),
+                        int(stream_info['range-ns']['end'])))
+        return stream_ranges
+
+    def _find_trace_paths(self) -> List[str]:
+        # CTF traces are the directories which contain metadata file.
+        return sorted(
+            root for root, _, files in os.walk(self._trace_dir) if 'metadata' in files
+        )
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        self._begin_time = None
+        self._end_time = None
+        self._discarded_count = 0
+        self._event_count = 0
+        self._skipped_counts = {}
+
+        begin_s = None if self._begin is None else (self._begin - self._TRIM_MARGIN_NS) * 1.0e-9
+        end_s = None if self._end is None else (self._end + self._TRIM_MARGIN_NS) * 1.0e-9
+        for msg in bt2.TraceCollectionMessageIterator(
+            self._trace_dir, begin=begin_s, end=end_s
+        ):
+            msg_type = type(msg)
+            if msg_type is bt2._EventMessageConst:
+                timestamp = msg.default_clock_snapshot.ns_from_origin
+                if self._begin is not None and timestamp < self._begin:
+                    continue
+                if self._end is not None and self._end <= timestamp:
+                    continue
+                if self._event_names is not None:
+                    name = msg.event.name
+                    if name not in self._event_names:
+                        self._skipped_counts[name] = self._skipped_counts.get(name, 0) + 1
+                        continue
+                self._event_count += 1
+                yield self._to_event(msg)
+            elif msg_type is bt2._PacketBeginningMessageConst:
+                if self._begin_time is None:
+                    self._begin_time = msg.default_clock_snapshot.ns_from_origin
+            elif msg_type is bt2._PacketEndMessageConst:
+                self._end_time = msg.default_clock_snapshot.ns_from_origin
+            # Check for traces lost
+            elif msg_type is bt2._DiscardedEventsMessageConst:
+                self._discarded_count += msg.count
+                logger.warning(
+                    'Tracer discarded '
+                    f'{msg.count} events between '
+                    f'{msg.beginning_default_clock_snapshot.ns_from_origin} and '
+                    f'{msg.end_default_clock_snapshot.ns_from_origin}.')
+
+    @staticmethod
+    def _to_event(msg) -> Dict[str, Any]:
+        # Same layout as the events converted by tracetools_read:
+        # name, timestamp, cpu_id, context fields and payload fields.
+        event = msg.event
+        event_dict: Dict[str, Any] = {
+            '_name': event.name,
+            '_timestamp': msg.default_clock_snapshot.ns_from_origin,
+        }
+
+        packet_context = event.packet.context_field
+        if packet_context is not None and 'cpu_id' in packet_context:
+            event_dict['cpu_id'] = int(packet_context['cpu_id'])
+
+        for field in [
+            event.common_context_field,
+            event.specific_context_field,
+            event.payload_field
+        ]:
+            if field is None:
+                continue
+            for key, value in field.items():
+                event_dict[key] = CtfEventReader._to_value(value)
+
+        return event_dict
+
+    @staticmethod
+    def _to_value(field) -> Any:
+        if isinstance(field, bt2._StringFieldConst):
+            return str(field)
+        if isinstance(field, bt2._IntegerFieldConst):
+            return int(field)
+        if isinstance(field, bt2._RealFieldConst):
+            return float(field)
+        if isinstance(field, bt2._BoolFieldConst):
+            return bool(field)
+        if isinstance(field, bt2._ArrayFieldConst):
+            return [CtfEventReader._to_value(f) for f in field]
+        if isinstance(field, bt2._StructureFieldConst):
+            return {k: CtfEventReader._to_value(v) for k, v in field.items()}
+        return field
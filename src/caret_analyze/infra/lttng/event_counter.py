@@ -15,7 +15,7 @@
 from __future__ import annotations
 
 from logging import getLogger
-from typing import Dict, List
+from typing import Dict, List, Optional, Set, Tuple
 
 import pandas as pd
 
@@ -26,10 +26,45 @@ logger = getLogger(__name__)
 
 
 class EventCounter:
-
-    def __init__(self, data: Ros2DataModel, *, validate=True):
+    """
+    Event counts of the trace points.
+
+    Runtime events are counted by the data model on dispatch,
+    so the count table is built from the counts without converting the records.
+    The table is built on the first get_count.
+
+    """
+
+    # Runtime trace points and the handle by which their events are counted.
+    RUNTIME_TRACE_POINTS: Dict[str, Optional[str]] = {
+        'ros2:callback_start': 'callback_object',
+        'ros2:callback_end': 'callback_object',
+        'ros2:rclcpp_publish': 'publisher_handle',
+        'ros2:rclcpp_intra_publish': 'publisher_handle',
+        'ros2:message_construct': None,
+        'ros2:dispatch_subscription_callback': 'callback_object',
+        'ros2:dispatch_intra_process_subscription_callback': 'callback_object',
+        'ros2:rcl_publish': 'publisher_handle',
+        'ros2_caret:dds_write': None,
+        'ros2_caret:dds_bind_addr_to_stamp': None,
+        'ros2_caret:dds_bind_addr_to_addr': None,
+        'ros2_caret:tilde_publish': 'tilde_publisher',
+        'ros2_caret:tilde_subscribe': 'tilde_subscription',
+        'ros2_caret:sim_time': None,
+        'ros2_caret:on_data_available': None,
+    }
+
+    def __init__(
+        self,
+        data: Ros2DataModel,
+        *,
+        validate=True,
+        skipped_counts: Optional[Dict[str, int]] = None
+    ):
         self._allowed_keys = {'trace_point', 'node_name', 'topic_name'}
-        self._count_df = self._build_count_df(data)
+        self._data = data
+        self._skipped_counts = skipped_counts
+        self._count_df: Optional[pd.DataFrame] = None
         if validate:
             self._validate()
 
@@ -38,14 +73,22 @@ class EventCounter:
             raise InvalidArgumentError(
                 f'invalid groupby: {groupby}. {self._allowed_keys} are allowed.')
 
+        if self._count_df is None:
+            self._count_df = self._build_count_df(self._data, self._skipped_counts)
         grouped_df = self._count_df.groupby(groupby).sum([['size']])
         count_df = grouped_df.sort_values('size', ascending=False)
         return count_df
 
     def _validate(self):
-        count_df = self.get_count(['trace_point'])
-        count_df_recorded = count_df[count_df['size'] > 0]
-        recorded_trace_points = list(count_df_recorded.index)
+        # Only the sizes of the trace points are needed, so the count table is not built.
+        sizes = self._count_trace_points(self._data)
+        recorded_trace_points = [
+            trace_point for trace_point, size in sizes.items() if size > 0]
+        if self._skipped_counts is not None:
+            # Trace points which are not loaded are recorded if they are skipped.
+            recorded_trace_points += [
+                trace_point for trace_point, skipped in self._skipped_counts.items()
+                if skipped > 0]
 
         trace_points_added_byld_preload = {
             'ros2_caret:add_callback_group',
@@ -88,8 +131,20 @@ class EventCounter:
                 'The binary may have been compiled without using fork-rclcpp.')
 
     @staticmethod
-    def _build_count_df(data: Ros2DataModel) -> pd.DataFrame:
-        trace_point_and_df = {
+    def _count_trace_points(data: Ros2DataModel) -> Dict[str, int]:
+        sizes = {
+            trace_point: len(df)
+            for trace_point, df in EventCounter._get_object_dataframes(data).items()
+        }
+        for trace_point in EventCounter.RUNTIME_TRACE_POINTS:
+            sizes[trace_point] = 0
+        for (trace_point, _), size in data.event_counts.items():
+            sizes[trace_point] += size
+        return sizes
+
+    @staticmethod
+    def _get_object_dataframes(data: Ros2DataModel) -> Dict[str, pd.DataFrame]:
+        return {
             'ros2:rcl_init': data.contexts,
             'ros2:rcl_node_init': data.nodes,
             'ros2:rcl_publisher_init': data.publishers,
@@ -117,26 +172,14 @@ class EventCounter:
             'ros2_caret:tilde_subscribe_added': data.tilde_subscribe_added,
             'ros2:rcl_lifecycle_transition': data.lifecycle_transitions,
             'ros2_caret:rmw_implementation': data.rmw_impl,
-
-            'ros2:callback_start': data.callback_start_instances.to_dataframe(),
-            'ros2:callback_end': data.callback_end_instances.to_dataframe(),
-            'ros2:rclcpp_publish': data.rclcpp_publish_instances.to_dataframe(),
-            'ros2:rclcpp_intra_publish': data.rclcpp_intra_publish_instances.to_dataframe(),
-            'ros2:message_construct': data.message_construct_instances.to_dataframe(),
-            'ros2:dispatch_subscription_callback':
-                data.dispatch_subscription_callback_instances.to_dataframe(),
-            'ros2:dispatch_intra_process_subscription_callback':
-                data.dispatch_intra_process_subscription_callback_instances.to_dataframe(),
-            'ros2:rcl_publish': data.rcl_publish_instances.to_dataframe(),
-            'ros2_caret:dds_write': data.dds_write_instances.to_dataframe(),
-            'ros2_caret:dds_bind_addr_to_stamp': data.dds_bind_addr_to_stamp.to_dataframe(),
-            'ros2_caret:dds_bind_addr_to_addr': data.dds_bind_addr_to_addr.to_dataframe(),
-            'ros2_caret:tilde_publish': data.tilde_publish.to_dataframe(),
-            'ros2_caret:tilde_subscribe': data.tilde_subscribe.to_dataframe(),
-            'ros2_caret:sim_time': data.sim_time.to_dataframe(),
-            'ros2_caret:on_data_available': data.on_data_available_instances.to_dataframe(),
         }
-        #  'ros2_caret:rmw_implementation': ,
+
+    @staticmethod
+    def _build_count_df(
+        data: Ros2DataModel,
+        skipped_counts: Optional[Dict[str, int]] = None
+    ) -> pd.DataFrame:
+        trace_point_and_df = EventCounter._get_object_dataframes(data)
 
         sub_handle_to_topic_name: Dict[int, str] = {}
         sub_handle_to_node_name: Dict[int, str] = {}
@@ -269,4 +312,70 @@ class EventCounter:
                     }
                 )
 
+        handle_to_names: Dict[str, Dict[int, Tuple[str, str]]] = {
+            'callback_object': {},
+            'publisher_handle': {},
+            'tilde_publisher': {},
+            'tilde_subscription': {},
+        }
+        for cb in set(sub_cb_to_node_name) | set(sub_cb_to_topic_name):
+            handle_to_names['callback_object'][cb] = \
+                (sub_cb_to_node_name.get(cb, '-'), sub_cb_to_topic_name.get(cb, '-'))
+        for cb, node_name in timer_cb_to_node_name.items():
+            handle_to_names['callback_object'][cb] = (node_name, '-')
+        for handler in set(pub_handle_to_node_name) | set(pub_handle_to_topic_name):
+            handle_to_names['publisher_handle'][handler] = \
+                (pub_handle_to_node_name.get(handler, '-'),
+                 pub_handle_to_topic_name.get(handler, '-'))
+        for handler in tilde_pub_to_node_name:
+            handle_to_names['tilde_publisher'][handler] = \
+                (tilde_pub_to_node_name[handler], tilde_pub_to_topic_name[handler])
+        for handler in tilde_sub_to_node_name:
+            handle_to_names['tilde_subscription'][handler] = \
+                (tilde_sub_to_node_name[handler], tilde_sub_to_topic_name[handler])
+
+        counted_trace_points: Set[str] = set()
+        for (trace_point, handle), size in data.event_counts.items():
+            node_name, topic_name = '-', '-'
+            handle_key = EventCounter.RUNTIME_TRACE_POINTS[trace_point]
+            if handle_key is not None and handle is not None:
+                node_name, topic_name = \
+                    handle_to_names[handle_key].get(handle, ('-', '-'))
+            count_dict.append(
+                {
+                    'node_name': node_name,
+                    'topic_name': topic_name,
+                    'size': size,
+                    'trace_point': trace_point
+                }
+            )
+            counted_trace_points.add(trace_point)
+
+        for trace_point in EventCounter.RUNTIME_TRACE_POINTS:
+            if trace_point in counted_trace_points:
+                continue
+            count_dict.append(
+                {
+                    'node_name': '-',
+                    'topic_name': '-',
+                    'size': 0,
+                    'trace_point': trace_point
+                }
+            )
+
+        if skipped_counts is not None:
+            # Events not in the loaded trace points are counted by trace point only.
+            for count in count_dict:
+                count['skipped'] = 0
+            for trace_point, skipped in skipped_counts.items():
+                count_dict.append(
+                    {
+                        'node_name': '-',
+                        'topic_name': '-',
+                        'size': 0,
+                        'trace_point': trace_point,
+                        'skipped': skipped
+                    }
+                )
+
         return pd.DataFrame.from_dict(count_dict)
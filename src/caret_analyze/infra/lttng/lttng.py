@@ -15,31 +15,40 @@
 from __future__ import annotations
 
 from abc import ABCMeta, abstractmethod
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+import itertools
 from logging import getLogger
-from typing import Dict, List, Optional, Sequence, Tuple, Union
-
-import bt2
+from typing import (AbstractSet, Any, Collection, Dict, FrozenSet, Iterable, List, Optional,
+                    Sequence, Set, Tuple, Union)
 
 from caret_analyze.value_objects.timer import TimerValue
 
 import pandas as pd
 
-from tracetools_analysis.loading import load_file
-
+from .ctf_reader import CtfEventReader
 from .events_factory import EventsFactory
-from .ros2_tracing.data_model import DataModel
+from .ros2_tracing.data_model import DataModel, Ros2DataModel
 from .ros2_tracing.processor import Ros2Handler
+from .trace_cache import DataModelCache, RecordsCache
+from .trace_snapshot import SnapshotRecordsCache, TraceSnapshot
 from .value_objects import (PublisherValueLttng,
                             SubscriptionCallbackValueLttng,
                             TimerCallbackValueLttng)
 from ..infra_base import InfraBase
-from ...common import ClockConverter
+from ...common import ClockConverter, Progress
 from ...exceptions import InvalidArgumentError
-from ...record import RecordsInterface
+from ...record import RecordsBuffer, RecordsInterface
 from ...value_objects import CallbackGroupValue, ExecutorValue, NodeValue, NodeValueWithId, Qos
 
 Event = Dict[str, int]
+ReaderRange = Tuple[Optional[int], Optional[int], Optional[AbstractSet[str]]]
+SliceResult = Tuple[
+    Dict[str, Union[List[Any], RecordsBuffer]],
+    Dict[Tuple[str, Optional[int]], int],
+    int, int, Dict[str, int], Set[str]
+]
 
 logger = getLogger(__name__)
 
@@ -73,39 +82,38 @@ class LttngEventFilter(metaclass=ABCMeta):
 
 
 class InitEventPassFilter(LttngEventFilter):
+    INIT_EVENTS = frozenset({
+        'ros2:rcl_init',
+        'ros2:rcl_node_init',
+        'ros2:rcl_publisher_init',
+        'ros2:rcl_subscription_init',
+        'ros2:rclcpp_subscription_init',
+        'ros2:rclcpp_subscription_callback_added',
+        'ros2:rcl_service_init',
+        'ros2:rclcpp_service_callback_added',
+        'ros2:rcl_client_init',
+        'ros2:rcl_timer_init',
+        'ros2:rclcpp_timer_callback_added',
+        'ros2:rclcpp_timer_link_node',
+        'ros2:rclcpp_callback_register',
+        'ros2:rcl_lifecycle_state_machine_init',
+        'ros2:rcl_lifecycle_transition',
+        'ros2_caret:rmw_implementation',
+        'ros2_caret:add_callback_group',
+        'ros2_caret:add_callback_group_static_executor',
+        'ros2_caret:construct_executor',
+        'ros2_caret:construct_static_executor',
+        'ros2_caret:callback_group_add_timer',
+        'ros2_caret:callback_group_add_subscription',
+        'ros2_caret:callback_group_add_service',
+        'ros2_caret:callback_group_add_client',
+        'ros2_caret:tilde_subscription_init',
+        'ros2_caret:tilde_publisher_init',
+        'ros2_caret:tilde_subscribe_added',
+    })
 
     def accept(self, event: Event, common: LttngEventFilter.Common) -> bool:
-        init_events = {
-            'ros2:rcl_init',
-            'ros2:rcl_node_init',
-            'ros2:rcl_publisher_init',
-            'ros2:rcl_subscription_init',
-            'ros2:rclcpp_subscription_init',
-            'ros2:rclcpp_subscription_callback_added',
-            'ros2:rcl_service_init',
-            'ros2:rclcpp_service_callback_added',
-            'ros2:rcl_client_init',
-            'ros2:rcl_timer_init',
-            'ros2:rclcpp_timer_callback_added',
-            'ros2:rclcpp_timer_link_node',
-            'ros2:rclcpp_callback_register',
-            'ros2:rcl_lifecycle_state_machine_init',
-            'ros2:rcl_lifecycle_transition',
-            'ros2_caret:rmw_implementation',
-            'ros2_caret:add_callback_group',
-            'ros2_caret:add_callback_group_static_executor',
-            'ros2_caret:construct_executor',
-            'ros2_caret:construct_static_executor',
-            'ros2_caret:callback_group_add_timer',
-            'ros2_caret:callback_group_add_subscription',
-            'ros2_caret:callback_group_add_service',
-            'ros2_caret:callback_group_add_client',
-            'ros2_caret:tilde_subscription_init',
-            'ros2_caret:tilde_publisher_init',
-            'ros2_caret:tilde_subscribe_added',
-        }
-
-        return event[self.NAME] in init_events
+        return event[self.NAME] in self.INIT_EVENTS
 
 
 class EventStripFilter(LttngEventFilter):
@@ -152,6 +160,33 @@ class EventDurationFilter(LttngEventFilter):
         return self._offset <= elapsed_s and elapsed_s < (self._offset + self._duration)
 
 
+def _handle_slice(
+    trace_dir: str,
+    reader_range: ReaderRange,
+    event_filters: List[LttngEventFilter],
+    common: LttngEventFilter.Common,
+) -> SliceResult:
+    # Handle the events in the range in a worker process.
+    # The intermediate storages are returned, since the records are built on finalize.
+    reader = CtfEventReader(trace_dir, *reader_range)
+    handler = Ros2Handler()
+    filtered_count = 0
+    handled_names: Set[str] = set()
+    for event in reader:
+        if not all(event_filter.accept(event, common) for event_filter in event_filters):
+            continue
+        filtered_count += 1
+        handled_names.add(event[LttngEventFilter.NAME])
+        handler.handle(event)
+
+    storages: Dict[str, Union[List[Any], RecordsBuffer]] = {
+        name: value for name, value in vars(handler.data).items()
+        if isinstance(value, (list, RecordsBuffer))
+    }
+    return storages, dict(handler.data.event_counts), reader.event_count, filtered_count, \
+        reader.skipped_counts, handled_names
+
+
 class Lttng(InfraBase):
     """
     Lttng data container class.
@@ -165,82 +200,538 @@ class Lttng(InfraBase):
     _last_filters: Optional[List[LttngEventFilter]] = None
     _last_trace_begin_time: Optional[int] = None
     _last_trace_end_time: Optional[int] = None
+    _last_skipped_counts: Optional[Dict[str, int]] = None
+    _last_handled_event_names: Optional[Set[str]] = None
+
+    # Trace points needed for each analysis in addition to the init events.
+    TRACE_POINT_SETS: Dict[str, FrozenSet[str]] = {
+        'callback': frozenset({
+            'ros2:callback_start',
+            'ros2:callback_end',
+            'ros2_caret:sim_time',
+        }),
+        'communication': frozenset({
+            'ros2:callback_start',
+            'ros2:callback_end',
+            'ros2:rclcpp_publish',
+            'ros2:rclcpp_intra_publish',
+            'ros2:rcl_publish',
+            'ros2:message_construct',
+            'ros2:dispatch_subscription_callback',
+            'ros2:dispatch_intra_process_subscription_callback',
+            'ros2_caret:dds_write',
+            'ros2_caret:dds_bind_addr_to_stamp',
+            'ros2_caret:dds_bind_addr_to_addr',
+            'ros2_caret:on_data_available',
+            'ros2_caret:sim_time',
+        }),
+    }
 
     def __init__(
         self,
         trace_dir_or_events: Union[str, Dict],
-        force_conversion: bool = False,
+        force_conversion: bool = False,  # unused. kept for compatibility.
         *,
         event_filters: Optional[List[LttngEventFilter]] = None,
         store_events: bool = False,
-        validate: bool = True  # TODO(hsgwa): change validate function to public "verify".
+        validate: bool = True,  # TODO(hsgwa): change validate function to public "verify".
+        use_cache: bool = False,
+        jobs: int = 1,
+        window: Optional[Tuple[float, float]] = None,
+        architecture_only: bool = False,
+        trace_points: Optional[Union[str, Collection[str]]] = None,
+        follow: bool = False,
+        retention: Optional[float] = None
     ) -> None:
         from .lttng_info import LttngInfo
         from .records_source import RecordsSource
         from .event_counter import EventCounter
 
-        data, events = self._parse_lttng_data(
+        event_names = self._get_event_names(trace_points, architecture_only)
+        tail_end: Optional[int] = None
+        records_cache: Optional[RecordsCache] = None
+        events: Optional[List[Event]]
+        skipped_counts: Optional[Dict[str, int]]
+        if isinstance(trace_dir_or_events, str) and TraceSnapshot.is_snapshot(trace_dir_or_events):
+            if follow:
+                raise InvalidArgumentError('follow requires a trace directory.')
+            # The snapshot is already processed, so the loading options are not applied.
+            data, records, info = TraceSnapshot(trace_dir_or_events).load()
+            events = None
+            records_cache = SnapshotRecordsCache(records)
+            if info['event_names'] is not None:
+                event_names = frozenset(info['event_names'])
+            skipped_counts = info['skipped_counts']
+            Lttng._last_load_dir = None
+            Lttng._last_filters = None
+            Lttng._last_trace_begin_time = info['begin_time']
+            Lttng._last_trace_end_time = info['end_time']
+            Lttng._last_skipped_counts = skipped_counts
+            print(f'loaded snapshot: {trace_dir_or_events}')
+        else:
+            data, events, records_cache, skipped_counts, tail_end = self._load_trace(
+                trace_dir_or_events, force_conversion, event_filters, store_events,
+                use_cache, jobs, window, event_names, follow, retention)
+
+        with Progress.stage('LttngInfo'):
+            self._info = LttngInfo(data)
+        self._source: RecordsSource = RecordsSource(data, self._info, records_cache)
+        with Progress.stage('EventCounter'):
+            self._counter = EventCounter(data, validate=validate, skipped_counts=skipped_counts)
+        self.events = events if store_events else None
+
+        self._data = data
+        self._event_names = event_names
+        self._skipped_counts = skipped_counts
+        self._trace_dir = trace_dir_or_events if isinstance(trace_dir_or_events, str) else None
+        self._tail_end = tail_end
+        self._retention = retention
+        # Names of the loaded events until the required events are checked on poll.
+        self._unchecked_event_names: Optional[Set[str]] = \
+            set(Lttng._last_handled_event_names or ()) if follow else None
+
+    @staticmethod
+    def _load_trace(
+        trace_dir_or_events: Union[str, Dict],
+        force_conversion: bool,
+        event_filters: Optional[List[LttngEventFilter]],
+        store_events: bool,
+        use_cache: bool,
+        jobs: int,
+        window: Optional[Tuple[float, float]],
+        event_names: Optional[FrozenSet[str]],
+        follow: bool,
+        retention: Optional[float]
+    ) -> Tuple[
+        DataModel, Optional[List[Event]], Optional[RecordsCache],
+        Optional[Dict[str, int]], Optional[int]
+    ]:
+        tail_end: Optional[int] = None
+        if follow:
+            if not isinstance(trace_dir_or_events, str):
+                raise InvalidArgumentError('follow requires a trace directory.')
+            # A trace being recorded is loaded until all streams are flushed,
+            # and the following events are loaded by poll.
+            tail_end = CtfEventReader(trace_dir_or_events).query_flushed_end() or 0
+            # The trace changes while following, so it is not cached.
+            use_cache = False
+
+        data, events = Lttng._parse_lttng_data(
             trace_dir_or_events,
             force_conversion,
-            event_filters or []
+            event_filters or [],
+            store_events,
+            use_cache,
+            jobs,
+            window,
+            event_names,
+            until=tail_end,
+            # A live trace may not have flushed rcl_init yet, so poll checks it.
+            check_required_events=not follow
         )
-        self._info = LttngInfo(data)
-        self._source: RecordsSource = RecordsSource(data, self._info)
-        self._counter = EventCounter(data, validate=validate)
-        self.events = events if store_events else None
+        if retention is not None and tail_end is not None:
+            data.drop_events_before(tail_end - int(retention * 1.0e9))
+        records_cache: Optional[RecordsCache] = None
+        if use_cache and isinstance(trace_dir_or_events, str):
+            records_cache = RecordsCache(
+                trace_dir_or_events, event_filters or [], window, event_names)
+        skipped_counts = Lttng._last_skipped_counts if event_names is not None else None
+        return data, events, records_cache, skipped_counts, tail_end
+
+    def export_snapshot(self, path: str) -> None:
+        """
+        Export the processed trace as a snapshot.
+
+        The data model and the composed records are saved in memory-mapped column files,
+        and Lttng(path) loads them without reading the trace.
+        Records which are not composed yet are composed before saving.
+
+        Parameters
+        ----------
+        path : str
+            Snapshot directory. An existing snapshot is overwritten.
+
+        Raises
+        ------
+        InvalidArgumentError
+            Occurs when the path exists and is not a snapshot.
+
+        """
+        from .records_source import DISK_CACHED_RECORDS
+
+        records = {name: getattr(self._source, name) for name in DISK_CACHED_RECORDS}
+        info = {
+            'begin_time': Lttng._last_trace_begin_time,
+            'end_time': Lttng._last_trace_end_time,
+            'event_names': None if self._event_names is None else sorted(self._event_names),
+            'skipped_counts': self._skipped_counts,
+        }
+        TraceSnapshot(path).save(self._data, records, info)
+
+    def append_chunks(
+        self,
+        chunk_dirs: Union[str, Sequence[str]]
+    ) -> None:
+        """
+        Append trace chunks to the loaded data.
+
+        The chunks, such as those produced by LTTng session rotation,
+        are appended after the loaded data in the given order,
+        so messages across the chunks are tracked.
+        Records are composed again on the next access.
+
+        Parameters
+        ----------
+        chunk_dirs : Union[str, Sequence[str]]
+            Directories of the newly finished trace chunks, in time order.
+
+        Notes
+        -----
+        Event filters are not applied to the chunks,
+        since they are relative to the range of the whole trace.
+        The trace points are limited in the same way as the loaded data.
+
+        """
+        if isinstance(chunk_dirs, str):
+            chunk_dirs = [chunk_dirs]
+
+        load_dir, filters = Lttng._last_load_dir, Lttng._last_filters
+        begin_time, end_time = Lttng._last_trace_begin_time, Lttng._last_trace_end_time
+        for chunk_dir in chunk_dirs:
+            # The init events such as rcl_init are in the first chunk.
+            data, _ = self._parse_lttng_data(
+                chunk_dir, False, [], event_names=self._event_names,
+                check_required_events=False)
+            self._append_data(data, Lttng._last_skipped_counts)
+
+            chunk_begin_time = Lttng._last_trace_begin_time
+            chunk_end_time = Lttng._last_trace_end_time
+            if begin_time is None or \
+                    (chunk_begin_time is not None and chunk_begin_time < begin_time):
+                begin_time = chunk_begin_time
+            if end_time is None or (chunk_end_time is not None and end_time < chunk_end_time):
+                end_time = chunk_end_time
+
+        Lttng._last_load_dir, Lttng._last_filters = load_dir, filters
+        Lttng._last_trace_begin_time, Lttng._last_trace_end_time = begin_time, end_time
+        self._update_sources()
+
+    def poll(self) -> int:
+        """
+        Load the events flushed to the followed trace since the last load.
+
+        Only the events before the time until which all streams are flushed are loaded,
+        so events of a stream flushed later are not missed.
+        When retention is given on load, the events older than retention
+        from the latest loaded event are dropped.
+        Records are composed again on the next access.
+
+        Returns
+        -------
+        int
+            Number of the loaded events.
+
+        Raises
+        ------
+        InvalidArgumentError
+            Occurs when the trace is not loaded with follow=True.
+        RequiredEventNotFound
+            Occurs when the events loaded first lack the required events such as rcl_init.
+            The events are not checked on load, since they may not be flushed yet.
+
+        """
+        if self._trace_dir is None or self._tail_end is None:
+            raise InvalidArgumentError('Trace is not followed. Load the trace with follow=True.')
+
+        flushed_end = CtfEventReader(self._trace_dir).query_flushed_end()
+        if flushed_end is None or flushed_end <= self._tail_end:
+            return 0
+
+        reader = CtfEventReader(self._trace_dir, self._tail_end, flushed_end, self._event_names)
+        handler = Ros2Handler()
+        if self._unchecked_event_names is None:
+            for event in reader:
+                handler.handle(event)
+        else:
+            for event in reader:
+                self._unchecked_event_names.add(event[LttngEventFilter.NAME])
+                handler.handle(event)
+            # The required events are checked on the first poll which loads events.
+            if reader.event_count > 0:
+                Ros2Handler.check_required_events(self._unchecked_event_names)
+                self._unchecked_event_names = None
+        handler.data.finalize()
+        self._append_data(handler.data, reader.skipped_counts)
+        self._tail_end = flushed_end
+
+        if Lttng._last_trace_end_time is None or Lttng._last_trace_end_time < flushed_end:
+            Lttng._last_trace_end_time = flushed_end
+        if self._retention is not None:
+            self._data.drop_events_before(flushed_end - int(self._retention * 1.0e9))
+        self._update_sources()
+        return reader.event_count
+
+    def _append_data(
+        self,
+        data: Ros2DataModel,
+        skipped_counts: Optional[Dict[str, int]]
+    ) -> None:
+        from .records_source import RecordsSource
+
+        RecordsSource._preprocess(data)
+        self._data.concat(data)
+        if self._skipped_counts is not None:
+            for name, count in (skipped_counts or {}).items():
+                self._skipped_counts[name] = self._skipped_counts.get(name, 0) + count
+            Lttng._last_skipped_counts = self._skipped_counts
+
+    def _update_sources(self) -> None:
+        from .lttng_info import LttngInfo
+        from .records_source import RecordsSource
+        from .event_counter import EventCounter
+
+        self._info = LttngInfo(self._data)
+        # The records cache is keyed by the loaded trace, so it is not used for appended data.
+        self._source = RecordsSource(self._data, self._info)
+        self._counter = EventCounter(
+            self._data, validate=False, skipped_counts=self._skipped_counts)
+
+    @staticmethod
+    def _get_event_names(
+        trace_points: Optional[Union[str, Collection[str]]],
+        architecture_only: bool
+    ) -> Optional[FrozenSet[str]]:
+        # Only the init events are needed to build the architecture,
+        # so the runtime events are neither converted nor handled.
+        if architecture_only:
+            return InitEventPassFilter.INIT_EVENTS
+        if trace_points is None:
+            return None
+        if isinstance(trace_points, str):
+            if trace_points not in Lttng.TRACE_POINT_SETS:
+                raise InvalidArgumentError(
+                    f'invalid trace_points: {trace_points}. '
+                    f'{list(Lttng.TRACE_POINT_SETS)} are allowed.')
+            trace_points = Lttng.TRACE_POINT_SETS[trace_points]
+        return InitEventPassFilter.INIT_EVENTS | frozenset(trace_points)
 
     @staticmethod
     def _parse_lttng_data(
         trace_dir_or_events: Union[str, Dict],
         force_conversion: bool,
-        event_filters: List[LttngEventFilter]
-    ) -> Tuple[DataModel, Dict]:
+        event_filters: List[LttngEventFilter],
+        store_events: bool = False,
+        use_cache: bool = False,
+        jobs: int = 1,
+        window: Optional[Tuple[float, float]] = None,
+        event_names: Optional[AbstractSet[str]] = None,
+        until: Optional[int] = None,
+        check_required_events: bool = True
+    ) -> Tuple[DataModel, Optional[List[Event]]]:
+        # Events are streamed from the reader through the filters into the handler,
+        # so the whole event list is kept in memory only when store_events is set.
+        common = LttngEventFilter.Common()
+        events: Iterable[Event]
+        readers: List[CtfEventReader] = []
+        stored_events: Optional[List[Event]] = [] if store_events else None
+        skipped_counts: Dict[str, int] = defaultdict(int)
+        handled_names: Set[str] = set()
+        cache: Optional[DataModelCache] = None
         if isinstance(trace_dir_or_events, str):
-            Lttng._last_trace_begin_time = None
-            for msg in bt2.TraceCollectionMessageIterator(trace_dir_or_events):
-                if (not Lttng._last_trace_begin_time
-                        and type(msg) is bt2._PacketBeginningMessageConst):
-                    Lttng._last_trace_begin_time = msg.default_clock_snapshot.ns_from_origin
-                elif type(msg) is bt2._PacketEndMessageConst:
-                    Lttng._last_trace_end_time = msg.default_clock_snapshot.ns_from_origin
-                # Check for traces lost
-                elif(type(msg) is bt2._DiscardedEventsMessageConst):
-                    msg = ('Tracer discarded '
-                           f'{msg.count} events between '
-                           f'{msg.beginning_default_clock_snapshot.ns_from_origin} and '
-                           f'{msg.end_default_clock_snapshot.ns_from_origin}.')
-                    logger.warning(msg)
-
-            Lttng._last_load_dir = trace_dir_or_events
+            trace_dir = trace_dir_or_events
+            Lttng._last_load_dir = trace_dir
             Lttng._last_filters = event_filters
-            events = load_file(trace_dir_or_events, force_conversion=force_conversion)
-            print('{} events found.'.format(len(events)))
+
+            if use_cache:
+                cache = DataModelCache(trace_dir, event_filters, window, event_names)
+                # The events are not cached, so they are read again if they are to be stored.
+                cached = None if store_events else cache.load()
+                if cached is not None:
+                    data, info = cached
+                    Lttng._last_trace_begin_time = info['begin_time']
+                    Lttng._last_trace_end_time = info['end_time']
+                    Lttng._last_skipped_counts = info.get('skipped_counts')
+                    print(f'loaded from cache: {cache.path}')
+                    return data, None
+
+            # Events are not transferred from worker processes, so store_events reads serially.
+            jobs = 1 if store_events else jobs
+            begin_time: Optional[int] = None
+            end_time: Optional[int] = None
+            if len(event_filters) > 0 or jobs > 1 or window is not None:
+                # Filters need the trace end before the last event is read.
+                begin_time, end_time = CtfEventReader(trace_dir).query_range()
+                if end_time is not None:
+                    common.end_time = end_time
+            reader_ranges = Lttng._get_reader_ranges(
+                begin_time, end_time, jobs, window, event_names, until)
+
+            if jobs > 1:
+                data, skipped_counts, handled_names = Lttng._parse_lttng_data_parallel(
+                    trace_dir, event_filters, reader_ranges, common)
+            else:
+                readers = [
+                    CtfEventReader(trace_dir, *reader_range) for reader_range in reader_ranges]
+                events = itertools.chain.from_iterable(readers)
         else:
-            events = trace_dir_or_events
+            events = trace_dir_or_events  # type: ignore
+            if len(trace_dir_or_events) > 0:
+                common.end_time = trace_dir_or_events[-1][LttngEventFilter.TIMESTAMP]
+
+        if jobs <= 1 or not isinstance(trace_dir_or_events, str):
+            handler = Ros2Handler()
+            filtered_count = 0
+            # Reading and handling are interleaved, so the handler time is accumulated.
+            handle = handler.handle
+            handle_stage = Progress.accumulate('handle events')
+            if handle_stage is not None:
+                handle = handle_stage.wrap(handle)
+
+            from tqdm import tqdm
+            with Progress.stage('read events') as stage:
+                for event in tqdm(events):
+                    if not hasattr(common, 'start_time'):
+                        common.start_time = event[LttngEventFilter.TIMESTAMP]
+                    if event_names is not None and \
+                            event[LttngEventFilter.NAME] not in event_names:
+                        skipped_counts[event[LttngEventFilter.NAME]] += 1
+                        continue
+                    if not all(event_filter.accept(event, common)
+                               for event_filter in event_filters):
+                        continue
+
+                    filtered_count += 1
+                    handled_names.add(event[LttngEventFilter.NAME])
+                    if stored_events is not None:
+                        stored_events.append(event)
+                    handle(event)
+                stage.rows = filtered_count
+            if handle_stage is not None:
+                handle_stage.close()
+
+            data = handler.data
+            with Progress.stage('finalize'):
+                data.finalize()
+
+            for reader in readers:
+                for name, count in reader.skipped_counts.items():
+                    skipped_counts[name] += count
+
+            if len(readers) > 0:
+                print('{} events found.'.format(sum(reader.event_count for reader in readers)))
+            if len(event_filters) > 0:
+                print('filtered to {} events.'.format(filtered_count))
+
+        Lttng._last_handled_event_names = handled_names
+        if check_required_events:
+            Ros2Handler.check_required_events(handled_names)
+
+        if event_names is not None:
+            print('skipped {} events not in trace points.'.format(sum(skipped_counts.values())))
+            Lttng._last_skipped_counts = dict(skipped_counts)
+        else:
+            Lttng._last_skipped_counts = None
 
-        if len(event_filters) > 0:
-            events = Lttng._filter_events(events, event_filters)
-            print('filtered to {} events.'.format(len(events)))
+        if isinstance(trace_dir_or_events, str):
+            if begin_time is None and len(readers) > 0:
+                begin_time = readers[0].begin_time
+                end_time = readers[-1].end_time
+            Lttng._last_trace_begin_time = begin_time
+            Lttng._last_trace_end_time = end_time
+
+        if cache is not None:
+            cache.save(data, {
+                'begin_time': Lttng._last_trace_begin_time,
+                'end_time': Lttng._last_trace_end_time,
+                'skipped_counts': Lttng._last_skipped_counts,
+            })
 
-        handler = Ros2Handler.process(events)
-        return handler.data, events
+        return data, stored_events
 
     @staticmethod
-    def _filter_events(events: List[Event], filters: List[LttngEventFilter]):
-        if len(events) == 0:
-            return []
+    def _get_reader_ranges(
+        begin_time: Optional[int],
+        end_time: Optional[int],
+        jobs: int,
+        window: Optional[Tuple[float, float]],
+        event_names: Optional[AbstractSet[str]] = None,
+        until: Optional[int] = None
+    ) -> List[ReaderRange]:
+        if begin_time is None or end_time is None or (jobs <= 1 and window is None):
+            return [(None, until, event_names)]
+
+        reader_ranges: List[ReaderRange] = []
+        if window is None:
+            window_begin, window_end = begin_time, end_time + 1
+        else:
+            window_begin = begin_time + int(window[0] * 1.0e9)
+            window_end = begin_time + int(window[1] * 1.0e9)
+            # Init events out of the window are read without converting the other events.
+            init_events = InitEventPassFilter.INIT_EVENTS
+            if event_names is not None:
+                init_events = init_events & event_names
+            reader_ranges.append((None, window_begin, init_events))
+        if until is not None:
+            window_end = min(window_end, until)
+
+        jobs = max(jobs, 1)
+        bounds = [window_begin + (window_end - window_begin) * i // jobs for i in range(jobs)]
+        bounds.append(window_end)
+        reader_ranges += [
+            (begin, end, event_names) for begin, end in zip(bounds[:-1], bounds[1:])]
+        if window is not None and (until is None or window_end < until):
+            reader_ranges.append((window_end, until, init_events))
+        return reader_ranges
 
-        common = LttngEventFilter.Common()
-        common.start_time = events[0][LttngEventFilter.TIMESTAMP]
-        common.end_time = events[-1][LttngEventFilter.TIMESTAMP]
+    @staticmethod
+    def _parse_lttng_data_parallel(
+        trace_dir: str,
+        event_filters: List[LttngEventFilter],
+        reader_ranges: List[ReaderRange],
+        common: LttngEventFilter.Common
+    ) -> Tuple[Ros2DataModel, Dict[str, int], Set[str]]:
+        # Each range is decoded in a worker process.
+        # Each handler only appends to the data model, so concatenating the partial data
+        # in the order of the ranges gives the same data as a single pass.
+        first_event = next(itertools.chain.from_iterable(
+            CtfEventReader(trace_dir, *reader_range) for reader_range in reader_ranges), None)
+        if first_event is not None:
+            common.start_time = first_event[LttngEventFilter.TIMESTAMP]
 
-        filtered = []
         from tqdm import tqdm
-        for event in tqdm(events):
-            if all(event_filter.accept(event, common) for event_filter in filters):
-                filtered.append(event)
+        with Progress.stage('read events in parallel') as stage, \
+                ProcessPoolExecutor(len(reader_ranges)) as executor:
+            futures = [
+                executor.submit(_handle_slice, trace_dir, reader_range, event_filters, common)
+                for reader_range in reader_ranges
+            ]
+            partials = [future.result() for future in tqdm(futures)]
+            stage.rows = sum(partial[3] for partial in partials)
+
+        data = Ros2DataModel()
+        event_count = 0
+        filtered_count = 0
+        skipped_counts: Dict[str, int] = defaultdict(int)
+        handled_names: Set[str] = set()
+        for storages, event_counts, partial_event_count, partial_filtered_count, \
+                partial_skipped_counts, partial_handled_names in partials:
+            for name, storage in storages.items():
+                getattr(data, name).extend(storage)
+            data.add_event_counts(event_counts)
+            event_count += partial_event_count
+            filtered_count += partial_filtered_count
+            for name, count in partial_skipped_counts.items():
+                skipped_counts[name] += count
+            handled_names |= partial_handled_names
+
+        with Progress.stage('finalize'):
+            data.finalize()
+
+        print('{} events found.'.format(event_count))
+        if len(event_filters) > 0:
+            print('filtered to {} events.'.format(filtered_count))
 
-        return filtered
+        return data, skipped_counts, handled_names
 
     def get_nodes(
         self
@@ -14,7 +14,7 @@
 
 from functools import cached_property
 from logging import getLogger
-from typing import Dict, List, Optional, Sequence, Tuple, Union
+from typing import List, Optional, Sequence, Tuple, Union
 
 from caret_analyze.value_objects.message_context import MessageContext, MessageContextType
 
@@ -1275,8 +1275,8 @@ class FilteredRecordsSource:
             records.drop_columns(['tilde_subscription])
 
         """
-        grouped_records = self._grouped_tilde_sub_records
-        if len(grouped_records) == 0:
+        records = self._tilde_sub_records
+        if len(records) == 0:
             return RecordsFactory.create_instance(
                 None,
                 [
@@ -1285,13 +1285,10 @@ class FilteredRecordsSource:
                     COLUMN_NAME.TILDE_MESSAGE_ID
                 ]
             )
-        sample_records = list(grouped_records.values())[0]
-        columns = sample_records.columns
-        sub_records = RecordsFactory.create_instance(None, columns)
-
-        if tilde_subscription is not None and tilde_subscription in grouped_records:
-            sub_records_ = grouped_records[tilde_subscription].clone()
-            sub_records.concat(sub_records_)
+        keys: List[Tuple[int, ...]] = []
+        if tilde_subscription is not None:
+            keys.append((tilde_subscription,))
+        sub_records = records.take_groups([COLUMN_NAME.TILDE_SUBSCRIPTION], keys)
 
         sub_records.drop_columns([COLUMN_NAME.TILDE_SUBSCRIPTION])
         return sub_records
@@ -1321,8 +1318,8 @@ class FilteredRecordsSource:
             )
 
         """
-        grouped_records = self._grouped_sub_records
-        if len(grouped_records) == 0:
+        records = self._sub_records
+        if len(records) == 0:
             return RecordsFactory.create_instance(
                 None,
                 [
@@ -1331,16 +1328,12 @@ class FilteredRecordsSource:
                     COLUMN_NAME.SOURCE_TIMESTAMP,
                 ]
             )
-        sample_records = list(grouped_records.values())[0]
-        columns = sample_records.columns
-        sub_records = RecordsFactory.create_instance(None, columns)
-
-        if inter_callback_object in grouped_records:
-            sub_records.concat(grouped_records[inter_callback_object].clone())
+        keys = [(inter_callback_object,)]
+        if intra_callback_object is not None:
+            keys.append((intra_callback_object,))
+        sub_records = records.take_groups([COLUMN_NAME.CALLBACK_OBJECT], keys)
 
-        if intra_callback_object is not None and intra_callback_object in grouped_records:
-            intra_sub_records = grouped_records[intra_callback_object].clone()
-            sub_records.concat(intra_sub_records)
+        if intra_callback_object is not None:
             sub_records.sort(COLUMN_NAME.CALLBACK_START_TIMESTAMP)
 
         return sub_records
@@ -1420,9 +1413,9 @@ class FilteredRecordsSource:
 
 
         """
-        grouped_records = self._grouped_intra_comm_records
+        records = self._intra_comm_records
 
-        if len(grouped_records) == 0:
+        if len(records) == 0:
             return RecordsFactory.create_instance(None, [
                 COLUMN_NAME.CALLBACK_OBJECT,
                 COLUMN_NAME.CALLBACK_START_TIMESTAMP,
@@ -1431,19 +1424,17 @@ class FilteredRecordsSource:
                 COLUMN_NAME.MESSAGE_TIMESTAMP
             ])
 
-        sample_records = list(grouped_records.values())[0]
-        columns = sample_records.columns
-        records = RecordsFactory.create_instance(None, columns)
-
+        keys: List[Tuple[int, ...]] = []
         if intra_callback_object is not None:
-            for publisher_handle in publisher_handles:
-                key = (intra_callback_object, publisher_handle)
-                if key in grouped_records:
-                    records_ = grouped_records[key].clone()
-                    records.concat(records_)
-        records.sort(COLUMN_NAME.RCLCPP_PUBLISH_TIMESTAMP)
+            keys = [
+                (intra_callback_object, publisher_handle)
+                for publisher_handle in publisher_handles
+            ]
+        intra_records = records.take_groups(
+            [COLUMN_NAME.CALLBACK_OBJECT, COLUMN_NAME.PUBLISHER_HANDLE], keys)
+        intra_records.sort(COLUMN_NAME.RCLCPP_PUBLISH_TIMESTAMP)
 
-        return records
+        return intra_records
 
     def publish_records(
         self,
@@ -1476,8 +1467,8 @@ class FilteredRecordsSource:
         - tilde_message_id
 
         """
-        grouped_records = self._grouped_publish_records
-        if len(grouped_records) == 0:
+        records = self._publish_records
+        if len(records) == 0:
             return RecordsFactory.create_instance(
                 None,
                 [
@@ -1488,16 +1479,9 @@ class FilteredRecordsSource:
                     COLUMN_NAME.TILDE_MESSAGE_ID,
                 ]
             )
-        sample_records = list(grouped_records.values())[0]
-        columns = sample_records.columns
-        pub_records = RecordsFactory.create_instance(None, columns)
-
-        for publisher_handle in publisher_handles:
-            if publisher_handle in grouped_records:
-                inter_pub_records = grouped_records[publisher_handle].clone()
-                pub_records.concat(inter_pub_records)
-
-        return pub_records
+        return records.take_groups(
+            [COLUMN_NAME.PUBLISHER_HANDLE],
+            [(publisher_handle,) for publisher_handle in publisher_handles])
 
     def tilde_publish_records(
         self,
@@ -1520,8 +1504,8 @@ class FilteredRecordsSource:
             )
 
         """
-        grouped_records = self._grouped_tilde_pub_records
-        if len(grouped_records) == 0:
+        records = self._tilde_pub_records
+        if len(records) == 0:
             return RecordsFactory.create_instance(
                 None,
                 [
@@ -1531,28 +1515,13 @@ class FilteredRecordsSource:
                     COLUMN_NAME.TILDE_SUBSCRIPTION,
                 ]
             )
-        sample_records = list(grouped_records.values())[0]
-        columns = sample_records.columns
-        tilde_records = RecordsFactory.create_instance(None, columns)
-
-        for tilde_publisher in tilde_publishers:
-            if tilde_publisher in grouped_records:
-                tilde_records_ = grouped_records[tilde_publisher].clone()
-                tilde_records.concat(tilde_records_)
+        tilde_records = records.take_groups(
+            [COLUMN_NAME.TILDE_PUBLISHER],
+            [(tilde_publisher,) for tilde_publisher in tilde_publishers])
 
         tilde_records.drop_columns([COLUMN_NAME.TILDE_PUBLISHER])
         return tilde_records
 
-    def _expand_key_tuple(
-        self,
-        group: Dict[Tuple[int, ...], RecordsInterface]
-    ) -> Dict[int, RecordsInterface]:
-        group_: Dict[int, RecordsInterface] = {}
-        for key in group.keys():
-            assert len(key) == 1
-            group_[key[0]] = group[key]
-        return group_
-
     def callback_records(
         self,
         inter_callback_object: int,
@@ -1576,63 +1545,50 @@ class FilteredRecordsSource:
             )
 
         """
-        records = self._grouped_callback_records
-        callback_records = RecordsFactory.create_instance(
-            None,
-            [
-                COLUMN_NAME.CALLBACK_START_TIMESTAMP,
-                COLUMN_NAME.CALLBACK_END_TIMESTAMP,
-                COLUMN_NAME.CALLBACK_OBJECT
-            ]
-        )
+        records = self._callback_records
+        if len(records) == 0:
+            return RecordsFactory.create_instance(
+                None,
+                [
+                    COLUMN_NAME.CALLBACK_START_TIMESTAMP,
+                    COLUMN_NAME.CALLBACK_END_TIMESTAMP,
+                    COLUMN_NAME.CALLBACK_OBJECT
+                ]
+            )
 
-        if inter_callback_object in records:
-            inter_callback_records = records[inter_callback_object].clone()
-            callback_records.concat(inter_callback_records)
+        keys = [(inter_callback_object,)]
+        if intra_callback_object is not None:
+            keys.append((intra_callback_object,))
+        callback_records = records.take_groups([COLUMN_NAME.CALLBACK_OBJECT], keys)
 
-        if intra_callback_object is not None and intra_callback_object in records:
-            intra_callback_records = records[intra_callback_object].clone()
-            callback_records.concat(intra_callback_records)
+        if intra_callback_object is not None:
             callback_records.sort(COLUMN_NAME.CALLBACK_START_TIMESTAMP)
 
         return callback_records
 
-    @cached_property
-    def _grouped_callback_records(self) -> Dict[int, RecordsInterface]:
-        records = self._lttng.compose_callback_records()
-        group = records.groupby([COLUMN_NAME.CALLBACK_OBJECT])
-        return self._expand_key_tuple(group)
+    # The records below are kept with their group indices,
+    # so each lookup takes the rows of the groups without scanning the records.
 
     @cached_property
-    def _grouped_inter_comm_records(self) -> Dict[Tuple[int, ...], RecordsInterface]:
-        records = self._lttng.compose_inter_proc_comm_records()
-        return records.groupby([COLUMN_NAME.CALLBACK_OBJECT, COLUMN_NAME.PUBLISHER_HANDLE])
+    def _callback_records(self) -> RecordsInterface:
+        return self._lttng.compose_callback_records()
 
     @cached_property
-    def _grouped_intra_comm_records(self) -> Dict[Tuple[int, ...], RecordsInterface]:
-        records = self._lttng.compose_intra_proc_comm_records()
-        return records.groupby([COLUMN_NAME.CALLBACK_OBJECT, COLUMN_NAME.PUBLISHER_HANDLE])
+    def _intra_comm_records(self) -> RecordsInterface:
+        return self._lttng.compose_intra_proc_comm_records()
 
     @cached_property
-    def _grouped_publish_records(self) -> Dict[int, RecordsInterface]:
-        records = self._lttng.compose_publish_records()
-        group = records.groupby([COLUMN_NAME.PUBLISHER_HANDLE])
-        return self._expand_key_tuple(group)
+    def _publish_records(self) -> RecordsInterface:
+        return self._lttng.compose_publish_records()
 
     @cached_property
-    def _grouped_sub_records(self) -> Dict[int, RecordsInterface]:
-        records = self._lttng.compose_subscribe_records()
-        group = records.groupby([COLUMN_NAME.CALLBACK_OBJECT])
-        return self._expand_key_tuple(group)
+    def _sub_records(self) -> RecordsInterface:
+        return self._lttng.compose_subscribe_records()
 
     @cached_property
-    def _grouped_tilde_pub_records(self) -> Dict[int, RecordsInterface]:
-        records = self._lttng.compose_tilde_publish_records()
-        group = records.groupby([COLUMN_NAME.TILDE_PUBLISHER])
-        return self._expand_key_tuple(group)
+    def _tilde_pub_records(self) -> RecordsInterface:
+        return self._lttng.compose_tilde_publish_records()
 
     @cached_property
-    def _grouped_tilde_sub_records(self) -> Dict[int, RecordsInterface]:
-        records = self._lttng.compose_tilde_subscribe_records()
-        group = records.groupby([COLUMN_NAME.TILDE_SUBSCRIPTION])
-        return self._expand_key_tuple(group)
+    def _tilde_sub_records(self) -> RecordsInterface:
+        return self._lttng.compose_tilde_subscribe_records()
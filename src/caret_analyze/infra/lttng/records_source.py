@@ -12,16 +12,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from functools import cached_property
+from __future__ import annotations
 
-from typing import Dict, List, Sequence
+from functools import cached_property, wraps
+
+from typing import Callable, Dict, List, Optional, Sequence
 
 from .column_names import COLUMN_NAME
 from .events_factory import EventsFactory
 from .lttng_info import LttngInfo
 from .ros2_tracing.data_model import Ros2DataModel
+from .trace_cache import RecordsCache
 from .value_objects import TimerCallbackValueLttng, TimerControl, TimerInit
-from ...common import Columns, Util
+from ...common import Columns, Progress, Util
 from ...record import (merge, merge_sequencial,
                        merge_sequencial_for_addr_track,
                        RecordFactory,
@@ -29,19 +32,47 @@ from ...record import (merge, merge_sequencial,
                        RecordsInterface)
 
 
+# Names of the records which are saved to the records cache and snapshots.
+DISK_CACHED_RECORDS: List[str] = []
+
+
+def _disk_cached(
+    f: Callable[[RecordsSource], RecordsInterface]
+) -> Callable[[RecordsSource], RecordsInterface]:
+    """Load records from the records cache, or compose and save them if not cached."""
+    DISK_CACHED_RECORDS.append(f.__name__)
+
+    @wraps(f)
+    def wrapper(self: RecordsSource) -> RecordsInterface:
+        with Progress.stage(f'RecordsSource.{f.__name__}') as stage:
+            records = None if self._cache is None else self._cache.load(f.__name__)
+            if records is None:
+                records = f(self)
+                if self._cache is not None:
+                    self._cache.save(f.__name__, records)
+            stage.rows = len(records)
+        return records
+    return wrapper
+
+
 class RecordsSource():
 
     def __init__(
         self,
         data: Ros2DataModel,
-        info: LttngInfo
+        info: LttngInfo,
+        cache: Optional[RecordsCache] = None
     ) -> None:
         self._data = data
         self._preprocess(self._data)
         self._info = info
+        self._cache = cache
 
     @staticmethod
     def _preprocess(data: Ros2DataModel):
+        # Data appended to preprocessed data is preprocessed separately.
+        if COLUMN_NAME.RCLCPP_PUBLISH_TIMESTAMP not in data.rclcpp_publish_instances.columns:
+            return
         data.rclcpp_publish_instances.rename_columns(
             {COLUMN_NAME.RCLCPP_PUBLISH_TIMESTAMP: COLUMN_NAME.RCLCPP_INTER_PUBLISH_TIMESTAMP}
         )
@@ -56,6 +87,7 @@ class RecordsSource():
         return group
 
     @cached_property
+    @_disk_cached
     def inter_proc_comm_records(self) -> RecordsInterface:
         """
         Compose inter process communication records.
@@ -218,6 +250,7 @@ class RecordsSource():
         return communication
 
     @cached_property
+    @_disk_cached
     def publish_records(self) -> RecordsInterface:
         """
         Compose publish records.
@@ -464,6 +497,7 @@ class RecordsSource():
         return intra_proc_subscribe
 
     @cached_property
+    @_disk_cached
     def subscribe_records(self) -> RecordsInterface:
         callback_start_instances = self.inter_callback_records
         inter_proc_subscrube = self._data.dispatch_subscription_callback_instances
@@ -498,6 +532,7 @@ class RecordsSource():
         return subscribe
 
     @cached_property
+    @_disk_cached
     def intra_proc_comm_records(self) -> RecordsInterface:
         """
         Compose intra process communication records.
@@ -594,6 +629,7 @@ class RecordsSource():
         return intra_records
 
     @cached_property
+    @_disk_cached
     def callback_records(self) -> RecordsInterface:
         """
         Compose callback records.
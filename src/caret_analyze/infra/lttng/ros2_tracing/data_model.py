@@ -15,7 +15,15 @@
 
 """Module for ROS 2 data model."""
 
-from caret_analyze.record.record_factory import RecordFactory, RecordsFactory
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import DefaultDict, Dict, Optional, Tuple
+
+from caret_analyze.record.interface import RecordsInterface
+from caret_analyze.record.record_factory import RecordsFactory
+from caret_analyze.record.records_buffer import RecordsBuffer
+from caret_analyze.record.records_filter import InRange
 import pandas as pd
 
 from tracetools_analysis.data_model import (DataModel,
@@ -132,6 +140,30 @@ class Ros2DataModel(DataModel):
                 'time_event_stamp']
         )
 
+        # Events are buffered in columns, and moved to the records above on finalize.
+        self._callback_start_instances = RecordsBuffer(self.callback_start_instances.columns)
+        self._callback_end_instances = RecordsBuffer(self.callback_end_instances.columns)
+        self._dds_write_instances = RecordsBuffer(self.dds_write_instances.columns)
+        self._dds_bind_addr_to_stamp = RecordsBuffer(self.dds_bind_addr_to_stamp.columns)
+        self._dds_bind_addr_to_addr = RecordsBuffer(self.dds_bind_addr_to_addr.columns)
+        self._on_data_available_instances = RecordsBuffer(self.on_data_available_instances.columns)
+        self._rclcpp_intra_publish_instances = RecordsBuffer(
+            self.rclcpp_intra_publish_instances.columns)
+        self._rclcpp_publish_instances = RecordsBuffer(self.rclcpp_publish_instances.columns)
+        self._rcl_publish_instances = RecordsBuffer(self.rcl_publish_instances.columns)
+        self._dispatch_subscription_callback_instances = RecordsBuffer(
+            self.dispatch_subscription_callback_instances.columns)
+        self._dispatch_intra_process_subscription_callback_instances = RecordsBuffer(
+            self.dispatch_intra_process_subscription_callback_instances.columns)
+        self._message_construct_instances = RecordsBuffer(self.message_construct_instances.columns)
+        self._tilde_subscribe = RecordsBuffer(self.tilde_subscribe.columns)
+        self._tilde_publish = RecordsBuffer(self.tilde_publish.columns)
+        self._sim_time = RecordsBuffer(self.sim_time.columns)
+
+        # Events are counted by trace point and handle on dispatch,
+        # so that the counts are available without converting the records.
+        self.event_counts: DefaultDict[Tuple[str, Optional[int]], int] = defaultdict(int)
+
     def add_context(self, pid, context_handle, timestamp, version) -> None:
         record = {
             'context_handle': context_handle,
@@ -293,20 +325,12 @@ class Ros2DataModel(DataModel):
     def add_callback_start_instance(
         self, timestamp: int, callback: int, is_intra_process: bool
     ) -> None:
-        record = RecordFactory.create_instance(
-            {
-                'callback_start_timestamp': timestamp,
-                'callback_object': callback,
-                'is_intra_process': is_intra_process,
-            }
-        )
-        self.callback_start_instances.append(record)
+        self.event_counts['ros2:callback_start', callback] += 1
+        self._callback_start_instances.append(timestamp, callback, is_intra_process)
 
     def add_callback_end_instance(self, timestamp: int, callback: int) -> None:
-        record = RecordFactory.create_instance(
-            {'callback_end_timestamp': timestamp, 'callback_object': callback}
-        )
-        self.callback_end_instances.append(record)
+        self.event_counts['ros2:callback_end', callback] += 1
+        self._callback_end_instances.append(timestamp, callback)
 
     def add_rclcpp_intra_publish_instance(
         self,
@@ -316,16 +340,9 @@ class Ros2DataModel(DataModel):
         message: int,
         message_timestamp: int,
     ) -> None:
-        record = RecordFactory.create_instance(
-            {
-                'tid': tid,
-                'rclcpp_intra_publish_timestamp': timestamp,
-                'publisher_handle': publisher_handle,
-                'message': message,
-                'message_timestamp': message_timestamp,
-            }
-        )
-        self.rclcpp_intra_publish_instances.append(record)
+        self.event_counts['ros2:rclcpp_intra_publish', publisher_handle] += 1
+        self._rclcpp_intra_publish_instances.append(
+            tid, timestamp, publisher_handle, message, message_timestamp)
 
     def add_rclcpp_publish_instance(
         self,
@@ -335,16 +352,9 @@ class Ros2DataModel(DataModel):
         message: int,
         message_timestamp: int,
     ) -> None:
-        record = RecordFactory.create_instance(
-            {
-                'tid': tid,
-                'rclcpp_publish_timestamp': timestamp,
-                'publisher_handle': publisher_handle,
-                'message': message,
-                'message_timestamp': message_timestamp,
-            }
-        )
-        self.rclcpp_publish_instances.append(record)
+        self.event_counts['ros2:rclcpp_publish', publisher_handle] += 1
+        self._rclcpp_publish_instances.append(
+            tid, timestamp, publisher_handle, message, message_timestamp)
 
     def add_rcl_publish_instance(
         self,
@@ -353,15 +363,8 @@ class Ros2DataModel(DataModel):
         publisher_handle: int,
         message: int,
     ) -> None:
-        record = RecordFactory.create_instance(
-            {
-                'tid': tid,
-                'rcl_publish_timestamp': timestamp,
-                'publisher_handle': publisher_handle,
-                'message': message,
-            }
-        )
-        self.rcl_publish_instances.append(record)
+        self.event_counts['ros2:rcl_publish', publisher_handle] += 1
+        self._rcl_publish_instances.append(tid, timestamp, publisher_handle, message)
 
     def add_dds_write_instance(
         self,
@@ -369,14 +372,8 @@ class Ros2DataModel(DataModel):
         timestamp: int,
         message: int,
     ) -> None:
-        record = RecordFactory.create_instance(
-            {
-                'tid': tid,
-                'dds_write_timestamp': timestamp,
-                'message': message,
-            }
-        )
-        self.dds_write_instances.append(record)
+        self.event_counts['ros2_caret:dds_write', None] += 1
+        self._dds_write_instances.append(tid, timestamp, message)
 
     def add_dds_bind_addr_to_addr(
         self,
@@ -384,14 +381,8 @@ class Ros2DataModel(DataModel):
         addr_from: int,
         addr_to: int,
     ) -> None:
-        record = RecordFactory.create_instance(
-            {
-                'dds_bind_addr_to_addr_timestamp': timestamp,
-                'addr_from': addr_from,
-                'addr_to': addr_to,
-            }
-        )
-        self.dds_bind_addr_to_addr.append(record)
+        self.event_counts['ros2_caret:dds_bind_addr_to_addr', None] += 1
+        self._dds_bind_addr_to_addr.append(timestamp, addr_from, addr_to)
 
     def add_dds_bind_addr_to_stamp(
         self,
@@ -400,40 +391,22 @@ class Ros2DataModel(DataModel):
         addr: int,
         source_timestamp: int,
     ) -> None:
-        record = RecordFactory.create_instance(
-            {
-                'tid': tid,
-                'dds_bind_addr_to_stamp_timestamp': timestamp,
-                'addr': addr,
-                'source_timestamp': source_timestamp,
-            }
-        )
-        self.dds_bind_addr_to_stamp.append(record)
+        self.event_counts['ros2_caret:dds_bind_addr_to_stamp', None] += 1
+        self._dds_bind_addr_to_stamp.append(tid, timestamp, addr, source_timestamp)
 
     def add_on_data_available_instance(
         self,
         timestamp: int,
         source_timestamp: int,
     ) -> None:
-        record = RecordFactory.create_instance(
-            {
-                'on_data_available_timestamp': timestamp,
-                'source_timestamp': source_timestamp,
-            }
-        )
-        self.on_data_available_instances.append(record)
+        self.event_counts['ros2_caret:on_data_available', None] += 1
+        self._on_data_available_instances.append(timestamp, source_timestamp)
 
     def add_message_construct_instance(
         self, timestamp: int, original_message: int, constructed_message: int
     ) -> None:
-        record = RecordFactory.create_instance(
-            {
-                'message_construct_timestamp': timestamp,
-                'original_message': original_message,
-                'constructed_message': constructed_message,
-            }
-        )
-        self.message_construct_instances.append(record)
+        self.event_counts['ros2:message_construct', None] += 1
+        self._message_construct_instances.append(timestamp, original_message, constructed_message)
 
     def add_dispatch_subscription_callback_instance(
         self,
@@ -443,29 +416,17 @@ class Ros2DataModel(DataModel):
         source_timestamp: int,
         message_timestamp: int,
     ) -> None:
-        record = RecordFactory.create_instance(
-            {
-                'dispatch_subscription_callback_timestamp': timestamp,
-                'callback_object': callback_object,
-                'message': message,
-                'source_timestamp': source_timestamp,
-                'message_timestamp': message_timestamp,
-            }
-        )
-        self.dispatch_subscription_callback_instances.append(record)
+        self.event_counts['ros2:dispatch_subscription_callback', callback_object] += 1
+        self._dispatch_subscription_callback_instances.append(
+            timestamp, callback_object, message, source_timestamp, message_timestamp)
 
     def add_sim_time(
         self,
         timestamp: int,
         sim_time: int
     ) -> None:
-        record = RecordFactory.create_instance(
-            {
-                'system_time': timestamp,
-                'sim_time': sim_time
-            }
-        )
-        self.sim_time.append(record)
+        self.event_counts['ros2_caret:sim_time', None] += 1
+        self._sim_time.append(timestamp, sim_time)
 
     def add_rmw_implementation(self, rmw_impl: str):
         self._rmw_impl.append({'rmw_impl': rmw_impl})
@@ -477,16 +438,10 @@ class Ros2DataModel(DataModel):
         message: int,
         message_timestamp: int,
     ) -> None:
-        record = RecordFactory.create_instance(
-            {
-                'dispatch_intra_process_subscription_callback_timestamp': timestamp,
-                'callback_object': callback_object,
-                'message': message,
-                'message_timestamp': message_timestamp
-            }
-        )
-        self.dispatch_intra_process_subscription_callback_instances.append(
-            record)
+        self.event_counts[
+            'ros2:dispatch_intra_process_subscription_callback', callback_object] += 1
+        self._dispatch_intra_process_subscription_callback_instances.append(
+            timestamp, callback_object, message, message_timestamp)
 
     def add_tilde_subscribe(
         self,
@@ -494,14 +449,8 @@ class Ros2DataModel(DataModel):
         subscription: int,
         tilde_message_id: int,
     ) -> None:
-        record = RecordFactory.create_instance(
-            {
-                'tilde_subscribe_timestamp': timestamp,
-                'subscription': subscription,
-                'tilde_message_id': tilde_message_id
-            }
-        )
-        self.tilde_subscribe.append(record)
+        self.event_counts['ros2_caret:tilde_subscribe', subscription] += 1
+        self._tilde_subscribe.append(timestamp, subscription, tilde_message_id)
 
     def add_tilde_publish(
         self,
@@ -510,15 +459,8 @@ class Ros2DataModel(DataModel):
         subscription_id: int,
         tilde_message_id: int,
     ) -> None:
-        record = RecordFactory.create_instance(
-            {
-                'tilde_publish_timestamp': timestamp,
-                'publisher': publisher,
-                'subscription_id': subscription_id,
-                'tilde_message_id': tilde_message_id,
-            }
-        )
-        self.tilde_publish.append(record)
+        self.event_counts['ros2_caret:tilde_publish', publisher] += 1
+        self._tilde_publish.append(timestamp, publisher, subscription_id, tilde_message_id)
 
     def add_executor(
         self,
@@ -738,6 +680,83 @@ class Ros2DataModel(DataModel):
 
         self.rmw_impl = pd.DataFrame.from_dict(self._rmw_impl)
 
+        self._callback_start_instances.flush(self.callback_start_instances)
+        self._callback_end_instances.flush(self.callback_end_instances)
+        self._dds_write_instances.flush(self.dds_write_instances)
+        self._dds_bind_addr_to_stamp.flush(self.dds_bind_addr_to_stamp)
+        self._dds_bind_addr_to_addr.flush(self.dds_bind_addr_to_addr)
+        self._on_data_available_instances.flush(self.on_data_available_instances)
+        self._rclcpp_intra_publish_instances.flush(self.rclcpp_intra_publish_instances)
+        self._rclcpp_publish_instances.flush(self.rclcpp_publish_instances)
+        self._rcl_publish_instances.flush(self.rcl_publish_instances)
+        self._dispatch_subscription_callback_instances.flush(
+            self.dispatch_subscription_callback_instances)
+        self._dispatch_intra_process_subscription_callback_instances.flush(
+            self.dispatch_intra_process_subscription_callback_instances)
+        self._message_construct_instances.flush(self.message_construct_instances)
+        self._tilde_subscribe.flush(self.tilde_subscribe)
+        self._tilde_publish.flush(self.tilde_publish)
+        self._sim_time.flush(self.sim_time)
+
+    def concat(self, other: Ros2DataModel) -> None:
+        """
+        Append the data of other data model.
+
+        Both data models must be finalized.
+        Objects and events of other are appended after those of this data model.
+
+        Parameters
+        ----------
+        other : Ros2DataModel
+            Finalized data model of the following trace.
+
+        """
+        for name, value in vars(other).items():
+            if isinstance(value, list):
+                getattr(self, name).extend(value)
+            elif isinstance(value, pd.DataFrame):
+                if len(value) == 0:
+                    continue
+                df = getattr(self, name)
+                setattr(self, name, value.copy() if len(df) == 0 else pd.concat([df, value]))
+            elif isinstance(value, RecordsInterface):
+                getattr(self, name).concat(value)
+        self.add_event_counts(other.event_counts)
+
+    def add_event_counts(self, event_counts: Dict[Tuple[str, Optional[int]], int]) -> None:
+        """
+        Add the event counts of other data model.
+
+        Parameters
+        ----------
+        event_counts : Dict[Tuple[str, Optional[int]], int]
+            Event counts by trace point and handle.
+
+        """
+        for key, count in event_counts.items():
+            self.event_counts[key] += count
+
+    def drop_events_before(self, timestamp: int) -> None:
+        """
+        Drop the events recorded before timestamp.
+
+        The objects are kept, since the following events refer to them.
+        The event counts are kept, since they count all the events read.
+        The data model must be finalized.
+
+        Parameters
+        ----------
+        timestamp : int
+            Events before this time are dropped.
+
+        """
+        for value in vars(self).values():
+            if not isinstance(value, RecordsInterface) or len(value) == 0:
+                continue
+            # The event timestamp is the first column other than tid.
+            column = next(c for c in value.columns if c != 'tid')
+            value.filter_by(InRange(column, lower=timestamp))
+
     def print_data(self) -> None:
         print('====================ROS 2 DATA MODEL===================')
         print('Contexts:')
@@ -15,10 +15,10 @@
 
 """Module for trace events processor and ROS 2 model creation."""
 
-from typing import Dict, List, Set, Tuple
+from typing import Collection, Dict, List, Set, Tuple
 
 from tracetools_analysis.processor import (EventHandler, EventMetadata,
-                                           HandlerMap)
+                                           HandlerMap, RequiredEventNotFound)
 from tracetools_read import get_field
 
 from .data_model import Ros2DataModel
@@ -167,10 +167,63 @@ class Ros2Handler(EventHandler):
             'ros2:rcl_init',
         }
 
+    @classmethod
+    def check_required_events(
+        cls,
+        event_names: Collection[str],
+    ) -> None:
+        """
+        Check that the required events are handled.
+
+        Processor.process() checks the events in the same way,
+        which is skipped when the events are given to handle() one by one.
+
+        Parameters
+        ----------
+        event_names : Collection[str]
+            Names of the handled events.
+
+        Raises
+        ------
+        RequiredEventNotFound
+            Occurs when a required event is not handled.
+
+        """
+        for name in cls.required_events():
+            if name not in event_names:
+                raise RequiredEventNotFound(f'missing event {name} for {cls.__name__}')
+
     @property
     def data(self) -> Ros2DataModel:
         return super().data  # type: ignore
 
+    def handle(
+        self,
+        event: Dict,
+    ) -> None:
+        """
+        Handle a single event.
+
+        Unlike process(), events can be given one by one,
+        so the whole event list does not have to be kept in memory.
+
+        Parameters
+        ----------
+        event : Dict
+            Trace event converted to dictionary.
+
+        """
+        handler_function = self.handler_map.get(event['_name'])
+        if handler_function is None:
+            return
+
+        pid = event.get('vpid', event.get('pid'))
+        tid = event.get('vtid', event.get('tid'))
+        metadata = EventMetadata(
+            event['_name'], event['_timestamp'], event.get('cpu_id'),
+            event.get('procname'), pid, tid)
+        handler_function(event, metadata)
+
     def _handle_rcl_init(
         self,
         event: Dict,
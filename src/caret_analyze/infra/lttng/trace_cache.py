@@ -0,0 +1,314 @@
+# Copyright 2021 Research Institute of Systems Planning, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import hashlib
+from importlib.metadata import PackageNotFoundError, version
+from io import StringIO
+import json
+from logging import getLogger
+import os
+from typing import AbstractSet, Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .ros2_tracing.data_model import Ros2DataModel
+from ...record import RecordFactory, RecordsFactory, RecordsInterface, RecordsNumpyImpl
+
+logger = getLogger(__name__)
+
+ColumnArrays = Dict[str, Tuple[np.ndarray, np.ndarray]]
+
+
+class TraceCache:
+    """
+    Base class of the on-disk caches of a trace.
+
+    Cache files are stored in the trace directory.
+    They are keyed by the trace files, the event filters, the loaded time window,
+    the loaded event names and the caret_analyze version,
+    so a cache of a modified trace or of other filters is never loaded.
+
+    """
+
+    CACHE_DIR = '.caret_cache'
+    _FORMAT_VERSION = 2
+    _META_KEY = '__meta__'
+
+    def __init__(
+        self,
+        trace_dir: str,
+        event_filters: Sequence[object],
+        window: Optional[Tuple[float, float]] = None,
+        event_names: Optional[AbstractSet[str]] = None
+    ) -> None:
+        self._trace_dir = trace_dir
+        self._key = self._get_key(trace_dir, event_filters, window, event_names)
+
+    def _get_path(self, name: str) -> str:
+        return os.path.join(self._trace_dir, self.CACHE_DIR, f'{name}_{self._key}.npz')
+
+    def _load_arrays(
+        self,
+        name: str
+    ) -> Optional[Tuple[Dict[str, Any], Dict[str, np.ndarray]]]:
+        path = self._get_path(name)
+        if not os.path.isfile(path):
+            return None
+
+        try:
+            # Object arrays are refused, so that loading a cache never executes code.
+            with np.load(path, allow_pickle=False) as npz:
+                arrays = {key: npz[key] for key in npz.files}
+            meta = json.loads(str(arrays.pop(self._META_KEY)))
+            return meta, arrays
+        except Exception as e:
+            logger.warning(f'Failed to load cache: {path}. {e}')
+            return None
+
+    def _save_arrays(
+        self,
+        name: str,
+        meta: Dict[str, Any],
+        arrays: Dict[str, np.ndarray]
+    ) -> None:
+        path = self._get_path(name)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first not to leave a broken cache.
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **arrays, **{self._META_KEY: np.array(json.dumps(meta))})
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f'Failed to save cache: {path}. {e}')
+
+    @staticmethod
+    def _to_table(
+        name: str,
+        records: RecordsInterface,
+        arrays: Dict[str, np.ndarray]
+    ) -> Dict[str, Any]:
+        # Columns are keyed by their index, since column names may contain any character.
+        columns, column_values = TraceCache._to_columns(records)
+        for i, column in enumerate(columns):
+            values, valid = column_values[column]
+            arrays[f'{name}.{i}.values'] = values
+            arrays[f'{name}.{i}.valid'] = valid
+        return {'columns': columns}
+
+    @staticmethod
+    def _from_table(
+        name: str,
+        table: Dict[str, Any],
+        arrays: Dict[str, np.ndarray]
+    ) -> RecordsInterface:
+        columns: List[str] = table['columns']
+        return TraceCache._to_records(columns, {
+            column: (arrays[f'{name}.{i}.values'], arrays[f'{name}.{i}.valid'])
+            for i, column in enumerate(columns)
+        })
+
+    @staticmethod
+    def _to_columns(records: RecordsInterface) -> Tuple[List[str], ColumnArrays]:
+        if isinstance(records, RecordsNumpyImpl):
+            return records.columns, {c: records.get_column_arrays(c) for c in records.columns}
+
+        column_values: ColumnArrays = {}
+        for column in records.columns:
+            series = records.get_column_series(column)
+            valid = np.array([v is not None for v in series], dtype=bool)
+            values = np.array([0 if v is None else v for v in series], dtype=np.uint64)
+            column_values[column] = (values, valid)
+        return records.columns, column_values
+
+    @staticmethod
+    def _to_records(columns: List[str], column_values: ColumnArrays) -> RecordsInterface:
+        size = len(next(iter(column_values.values()))[0]) if len(column_values) > 0 else 0
+        if RecordsFactory.use_numpy_impl:
+            # The columns are used as they are, without building rows.
+            return RecordsNumpyImpl.from_arrays(
+                columns,
+                {c: values for c, (values, _) in column_values.items()},
+                {c: valid for c, (_, valid) in column_values.items()})
+
+        rows: List[Dict[str, int]] = [{} for _ in range(size)]
+        for column, (values, valid) in column_values.items():
+            for row, value, is_valid in zip(rows, values.tolist(), valid.tolist()):
+                if is_valid:
+                    row[column] = value
+        return RecordsFactory.create_instance(
+            [RecordFactory.create_instance(row) for row in rows], columns)
+
+    @staticmethod
+    def _get_key(
+        trace_dir: str,
+        event_filters: Sequence[object],
+        window: Optional[Tuple[float, float]] = None,
+        event_names: Optional[AbstractSet[str]] = None
+    ) -> str:
+        key = hashlib.sha256()
+        key.update(str(TraceCache._FORMAT_VERSION).encode())
+        key.update(TraceCache._get_version().encode())
+        key.update(os.path.abspath(trace_dir).encode())
+
+        for root, dirs, files in os.walk(trace_dir):
+            dirs[:] = sorted(d for d in dirs if d != TraceCache.CACHE_DIR)
+            for file in sorted(files):
+                path = os.path.join(root, file)
+                stat = os.stat(path)
+                key.update(f'{os.path.relpath(path, trace_dir)}:'
+                           f'{stat.st_mtime_ns}:{stat.st_size};'.encode())
+
+        for event_filter in event_filters:
+            key.update(TraceCache._describe(event_filter).encode())
+        key.update(f'window={window!r}'.encode())
+        if event_names is not None:
+            key.update(f'event_names={sorted(event_names)!r}'.encode())
+
+        return key.hexdigest()
+
+    @staticmethod
+    def _describe(obj: object) -> str:
+        # Filters are identified by their class and attributes.
+        if isinstance(obj, (int, float, str, bool, type(None))):
+            return repr(obj)
+        attrs = ','.join(
+            f'{k}={TraceCache._describe(v)}' for k, v in sorted(vars(obj).items()))
+        return f'{type(obj).__name__}({attrs})'
+
+    @staticmethod
+    def _get_version() -> str:
+        try:
+            return version('caret_analyze')
+        except PackageNotFoundError:
+            return 'unknown'
+
+
+class DataModelCache(TraceCache):
+    """On-disk cache of the processed Ros2DataModel."""
+
+    @property
+    def path(self) -> str:
+        """
+        Get cache file path.
+
+        Returns
+        -------
+        str
+            Path of the cache file for the current trace and filters.
+
+        """
+        return self._get_path('data_model')
+
+    def load(self) -> Optional[Tuple[Ros2DataModel, Dict[str, Any]]]:
+        """
+        Load the cached data model.
+
+        Returns
+        -------
+        Optional[Tuple[Ros2DataModel, Dict[str, Any]]]
+            Finalized data model and trace information saved with it.
+            None if no valid cache exists.
+
+        """
+        cache = self._load_arrays('data_model')
+        if cache is None:
+            return None
+        meta, arrays = cache
+
+        data = Ros2DataModel()
+        data.add_event_counts(
+            {(trace_point, handle): count
+             for trace_point, handle, count in meta['event_counts']})
+        for name, obj in meta['objects'].items():
+            setattr(data, name, pd.read_json(StringIO(obj), orient='table'))
+        for name, table in meta['data_model'].items():
+            setattr(data, name, self._from_table(name, table, arrays))
+        return data, meta['info']
+
+    def save(self, data: Ros2DataModel, info: Dict[str, Any]) -> None:
+        """
+        Save the data model.
+
+        Parameters
+        ----------
+        data : Ros2DataModel
+            Finalized data model.
+        info : Dict[str, Any]
+            Trace information to be restored with the data model.
+
+        """
+        # Tables of objects are kept as JSON, as in TraceSnapshot.
+        objects: Dict[str, str] = {}
+        tables: Dict[str, Dict[str, Any]] = {}
+        arrays: Dict[str, np.ndarray] = {}
+        for name, value in vars(data).items():
+            if isinstance(value, pd.DataFrame):
+                objects[name] = value.to_json(orient='table')
+            elif isinstance(value, RecordsInterface):
+                tables[name] = self._to_table(name, value, arrays)
+
+        self._save_arrays('data_model', {
+            'objects': objects,
+            'data_model': tables,
+            'event_counts': [
+                [trace_point, handle, count]
+                for (trace_point, handle), count in data.event_counts.items()
+            ],
+            'info': info,
+        }, arrays)
+
+
+class RecordsCache(TraceCache):
+    """On-disk cache of the records composed by RecordsSource."""
+
+    def load(self, name: str) -> Optional[RecordsInterface]:
+        """
+        Load cached records.
+
+        Parameters
+        ----------
+        name : str
+            Name of the records.
+
+        Returns
+        -------
+        Optional[RecordsInterface]
+            Cached records. None if no valid cache exists.
+
+        """
+        cache = self._load_arrays(f'records_{name}')
+        if cache is None:
+            return None
+        meta, arrays = cache
+        return self._from_table('records', meta['records'], arrays)
+
+    def save(self, name: str, records: RecordsInterface) -> None:
+        """
+        Save records.
+
+        Parameters
+        ----------
+        name : str
+            Name of the records.
+        records : RecordsInterface
+            Records to be saved.
+
+        """
+        arrays: Dict[str, np.ndarray] = {}
+        meta = {'records': self._to_table('records', records, arrays)}
+        self._save_arrays(f'records_{name}', meta, arrays)
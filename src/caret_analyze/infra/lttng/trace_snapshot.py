@@ -0,0 +1,236 @@
+# Copyright 2021 Research Institute of Systems Planning, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import json
+from logging import getLogger
+import os
+import shutil
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .ros2_tracing.data_model import Ros2DataModel
+from .trace_cache import ColumnArrays, RecordsCache, TraceCache
+from ...exceptions import InvalidArgumentError
+from ...record import RecordsInterface
+
+logger = getLogger(__name__)
+
+
+class TraceSnapshot:
+    """
+    Snapshot of a processed trace in memory-mapped column files.
+
+    A snapshot is a directory with the following layout.
+
+    - schema.json: tables, their columns and sizes, and the trace information.
+    - columns/<section>/<table>/<i>.u64: uint64 values of the i-th column.
+    - columns/<section>/<table>/<i>.valid: bool mask of the i-th column,
+      only if some values are missing.
+    - objects/<name>.json: object tables of the data model.
+
+    With RecordsNumpyImpl, the column files are mapped copy-on-write,
+    so processes opening the same snapshot share the page cache.
+
+    """
+
+    SCHEMA_FILE = 'schema.json'
+    _FORMAT_VERSION = 1
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+
+    @staticmethod
+    def is_snapshot(path: str) -> bool:
+        """
+        Check whether the path is a snapshot.
+
+        Parameters
+        ----------
+        path : str
+            Path to check.
+
+        Returns
+        -------
+        bool
+            True if the path is a snapshot directory.
+
+        """
+        return os.path.isfile(os.path.join(path, TraceSnapshot.SCHEMA_FILE))
+
+    def save(
+        self,
+        data: Ros2DataModel,
+        records: Dict[str, RecordsInterface],
+        info: Dict[str, Any]
+    ) -> None:
+        """
+        Save the data model and records.
+
+        Parameters
+        ----------
+        data : Ros2DataModel
+            Finalized data model.
+        records : Dict[str, RecordsInterface]
+            Records composed from the data model, by name.
+        info : Dict[str, Any]
+            Trace information to be restored with the data model.
+            Values must be JSON serializable.
+
+        Raises
+        ------
+        InvalidArgumentError
+            Occurs when the path exists and is not a snapshot.
+
+        """
+        if os.path.exists(self._path):
+            if not self.is_snapshot(self._path):
+                raise InvalidArgumentError(f'Path exists and is not a snapshot: {self._path}')
+            shutil.rmtree(self._path)
+        os.makedirs(os.path.join(self._path, 'objects'))
+
+        objects: List[str] = []
+        data_model_tables: Dict[str, Dict[str, Any]] = {}
+        for name, value in vars(data).items():
+            if isinstance(value, pd.DataFrame):
+                value.to_json(self._get_object_path(name), orient='table')
+                objects.append(name)
+            elif isinstance(value, RecordsInterface):
+                data_model_tables[name] = self._save_table('data_model', name, value)
+
+        records_tables = {
+            name: self._save_table('records', name, value) for name, value in records.items()
+        }
+
+        schema = {
+            'format_version': self._FORMAT_VERSION,
+            'objects': objects,
+            'data_model': data_model_tables,
+            'records': records_tables,
+            'event_counts': [
+                [trace_point, handle, count]
+                for (trace_point, handle), count in data.event_counts.items()
+            ],
+            'info': info,
+        }
+        # The schema is written last, so an interrupted save is not taken as a snapshot.
+        with open(os.path.join(self._path, self.SCHEMA_FILE), 'w') as f:
+            json.dump(schema, f)
+
+    def load(self) -> Tuple[Ros2DataModel, Dict[str, RecordsInterface], Dict[str, Any]]:
+        """
+        Load the data model and records.
+
+        Returns
+        -------
+        Tuple[Ros2DataModel, Dict[str, RecordsInterface], Dict[str, Any]]
+            Finalized data model, records by name and trace information.
+
+        Raises
+        ------
+        InvalidArgumentError
+            Occurs when the path is not a snapshot of this format version.
+
+        """
+        if not self.is_snapshot(self._path):
+            raise InvalidArgumentError(f'Path is not a snapshot: {self._path}')
+        with open(os.path.join(self._path, self.SCHEMA_FILE)) as f:
+            schema = json.load(f)
+        if schema.get('format_version') != self._FORMAT_VERSION:
+            raise InvalidArgumentError(
+                f'Unsupported snapshot format: {schema.get("format_version")}')
+
+        data = Ros2DataModel()
+        for name in schema['objects']:
+            setattr(data, name, pd.read_json(self._get_object_path(name), orient='table'))
+        for name, table in schema['data_model'].items():
+            setattr(data, name, self._load_table('data_model', name, table))
+        data.add_event_counts(
+            {(trace_point, handle): count
+             for trace_point, handle, count in schema['event_counts']})
+
+        records = {
+            name: self._load_table('records', name, table)
+            for name, table in schema['records'].items()
+        }
+        return data, records, schema['info']
+
+    def _get_object_path(self, name: str) -> str:
+        return os.path.join(self._path, 'objects', f'{name}.json')
+
+    def _get_column_path(self, section: str, table: str, index: int, suffix: str) -> str:
+        return os.path.join(self._path, 'columns', section, table, f'{index}.{suffix}')
+
+    def _save_table(
+        self,
+        section: str,
+        name: str,
+        records: RecordsInterface
+    ) -> Dict[str, Any]:
+        os.makedirs(os.path.join(self._path, 'columns', section, name))
+        columns, column_values = TraceCache._to_columns(records)
+        for i, column in enumerate(columns):
+            values, valid = column_values[column]
+            values.astype(np.uint64, copy=False).tofile(
+                self._get_column_path(section, name, i, 'u64'))
+            if not valid.all():
+                valid.astype(bool, copy=False).tofile(
+                    self._get_column_path(section, name, i, 'valid'))
+        return {'columns': columns, 'size': len(records)}
+
+    def _load_table(
+        self,
+        section: str,
+        name: str,
+        table: Dict[str, Any]
+    ) -> RecordsInterface:
+        columns: List[str] = table['columns']
+        size: int = table['size']
+        column_values: ColumnArrays = {}
+        for i, column in enumerate(columns):
+            values = self._map(self._get_column_path(section, name, i, 'u64'), np.uint64, size)
+            valid_path = self._get_column_path(section, name, i, 'valid')
+            if os.path.isfile(valid_path):
+                valid = self._map(valid_path, np.bool_, size)
+            else:
+                valid = np.ones(size, dtype=bool)
+            column_values[column] = (values, valid)
+
+        # RecordsNumpyImpl uses the mapped columns as they are.
+        return TraceCache._to_records(columns, column_values)
+
+    @staticmethod
+    def _map(path: str, dtype: Any, size: int) -> np.ndarray:
+        # An empty file cannot be mapped.
+        if size == 0:
+            return np.zeros(0, dtype=dtype)
+        # Copy-on-write, so records modified in place do not change the snapshot.
+        return np.memmap(path, dtype=dtype, mode='c', shape=(size,))
+
+
+class SnapshotRecordsCache(RecordsCache):
+    """Records cache which serves the records loaded from a snapshot."""
+
+    def __init__(self, records: Dict[str, RecordsInterface]) -> None:
+        self._records = records
+
+    def load(self, name: str) -> Optional[RecordsInterface]:
+        return self._records.get(name)
+
+    def save(self, name: str, records: RecordsInterface) -> None:
+        # Records not in the snapshot are kept in memory only.
+        self._records[name] = records
@@ -22,16 +22,28 @@ from .record import (merge,
                      RecordsInterface)
 
 from .record_factory import RecordFactory, RecordsFactory
+from .record_numpy_impl import RecordsNumpyImpl
+from .records_buffer import RecordsBuffer
+from .records_filter import And, Equals, InRange, IsIn, IsNull, Or, RecordsFilter
 
 __all__ = [
+    'And',
     'Clip',
     'DataFrameShaper',
+    'Equals',
+    'InRange',
+    'IsIn',
+    'IsNull',
+    'Or',
     'Record',
     'RecordFactory',
     'RecordInterface',
     'Records',
     'RecordsFactory',
+    'RecordsBuffer',
+    'RecordsFilter',
     'RecordsInterface',
+    'RecordsNumpyImpl',
     'Strip',
     'merge',
     'merge_sequencial',
@@ -15,10 +15,14 @@
 from __future__ import annotations
 
 from abc import abstractmethod
-from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+from typing import (Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple,
+                    TYPE_CHECKING)
 
 import pandas as pd
 
+if TYPE_CHECKING:
+    from .records_filter import RecordsFilter
+
 
 class RecordInterface:
     """
@@ -286,6 +290,27 @@ class RecordsInterface:
         """
         pass
 
+    @abstractmethod
+    def filter_by(self, condition: RecordsFilter) -> None:
+        """
+        Filter records by a condition of column values.
+
+        Unlike filter_if, columnar records evaluate the condition
+        for all rows at once, without calling Python for each row.
+
+        Parameters
+        ----------
+        condition : RecordsFilter
+            Condition of the rows to keep.
+
+        Raises
+        ------
+        InvalidArgumentError
+            Occurs when the condition uses unknown columns.
+
+        """
+        pass
+
     @property
     @abstractmethod
     def data(self) -> Sequence[RecordInterface]:
@@ -370,10 +395,17 @@ class RecordsInterface:
         pass
 
     @abstractmethod
-    def to_dataframe(self) -> pd.DataFrame:
+    def to_dataframe(self, copy: bool = True) -> pd.DataFrame:
         """
         Convert to pandas dataframe.
 
+        Parameters
+        ----------
+        copy : bool
+            If False, columnar records share their column buffers with the dataframe,
+            so neither of them must be modified in place.
+            Records holding rows always build new columns.
+
         Returns
         -------
         pandas.DataFrame
@@ -586,6 +618,9 @@ class RecordsInterface:
         """
         Get duplicated records.
 
+        The storage is shared copy-on-write,
+        so the records are copied only when either of them is modified.
+
         Returns
         -------
         RecordsInterface
@@ -603,3 +638,32 @@ class RecordsInterface:
     def groupby(self, columns: List[str]) -> Dict[Tuple[int, ...], RecordsInterface]:
         """Split based on the value of the given column name."""
         pass
+
+    @abstractmethod
+    def take_groups(
+        self,
+        columns: List[str],
+        keys: Sequence[Tuple[int, ...]]
+    ) -> RecordsInterface:
+        """
+        Get the rows of groups.
+
+        Equivalent to concatenating groupby(columns)[key] for each key,
+        but the row offsets of the groups are kept in the records,
+        so repeated lookups do not scan the records again.
+
+        Parameters
+        ----------
+        columns : List[str]
+            Column names of the group keys.
+        keys : Sequence[Tuple[int, ...]]
+            Keys of the groups in the order of the rows to get.
+            Keys without rows are ignored.
+
+        Returns
+        -------
+        RecordsInterface
+            Rows of the groups with the columns of the records.
+
+        """
+        pass
@@ -17,12 +17,14 @@ from __future__ import annotations
 from copy import deepcopy
 from enum import IntEnum
 from itertools import groupby
-from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Set, Tuple
 
+import numpy as np
 import pandas as pd
 
 from .interface import RecordInterface, RecordsInterface
-from ..common import Columns
+from .records_filter import RecordsFilter
+from ..common import Columns, Progress
 from ..exceptions import InvalidArgumentError
 
 
@@ -89,6 +91,20 @@ class Record(RecordInterface):
         self._columns |= {new_key}
 
 
+class _SharedRows:
+    """Count of the records sharing rows copy-on-write."""
+
+    def __init__(self) -> None:
+        self.count = 1
+
+    def join(self) -> _SharedRows:
+        self.count += 1
+        return self
+
+    def leave(self) -> None:
+        self.count -= 1
+
+
 class Records(RecordsInterface):
 
     def __init__(
@@ -102,6 +118,18 @@ class Records(RecordsInterface):
 
         self._data: List[RecordInterface] = init_
         self._columns: List[str] = columns_
+        # Records sharing the rows, None while the rows are not shared.
+        # The list is copied on the first change and a row when it is changed.
+        self._shared_rows: Optional[_SharedRows] = None
+        # False while the list is shared with a clone.
+        self._owns_list = True
+        # Rows copied since the rows are shared, by id.
+        self._owned_rows: Dict[int, RecordInterface] = {}
+        # Logical to physical column names of the rows.
+        # Renames and drops are applied to the schema, and to the rows on the next access.
+        self._schema: Optional[Dict[str, str]] = None
+        # Row offsets of each group by the key columns, kept until the records are changed.
+        self._group_indices: Dict[Tuple[str, ...], Dict[Tuple[int, ...], List[int]]] = {}
 
     @staticmethod
     def _validate(init: Optional[List[RecordInterface]], columns: Optional[List[str]]) -> None:
@@ -128,15 +156,35 @@ class Records(RecordsInterface):
             raise InvalidArgumentError(msg)
 
     def __len__(self) -> int:
-        return len(self.data)
+        return len(self._data)
 
     @property
     def columns(self) -> List[str]:
         return deepcopy(self._columns)
 
+    def _get_schema(self) -> Dict[str, str]:
+        if self._schema is None:
+            return {c: c for c in self._columns}
+        return dict(self._schema)
+
+    def _apply_schema(self) -> None:
+        # The rows are rebuilt once for all the pending renames and drops.
+        if self._schema is None:
+            return
+        schema = self._schema
+        self._data = [
+            Record({c: data[p] for c, p in schema.items() if p in data})
+            for data in (record.data for record in self._data)
+        ]
+        self._schema = None
+        # The rebuilt rows are not shared with the clones.
+        self._owns_list = True
+        self._release_rows()
+
     def sort(
         self, key: str, sub_key: Optional[str] = None, ascending=True
     ) -> None:
+        self._detach()
         data_ = self.data
 
         if ascending:
@@ -161,6 +209,7 @@ class Records(RecordsInterface):
         ascending=True,
         put_none_at_top=True,
     ) -> None:
+        self._detach()
         data_ = self.data
         maxsize = 2**64 - 1
 
@@ -181,9 +230,12 @@ class Records(RecordsInterface):
 
     @property
     def data(self) -> List[RecordInterface]:
+        self._apply_schema()
         return self._data
 
     def append(self, other: RecordInterface):
+        self._detach()
+        self._apply_schema()
         self._data.append(other)
         unknown_columns = set(other.columns) - set(self.columns)
         if len(unknown_columns) > 0:
@@ -197,54 +249,65 @@ class Records(RecordsInterface):
             msg = 'Contains an unknown columns. '
             msg += f'{unknown_columns}'
             raise InvalidArgumentError(msg)
-        self._data += list(other.data)
+        self._detach()
+        self._apply_schema()
+        other_data = list(other.data)
+        if isinstance(other, Records) and other._shared:
+            # Records are not shared with the clones of other.
+            other_data = [Record(dict(record.data)) for record in other_data]
+        self._data += other_data
 
     def drop_columns(self, columns: List[str]) -> None:
-        data_: List[RecordInterface]
-
-        columns_ = [c for c in self._columns if c not in columns]
-        data_ = self._data
-
-        for record in data_:
-            record.drop_columns(columns)
+        if not isinstance(columns, list):
+            raise InvalidArgumentError('columns must be list.')
 
-        self._columns = columns_
+        schema = self._get_schema()
+        for column in columns:
+            schema.pop(column, None)
+        self._schema = schema
+        self._group_indices = {}
+        self._columns = [c for c in self._columns if c not in columns]
         return None
 
     def rename_columns(self, columns: Dict[str, str]) -> None:
         validate_rename_rule(columns)
 
-        data_: List[RecordInterface]
-        data_ = self._data
-
-        for record in data_:
-            for key_from, key_to in columns.items():
-                if key_from not in record.columns:
-                    continue
-                record.change_dict_key(key_from, key_to)
-
+        schema = self._get_schema()
+        columns_ = list(self._columns)
         for old, new in columns.items():
-            index = self.columns.index(old)
-            self._columns[index] = new
+            index = columns_.index(old)
+            columns_[index] = new
+            schema[new] = schema.pop(old)
+        self._schema = schema
+        self._group_indices = {}
+        self._columns = columns_
         return None
 
     def append_column(self, column: str, values: List[int]) -> None:
         if len(values) != len(self):
             raise InvalidArgumentError('len(values) != len(records)')
 
+        self._detach()
+        self._apply_schema()
         self._columns += [column]
-        for record, value in zip(self.data, values):
-            record.add(column, value)
+        for i, value in enumerate(values):
+            self._own_row(i).add(column, value)
+        self._release_rows()
 
     def filter_if(self, f: Callable[[RecordInterface], bool]) -> None:
+        self._detach()
         records = Records(None, self.columns)
-        for record in self._data:
+        for record in self.data:
             if f(record):
                 records.append(record)
 
         self._data = records._data
         return None
 
+    def filter_by(self, condition: RecordsFilter) -> None:
+        condition.validate(self.columns)
+        self.filter_if(condition)
+
     def equals(self, records: RecordsInterface) -> bool:
         if len(self.data) != len(records.data):
             return False
@@ -268,7 +331,7 @@ class Records(RecordsInterface):
 
         self._columns = columns
 
-    def to_dataframe(self) -> pd.DataFrame:
+    def to_dataframe(self, copy: bool = True) -> pd.DataFrame:
         pd_dict = [record.data for record in self.data]
         return self._to_dataframe(pd_dict, self.columns)
 
@@ -297,36 +360,97 @@ class Records(RecordsInterface):
         df_list: List[Dict[str, int]],
         columns: List[str]
     ) -> pd.DataFrame:
-        # When from_dict is used,
-        # dataframe values are rounded to a float type,
-        # so here uses a dictionary type.
-        df_dict: Dict[str, List[Optional[int]]]
-        df_dict = {c: [None]*len(df_list) for c in columns}
-        for i, df_row in enumerate(df_list):
-            for c in columns:
-                if c in df_row:
-                    df_dict[c][i] = df_row[c]
-
-        df = pd.DataFrame(df_dict, dtype='Int64')
-
-        missing_columns = set(columns) - set(df.columns)
-        df_miss = pd.DataFrame(columns=missing_columns)
-        df = pd.concat([df, df_miss])
-        return df[columns]
+        df_dict = {c: [df_row.get(c) for df_row in df_list] for c in columns}
+        return Records._series_to_dataframe(df_dict, columns)
+
+    @staticmethod
+    def _series_to_dataframe(
+        df_dict: Mapping[str, Sequence[Optional[int]]],
+        columns: List[str]
+    ) -> pd.DataFrame:
+        # The Int64 columns are filled from int64 arrays and missing masks,
+        # so pandas does not infer the type of each value.
+        try:
+            arrays = {c: Records._to_integer_array(df_dict[c]) for c in columns}
+        except OverflowError:
+            # Out of the range of int64. Leave it to pandas.
+            return pd.DataFrame(df_dict, columns=columns, dtype='Int64')
+        # The dict is in the column order. Passing columns takes a slow path of pandas.
+        return pd.DataFrame(arrays, copy=False)
+
+    @staticmethod
+    def _to_integer_array(values: Sequence[Optional[int]]) -> pd.arrays.IntegerArray:
+        size = len(values)
+        mask = np.fromiter((v is None for v in values), dtype=bool, count=size)
+        values_ = np.fromiter((0 if v is None else v for v in values), dtype=np.int64, count=size)
+        return pd.arrays.IntegerArray(values_, mask)
 
     def clone(self) -> Records:
-        from copy import deepcopy
+        records = Records(None, self.columns)
+        records._data = self._data
+        records._schema = self._schema
+        records._group_indices = dict(self._group_indices)
+        self._share_rows(records)
+        self._owns_list = records._owns_list = False
+        return records
 
-        return deepcopy(self)
+    @property
+    def _shared(self) -> bool:
+        return self._shared_rows is not None and self._shared_rows.count > 1
+
+    def _share_rows(self, records: Records) -> None:
+        if self._shared_rows is None:
+            self._shared_rows = _SharedRows()
+        records._shared_rows = self._shared_rows.join()
+        # The copied rows are shared from now on.
+        self._owned_rows = {}
+
+    def _release_rows(self) -> None:
+        # Called once no row is shared, so that the others stop copying.
+        if self._shared_rows is not None:
+            self._shared_rows.leave()
+            self._shared_rows = None
+        self._owned_rows = {}
+
+    def _detach(self) -> None:
+        # Copy the shared list before modifying it.
+        # The rows are copied by _own_row when they are modified.
+        self._group_indices = {}
+        if not self._shared:
+            # The others have copied what they changed.
+            self._owns_list = True
+            self._release_rows()
+        elif not self._owns_list:
+            self._data = list(self._data)
+            self._owns_list = True
+
+    def _own_row(self, index: int) -> RecordInterface:
+        # Get the row to be modified, copying it if it is shared.
+        record = self._data[index]
+        if self._shared and id(record) not in self._owned_rows:
+            record = Record(dict(record.data))
+            self._data[index] = record
+            self._owned_rows[id(record)] = record
+        return record
+
+    def _take(self, indices: Sequence[int]) -> Records:
+        # The rows are shared copy-on-write.
+        data = self.data
+        records = Records(None, self.columns)
+        records._data = [data[i] for i in indices]
+        self._share_rows(records)
+        return records
 
     def bind_drop_as_delay(self) -> None:
+        self._detach()
         self.sort_column_order(ascending=False, put_none_at_top=False)
 
         oldest_values: Dict[str, int] = {}
 
-        for record in self.data:
+        for i, record in enumerate(self.data):
             for key in self.columns:
                 if key not in record.columns and key in oldest_values.keys():
+                    record = self._own_row(i)
                     record.add(key, oldest_values[key])
                 if key in record.columns:
                     oldest_values[key] = record.get(key)
@@ -405,7 +529,7 @@ class Records(RecordsInterface):
                 if left_record.get(column_found_right_record) is False:
                     empty_records.append(left_record)
 
-        for record in concat_records._data:
+        for record in concat_records.data:
 
             if record.get(column_has_valid_join_key) is False:
                 empty_records.append(record)
@@ -649,7 +773,7 @@ class Records(RecordsInterface):
         merged_records_column += sink_records.columns
         merged_records: Records = Records(None, merged_records_column.as_list())
 
-        concat_records = Records(source_records._data + copy_records._data + sink_records._data,
+        concat_records = Records(source_records.data + copy_records.data + sink_records.data,
                                  merged_records_column.as_list())
         concat_records.sort(column_timestamp, ascending=False)
         # Searching for records in chronological order is not good
@@ -715,21 +839,39 @@ class Records(RecordsInterface):
 
         merged_records.reindex(columns)
         for record in merged_records.data:
-            record.data.pop(sink_from_keys)
+            # Dropped columns are removed from the rows, so the key may have been removed.
+            record.data.pop(sink_from_keys, None)
 
         return merged_records
 
     def groupby(self, columns: List[str]) -> Dict[Tuple[int, ...], RecordsInterface]:
-        group: Dict[Tuple[int, ...], RecordsInterface] = {}
+        return {
+            k: self._take(indices) for k, indices in self._get_group_index(columns).items()
+        }
+
+    def take_groups(
+        self,
+        columns: List[str],
+        keys: Sequence[Tuple[int, ...]]
+    ) -> Records:
+        group_index = self._get_group_index(columns)
+        return self._take([i for k in keys if k in group_index for i in group_index[k]])
 
+    def _get_group_index(self, columns: List[str]) -> Dict[Tuple[int, ...], List[int]]:
+        columns_ = tuple(columns)
+        if columns_ in self._group_indices:
+            return self._group_indices[columns_]
+
+        group_index: Dict[Tuple[int, ...], List[int]] = {}
         m = 2**64 - 1
-        for record in self._data:
+        for i, record in enumerate(self.data):
             k = tuple(record.get_with_default(column, m) for column in columns)
-            if k not in group:
-                group[k] = Records(None, self._columns)
-            group[k].append(record)
+            if k not in group_index:
+                group_index[k] = []
+            group_index[k].append(i)
 
-        return group
+        self._group_indices[columns_] = group_index
+        return group_index
 
 
 def merge(
@@ -744,14 +886,17 @@ def merge(
 ) -> RecordsInterface:
     assert type(left_records) == type(right_records)
 
-    return left_records.merge(
-        right_records,
-        join_left_key,
-        join_right_key,
-        columns,
-        how,
-        progress_label=progress_label
-    )
+    with Progress.stage('merge') as stage:
+        merged = left_records.merge(
+            right_records,
+            join_left_key,
+            join_right_key,
+            columns,
+            how,
+            progress_label=progress_label
+        )
+        stage.rows = len(merged)
+    return merged
 
 
 def merge_sequencial(
@@ -768,16 +913,19 @@ def merge_sequencial(
 ) -> RecordsInterface:
     assert type(left_records) == type(right_records)
 
-    return left_records.merge_sequencial(
-        right_records,
-        left_stamp_key,
-        right_stamp_key,
-        join_left_key,
-        join_right_key,
-        columns,
-        how,
-        progress_label=progress_label,
-    )
+    with Progress.stage('merge_sequencial') as stage:
+        merged = left_records.merge_sequencial(
+            right_records,
+            left_stamp_key,
+            right_stamp_key,
+            join_left_key,
+            join_right_key,
+            columns,
+            how,
+            progress_label=progress_label,
+        )
+        stage.rows = len(merged)
+    return merged
 
 
 class RecordType(IntEnum):
@@ -804,19 +952,22 @@ def merge_sequencial_for_addr_track(
     assert type(source_records) == type(copy_records) and type(
         copy_records) == type(sink_records)
 
-    return source_records.merge_sequencial_for_addr_track(
-        source_stamp_key,
-        source_key,
-        copy_records,
-        copy_stamp_key,
-        copy_from_key,
-        copy_to_key,
-        sink_records,
-        sink_stamp_key,
-        sink_from_key,
-        columns,
-        progress_label=progress_label,
-    )
+    with Progress.stage('merge_sequencial_for_addr_track') as stage:
+        merged = source_records.merge_sequencial_for_addr_track(
+            source_stamp_key,
+            source_key,
+            copy_records,
+            copy_stamp_key,
+            copy_from_key,
+            copy_to_key,
+            sink_records,
+            sink_stamp_key,
+            sink_from_key,
+            columns,
+            progress_label=progress_label,
+        )
+        stage.rows = len(merged)
+    return merged
 
 
 def validate_rename_rule(rename_rule: Dict[str, str]):
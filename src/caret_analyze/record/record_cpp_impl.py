@@ -18,7 +18,9 @@ from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
 from record_cpp_impl import RecordBase, RecordsBase
 
-from .record import RecordInterface, Records, RecordsInterface, validate_rename_rule
+from .record import (_SharedRows, RecordInterface, Records, RecordsInterface,
+                     validate_rename_rule)
+from .records_filter import RecordsFilter
 from ..common import Progress
 from ..exceptions import InvalidArgumentError
 
@@ -36,6 +38,10 @@ class RecordsCppImpl(RecordsInterface):
     ):
         Records._validate(init, columns)
         self._records = RecordsBase(init or [], columns or [])
+        # Records sharing the records with a clone, None while they are not shared.
+        self._shared_records: Optional[_SharedRows] = None
+        # Groups by the key columns, kept until the records are changed.
+        self._groups: Dict[Tuple[str, ...], Dict[Tuple[int, ...], RecordsBase]] = {}
 
     def export_yaml(self, path: str) -> None:
         import yaml
@@ -57,6 +63,7 @@ class RecordsCppImpl(RecordsInterface):
             msg += f'{unknown_columns}'
             raise InvalidArgumentError(msg)
 
+        self._detach()
         self._records.append(other)
 
     def concat(
@@ -68,6 +75,7 @@ class RecordsCppImpl(RecordsInterface):
             msg = 'Contains an unknown columns. '
             msg += f'{unknown_columns}'
             raise InvalidArgumentError(msg)
+        self._detach()
         self._records.concat(other._records)
         return None
 
@@ -76,6 +84,7 @@ class RecordsCppImpl(RecordsInterface):
     ) -> None:
         if key not in self.columns:
             raise InvalidArgumentError(f'column [{key}] not found.')
+        self._detach()
         self._records.sort(key, sub_key or '', ascending)
         return None
 
@@ -84,12 +93,14 @@ class RecordsCppImpl(RecordsInterface):
         ascending: bool = True,
         put_none_at_top=True,
     ) -> None:
+        self._detach()
         self._records.sort_column_order(ascending, put_none_at_top)
 
     def bind_drop_as_delay(self) -> None:
+        self._detach()
         self._records.bind_drop_as_delay()
 
-    def to_dataframe(self):
+    def to_dataframe(self, copy: bool = True):
         data_dict = [record.data for record in self.data]
         return Records._to_dataframe(data_dict, self.columns)
 
@@ -97,6 +108,7 @@ class RecordsCppImpl(RecordsInterface):
         self, columns: Dict[str, str]
     ) -> None:
         validate_rename_rule(columns)
+        self._detach()
         self._records.rename_columns(columns)
         return None
 
@@ -137,6 +149,25 @@ class RecordsCppImpl(RecordsInterface):
             group[k] = records
         return group
 
+    def take_groups(
+        self,
+        columns: List[str],
+        keys: Sequence[Tuple[int, ...]]
+    ) -> RecordsCppImpl:
+        assert 0 < len(columns) and len(columns) <= 3
+
+        columns_ = tuple(columns)
+        if columns_ not in self._groups:
+            # The groups are built natively once, and only the taken groups are copied.
+            self._groups[columns_] = self._records.groupby(*columns)
+        groups = self._groups[columns_]
+
+        records = RecordsCppImpl(None, self.columns)
+        for k in keys:
+            if k in groups:
+                records._records.concat(groups[k])
+        return records
+
     def get_row_series(self, index: int) -> RecordInterface:
         if index >= len(self.data):
             raise InvalidArgumentError('index exceeds the row size.')
@@ -160,31 +191,58 @@ class RecordsCppImpl(RecordsInterface):
             msg = 'Contains an unknown columns. '
             msg += f'{miss_match_columns}'
             raise InvalidArgumentError(msg)
+        self._detach()
         self._records.reindex(columns)
 
     def clone(self) -> RecordsCppImpl:
-        records_clone = self._records.clone()
         records = RecordsCppImpl()
-        records._insert_records(records_clone)
+        records._insert_records(self._records)
+        records._groups = dict(self._groups)
+        if self._shared_records is None:
+            self._shared_records = _SharedRows()
+        records._shared_records = self._shared_records.join()
         return records
 
     def _insert_records(self, records: RecordsBase) -> None:
+        self._release_records()
         self._records = records
+        self._groups = {}
+
+    def _release_records(self) -> None:
+        # Called once the records are not shared, so that the others stop copying.
+        if self._shared_records is not None:
+            self._shared_records.leave()
+            self._shared_records = None
+
+    def _detach(self) -> None:
+        # Copy the shared records before modifying them.
+        self._groups = {}
+        if self._shared_records is not None and self._shared_records.count > 1:
+            self._records = self._records.clone()
+        self._release_records()
 
     def append_column(self, column: str, values: List[int]) -> None:
         if len(values) != len(self):
             raise InvalidArgumentError('len(values) != len(records)')
 
+        self._detach()
         self._records.append_column(column, values)
 
     def drop_columns(self, columns: List[str]) -> None:
         if not isinstance(columns, list):
             raise InvalidArgumentError('columns must be list.')
+        self._detach()
         self._records.drop_columns(columns)
 
     def filter_if(self, f: Callable[[RecordInterface], bool]) -> None:
+        self._detach()
         self._records.filter_if(f)
 
+    def filter_by(self, condition: RecordsFilter) -> None:
+        # RecordsBase evaluates only callables.
+        condition.validate(self.columns)
+        self.filter_if(condition)
+
     @property
     def data(self) -> Sequence[RecordInterface]:
         return self._records.data
@@ -16,6 +16,7 @@
 from typing import Dict, List, Optional
 
 from .record import Record, RecordInterface, Records, RecordsInterface
+from .record_numpy_impl import RecordsNumpyImpl
 
 try:
     import caret_analyze.record.record_cpp_impl as cpp_impl
@@ -49,6 +50,15 @@ class RecordFactory:
 
 
 class RecordsFactory:
+    """
+    Factory class for records.
+
+    Set use_numpy_impl to True before loading traces
+    to use RecordsNumpyImpl instead of the C++ or the Python version.
+
+    """
+
+    use_numpy_impl = False
 
     @staticmethod
     def is_cpp_impl_valid() -> bool:
@@ -59,6 +69,8 @@ class RecordsFactory:
         init: Optional[List[RecordInterface]] = None,
         columns: Optional[List[str]] = None
     ) -> RecordsInterface:
+        if RecordsFactory.use_numpy_impl:
+            return RecordsNumpyImpl(init, columns)
         if use_cpp_impl:
             return RecordsFactory._create_cpp_instance(init, columns)
         else:
@@ -0,0 +1,952 @@
+# Copyright 2021 Research Institute of Systems Planning, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+from collections import defaultdict
+import heapq
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .interface import RecordInterface, RecordsInterface
+from .record import Record, Records, RecordType, validate_rename_rule
+from .records_filter import RecordsFilter
+from ..common import Columns
+from ..exceptions import InvalidArgumentError
+
+
+class _JoinIndex:
+    """
+    Index of the rows grouped by the value of a join key column.
+
+    Rows of the i-th key are order[starts[i]:starts[i+1]], in their original order.
+
+    """
+
+    def __init__(self, values: np.ndarray, valid: np.ndarray) -> None:
+        rows = np.flatnonzero(valid)
+        row_order = np.argsort(values[rows], kind='stable')
+        self.order = rows[row_order]
+        sorted_values = values[self.order]
+        is_head = np.ones(len(sorted_values), dtype=bool)
+        is_head[1:] = sorted_values[1:] != sorted_values[:-1]
+        heads = np.flatnonzero(is_head)
+        self.keys = sorted_values[heads]
+        self.starts = np.append(heads, len(sorted_values))
+
+    def probe(self, values: np.ndarray, valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find all pairs of rows with the same key.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            Indexed rows and probe rows of each pair,
+            ordered by key, then probe row, then indexed row.
+
+        """
+        # Sorted keys are searched far faster than keys in random order.
+        rows = np.flatnonzero(valid)
+        rows = rows[np.argsort(values[rows], kind='stable')]
+        probe_values = values[rows]
+        positions = np.searchsorted(self.keys, probe_values)
+        is_found = positions < len(self.keys)
+        is_found[is_found] = self.keys[positions[is_found]] == probe_values[is_found]
+        rows = rows[is_found]
+        positions = positions[is_found]
+
+        counts = self.starts[positions + 1] - self.starts[positions]
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        indexed_rows = self.order[np.repeat(self.starts[positions], counts) + offsets]
+        probe_rows = np.repeat(rows, counts)
+        return indexed_rows, probe_rows
+
+
+class _AddrTracker:
+    """
+    Sink records in flight, indexed by the addresses they are copied from.
+
+    Sinks are kept in insertion order of their address, as a dict does,
+    so that each lookup resolves to the same sinks as Records does.
+
+    """
+
+    def __init__(self) -> None:
+        self._sink_rows: Dict[int, int] = {}
+        self._positions: Dict[int, int] = {}
+        self._addrs: Dict[int, Set[int]] = {}
+        self._holders: Dict[int, Set[int]] = defaultdict(set)
+        self._next_position = 0
+
+    def add_sink(self, sink_addr: int, row: int) -> None:
+        if sink_addr in self._sink_rows:
+            # A newer sink with the same address replaces the previous one.
+            self._discard_addrs(sink_addr, self._addrs[sink_addr])
+        else:
+            self._positions[sink_addr] = self._next_position
+            self._next_position += 1
+        self._sink_rows[sink_addr] = row
+        self._addrs[sink_addr] = set()
+        self._add_addrs(sink_addr, {sink_addr})
+
+    def copy(self, addr_from: int, addr_to: int) -> None:
+        holders = self._holders.get(addr_to)
+        if not holders:
+            return
+        sink_addr = min(holders, key=self._positions.__getitem__)
+        self._add_addrs(sink_addr, {addr_from})
+        self._merge_overlapping(sink_addr)
+
+    def pop_sinks(self, addr: int) -> List[int]:
+        holders = sorted(self._holders.get(addr, ()), key=self._positions.__getitem__)
+        sink_rows = []
+        for sink_addr in holders:
+            sink_rows.append(self._sink_rows.pop(sink_addr))
+            self._discard_addrs(sink_addr, self._addrs.pop(sink_addr))
+            del self._positions[sink_addr]
+        return sink_rows
+
+    def _merge_overlapping(self, sink_addr: int) -> None:
+        # Share addresses with every sink that overlaps, visiting sinks in insertion order.
+        # A sink already passed is not revisited even if it overlaps later.
+        position = -1
+        candidates: List[Tuple[int, int]] = []
+        visited = {sink_addr}
+        new_addrs = set(self._addrs[sink_addr])
+        while True:
+            for addr in new_addrs:
+                for other in self._holders[addr]:
+                    if other not in visited and self._positions[other] > position:
+                        visited.add(other)
+                        heapq.heappush(candidates, (self._positions[other], other))
+            if len(candidates) == 0:
+                return
+            position, other = heapq.heappop(candidates)
+            merged_addrs = self._addrs[sink_addr] | self._addrs[other]
+            new_addrs = merged_addrs - self._addrs[sink_addr]
+            self._add_addrs(sink_addr, new_addrs)
+            self._add_addrs(other, merged_addrs - self._addrs[other])
+
+    def _add_addrs(self, sink_addr: int, addrs: Set[int]) -> None:
+        self._addrs[sink_addr] |= addrs
+        for addr in addrs:
+            self._holders[addr].add(sink_addr)
+
+    def _discard_addrs(self, sink_addr: int, addrs: Set[int]) -> None:
+        for addr in addrs:
+            self._holders[addr].discard(sink_addr)
+
+
+class RecordsNumpyImpl(RecordsInterface):
+    """
+    Columnar records implementation backed by NumPy arrays.
+
+    Each column is held as a uint64 value array and a bool validity mask.
+    A value missing in a row is represented by False in the mask.
+    Rows are materialized as Record only when data is accessed.
+    Join indices built by merge are cached until the records are modified.
+
+    """
+
+    _MIN_CAPACITY = 16
+
+    def __init__(
+        self,
+        init: Optional[List[RecordInterface]] = None,
+        columns: Optional[List[str]] = None
+    ) -> None:
+        init_: List[RecordInterface] = init or []
+        columns_: List[str] = columns or []
+        Records._validate(init_, columns_)
+
+        self._columns: List[str] = list(columns_)
+        self._size = 0
+        self._capacity = 0
+        self._values: Dict[str, np.ndarray] = {}
+        self._valid: Dict[str, np.ndarray] = {}
+        self._join_indices: Dict[str, _JoinIndex] = {}
+        # Row offsets of each group by the key columns.
+        self._group_indices: Dict[Tuple[str, ...], Dict[Tuple[int, ...], np.ndarray]] = {}
+        self._set_rows([record.data for record in init_])
+
+    def _set_rows(self, rows: List[Dict[str, int]]) -> None:
+        size = len(rows)
+        for column in self._columns:
+            self._valid[column] = np.fromiter(
+                (column in row for row in rows), dtype=bool, count=size)
+            self._values[column] = np.fromiter(
+                (row.get(column, 0) for row in rows), dtype=np.uint64, count=size)
+        self._size = size
+        self._capacity = size
+
+    @classmethod
+    def from_arrays(
+        cls,
+        columns: List[str],
+        values: Dict[str, np.ndarray],
+        valid: Optional[Dict[str, np.ndarray]] = None,
+    ) -> RecordsNumpyImpl:
+        """
+        Create records from column arrays.
+
+        Parameters
+        ----------
+        columns : List[str]
+            Column names.
+        values : Dict[str, numpy.ndarray]
+            Values of each column.
+            uint64 arrays are held without copying.
+        valid : Optional[Dict[str, numpy.ndarray]]
+            Validity mask of each column.
+            All values of a column without a mask are valid.
+
+        Returns
+        -------
+        RecordsNumpyImpl
+            Records holding the arrays.
+
+        Raises
+        ------
+        InvalidArgumentError
+            Occurs when the values of a column are not given,
+            or when the lengths of the arrays differ.
+
+        """
+        missing_columns = set(columns) - set(values)
+        if len(missing_columns) > 0:
+            raise InvalidArgumentError(f'Values are not given. {missing_columns}')
+
+        valid = valid or {}
+        size = len(values[columns[0]]) if len(columns) > 0 else 0
+        values_: Dict[str, np.ndarray] = {}
+        valid_: Dict[str, np.ndarray] = {}
+        for column in columns:
+            values_[column] = np.asanyarray(values[column]).astype(np.uint64, copy=False)
+            if column in valid:
+                valid_[column] = np.asanyarray(valid[column]).astype(bool, copy=False)
+            else:
+                valid_[column] = np.ones(size, dtype=bool)
+            if len(values_[column]) != size or len(valid_[column]) != size:
+                raise InvalidArgumentError(f'Length of [{column}] does not match.')
+        return cls._from_arrays(columns, values_, valid_, size)
+
+    @classmethod
+    def _from_arrays(
+        cls,
+        columns: List[str],
+        values: Dict[str, np.ndarray],
+        valid: Dict[str, np.ndarray],
+        size: int,
+    ) -> RecordsNumpyImpl:
+        records = cls(None, columns)
+        records._values = values
+        records._valid = valid
+        records._size = size
+        records._capacity = size
+        return records
+
+    @staticmethod
+    def _from_records(records: RecordsInterface) -> RecordsNumpyImpl:
+        return RecordsNumpyImpl(list(records.data), records.columns)
+
+    def _to_records(self) -> Records:
+        return Records(list(self.data), self.columns)
+
+    def _get_values(self, column: str) -> np.ndarray:
+        return self._values[column][:self._size]
+
+    def _get_valid(self, column: str) -> np.ndarray:
+        return self._valid[column][:self._size]
+
+    def _reserve(self, size: int) -> None:
+        if size <= self._capacity:
+            return
+
+        capacity = max(size, self._capacity * 2, self._MIN_CAPACITY)
+        for column in self._columns:
+            values = np.zeros(capacity, dtype=np.uint64)
+            values[:self._size] = self._get_values(column)
+            valid = np.zeros(capacity, dtype=bool)
+            valid[:self._size] = self._get_valid(column)
+            self._values[column] = values
+            self._valid[column] = valid
+        self._capacity = capacity
+
+    def _take(self, indices: np.ndarray) -> RecordsNumpyImpl:
+        return RecordsNumpyImpl._from_arrays(
+            self.columns,
+            {c: self._get_values(c)[indices] for c in self._columns},
+            {c: self._get_valid(c)[indices] for c in self._columns},
+            len(indices),
+        )
+
+    def _reorder(self, indices: np.ndarray) -> None:
+        self._join_indices.clear()
+        self._group_indices.clear()
+        for column in self._columns:
+            self._values[column] = self._get_values(column)[indices]
+            self._valid[column] = self._get_valid(column)[indices]
+        self._size = len(indices)
+        self._capacity = self._size
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    @property
+    def data(self) -> List[RecordInterface]:
+        columns = [
+            (c, self._get_values(c).tolist(), self._get_valid(c).tolist())
+            for c in self._columns
+        ]
+        return [
+            Record({c: values[i] for c, values, valid in columns if valid[i]})
+            for i in range(self._size)
+        ]
+
+    def append(self, other: RecordInterface) -> None:
+        unknown_columns = set(other.columns) - set(self.columns)
+        if len(unknown_columns) > 0:
+            msg = 'Contains an unknown columns. '
+            msg += f'{unknown_columns}'
+            raise InvalidArgumentError(msg)
+
+        self._join_indices.clear()
+        self._group_indices.clear()
+        self._reserve(self._size + 1)
+        data = other.data
+        for column in self._columns:
+            is_valid = column in data
+            self._valid[column][self._size] = is_valid
+            self._values[column][self._size] = data[column] if is_valid else 0
+        self._size += 1
+
+    def concat(self, other: RecordsInterface) -> None:
+        unknown_columns = set(other.columns) - set(self.columns)
+        if len(unknown_columns) > 0:
+            msg = 'Contains an unknown columns. '
+            msg += f'{unknown_columns}'
+            raise InvalidArgumentError(msg)
+
+        if not isinstance(other, RecordsNumpyImpl):
+            for record in other.data:
+                self.append(record)
+            return None
+
+        self._join_indices.clear()
+        self._group_indices.clear()
+        begin = self._size
+        end = begin + len(other)
+        self._reserve(end)
+        for column in self._columns:
+            if column in other._values:
+                self._values[column][begin:end] = other._get_values(column)
+                self._valid[column][begin:end] = other._get_valid(column)
+            else:
+                self._values[column][begin:end] = 0
+                self._valid[column][begin:end] = False
+        self._size = end
+        return None
+
+    def sort(
+        self, key: str, sub_key: Optional[str] = None, ascending=True
+    ) -> None:
+        sort_keys = [key] if sub_key is None else [key, sub_key]
+        for column in sort_keys:
+            if column not in self._columns:
+                raise InvalidArgumentError(f'column [{column}] not found.')
+
+        # np.lexsort uses the last key as the primary key.
+        # Rows without the sort key are placed at the end.
+        lex_keys: List[np.ndarray] = []
+        for column in reversed(sort_keys):
+            values = self._get_values(column)
+            lex_keys.append(values if ascending else ~values)
+            lex_keys.append(~self._get_valid(column))
+
+        self._reorder(np.lexsort(lex_keys))
+        return None
+
+    def sort_column_order(
+        self,
+        ascending=True,
+        put_none_at_top=True,
+    ) -> None:
+        maxsize = 2**64 - 1
+        if ascending:
+            default_value = maxsize if put_none_at_top else 0
+        else:
+            default_value = 0 if put_none_at_top else maxsize
+
+        lex_keys: List[np.ndarray] = []
+        for column in reversed(self._columns):
+            values = np.where(
+                self._get_valid(column), self._get_values(column), np.uint64(default_value))
+            lex_keys.append(values if ascending else ~values)
+
+        if len(lex_keys) > 0:
+            self._reorder(np.lexsort(lex_keys))
+        return None
+
+    def filter_if(self, f: Callable[[RecordInterface], bool]) -> None:
+        mask = np.fromiter((bool(f(record)) for record in self.data), dtype=bool, count=self._size)
+        self._reorder(np.flatnonzero(mask))
+        return None
+
+    def filter_by(self, condition: RecordsFilter) -> None:
+        condition.validate(self.columns)
+        mask = condition.evaluate(
+            lambda column: (self._get_values(column), self._get_valid(column)), self._size)
+        self._reorder(np.flatnonzero(mask))
+        return None
+
+    def get_row_series(self, index: int) -> RecordInterface:
+        if index >= self._size:
+            raise InvalidArgumentError('index exceeds the row size.')
+        return Record({
+            c: int(self._values[c][index]) for c in self._columns if self._valid[c][index]
+        })
+
+    def get_column_series(self, column_name: str) -> Sequence[Optional[int]]:
+        if column_name not in self._columns:
+            raise InvalidArgumentError(f'Unknown column_name: {column_name}')
+        values = self._get_values(column_name).tolist()
+        valid = self._get_valid(column_name).tolist()
+        return [v if is_valid else None for v, is_valid in zip(values, valid)]
+
+    def get_column_arrays(self, column_name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the arrays of a column.
+
+        Parameters
+        ----------
+        column_name : str
+            Column name.
+
+        Returns
+        -------
+        Tuple[numpy.ndarray, numpy.ndarray]
+            uint64 values and validity mask of the column.
+            Values at invalid positions are undefined.
+            The arrays are read-only views, not copies.
+
+        Raises
+        ------
+        InvalidArgumentError
+            Occurs when the column does not exist.
+
+        """
+        if column_name not in self._columns:
+            raise InvalidArgumentError(f'Unknown column_name: {column_name}')
+        values = self._get_values(column_name).view()
+        valid = self._get_valid(column_name).view()
+        values.flags.writeable = False
+        valid.flags.writeable = False
+        return values, valid
+
+    def equals(self, other: RecordsInterface) -> bool:
+        if not isinstance(other, RecordsNumpyImpl):
+            return False
+
+        if self._size != other._size or self._columns != other._columns:
+            return False
+
+        for column in self._columns:
+            valid = self._get_valid(column)
+            if not np.array_equal(valid, other._get_valid(column)):
+                return False
+            if not np.array_equal(
+                self._get_values(column)[valid], other._get_values(column)[valid]
+            ):
+                return False
+
+        return True
+
+    def reindex(self, columns: List[str]) -> None:
+        err_columns = set(self.columns) ^ set(columns)
+        if len(err_columns) > 0:
+            msg = 'Column names do not match. '
+            for err_column in err_columns:
+                msg += f'{err_column}, '
+            raise InvalidArgumentError(msg)
+
+        self._columns = list(columns)
+
+    def drop_columns(self, columns: List[str]) -> None:
+        if not isinstance(columns, list):
+            raise InvalidArgumentError('columns must be list.')
+
+        self._join_indices.clear()
+        self._group_indices.clear()
+        for column in columns:
+            if column not in self._values:
+                continue
+            del self._values[column]
+            del self._valid[column]
+        self._columns = [c for c in self._columns if c not in columns]
+        return None
+
+    def rename_columns(self, columns: Dict[str, str]) -> None:
+        validate_rename_rule(columns)
+        for old in columns:
+            if old not in self._values:
+                # Same error as Records.
+                raise ValueError(f'{old!r} is not in list')
+
+        self._join_indices.clear()
+        self._group_indices.clear()
+        for old, new in columns.items():
+            self._values[new] = self._values.pop(old)
+            self._valid[new] = self._valid.pop(old)
+        self._columns = [columns.get(c, c) for c in self._columns]
+        return None
+
+    def append_column(self, column: str, values: List[int]) -> None:
+        if len(values) != len(self):
+            raise InvalidArgumentError('len(values) != len(records)')
+
+        valid = np.zeros(self._capacity, dtype=bool)
+        valid[:self._size] = [v is not None for v in values]
+        values_ = np.zeros(self._capacity, dtype=np.uint64)
+        values_[:self._size] = [0 if v is None else v for v in values]
+        self._set_column(column, values_, valid)
+
+    def _append_missing_column(self, column: str) -> None:
+        # Column whose values are all missing, which append_column does not take.
+        self._set_column(
+            column,
+            np.zeros(self._capacity, dtype=np.uint64),
+            np.zeros(self._capacity, dtype=bool))
+
+    def _set_column(self, column: str, values: np.ndarray, valid: np.ndarray) -> None:
+        if column not in self._values:
+            self._columns.append(column)
+        self._join_indices.pop(column, None)
+        self._group_indices = {k: v for k, v in self._group_indices.items() if column not in k}
+        self._values[column] = values
+        self._valid[column] = valid
+
+    def to_dataframe(self, copy: bool = True) -> pd.DataFrame:
+        df_dict: Dict[str, pd.arrays.IntegerArray] = {}
+        for column in self._columns:
+            # Values beyond the range of int64 are negative in the int64 view.
+            values = self._get_values(column).view(np.int64)
+            missing = ~self._get_valid(column)
+            if np.any((values < 0) & ~missing):
+                # Out of the range of Int64. Leave it to pandas as Records does.
+                return Records._series_to_dataframe(
+                    {c: self.get_column_series(c) for c in self._columns}, self.columns)
+            df_dict[column] = pd.arrays.IntegerArray(values, missing)
+        # The dict is in the column order. Passing columns takes a slow path of pandas.
+        return pd.DataFrame(df_dict, copy=copy)
+
+    def clone(self) -> RecordsNumpyImpl:
+        # The arrays are shared copy-on-write.
+        # Methods reordering rows or replacing columns assign new arrays,
+        # and the clone has no spare capacity, so it reallocates on append.
+        # Rows appended to self are written beyond the size of the clone.
+        records = RecordsNumpyImpl._from_arrays(
+            self.columns, dict(self._values), dict(self._valid), self._size)
+        records._join_indices = dict(self._join_indices)
+        records._group_indices = dict(self._group_indices)
+        return records
+
+    def bind_drop_as_delay(self) -> None:
+        self.sort_column_order(ascending=False, put_none_at_top=False)
+
+        # Fill each missing value with the latest value above it.
+        self._join_indices.clear()
+        self._group_indices.clear()
+        indices = np.arange(self._size)
+        for column in self._columns:
+            valid = self._get_valid(column)
+            latest = np.maximum.accumulate(np.where(valid, indices, -1))
+            filled = latest >= 0
+            values = self._get_values(column)
+            values[filled] = values[latest[filled]]
+            valid[:] = filled
+
+        self.sort_column_order(ascending=True, put_none_at_top=True)
+
+    def groupby(self, columns: List[str]) -> Dict[Tuple[int, ...], RecordsInterface]:
+        return {
+            k: self._take(indices) for k, indices in self._get_group_index(columns).items()
+        }
+
+    def take_groups(
+        self,
+        columns: List[str],
+        keys: Sequence[Tuple[int, ...]]
+    ) -> RecordsNumpyImpl:
+        group_index = self._get_group_index(columns)
+        indices = [group_index[k] for k in keys if k in group_index]
+        if len(indices) == 0:
+            return self._take(np.zeros(0, dtype=np.int64))
+        # Rows are taken once for all the groups.
+        return self._take(np.concatenate(indices))
+
+    def _get_group_index(self, columns: List[str]) -> Dict[Tuple[int, ...], np.ndarray]:
+        columns_ = tuple(columns)
+        if columns_ not in self._group_indices:
+            self._group_indices[columns_] = self._build_group_index(columns)
+        return self._group_indices[columns_]
+
+    def _build_group_index(self, columns: List[str]) -> Dict[Tuple[int, ...], np.ndarray]:
+        group: Dict[Tuple[int, ...], np.ndarray] = {}
+        if self._size == 0:
+            return group
+
+        m = np.uint64(2**64 - 1)
+        keys: List[np.ndarray] = []
+        for column in columns:
+            if column in self._values:
+                keys.append(np.where(self._get_valid(column), self._get_values(column), m))
+            else:
+                keys.append(np.full(self._size, m, dtype=np.uint64))
+
+        order = np.lexsort(keys[::-1]) if len(keys) > 0 else np.arange(self._size)
+        is_head = np.zeros(self._size, dtype=bool)
+        is_head[0] = True
+        for key in keys:
+            sorted_key = key[order]
+            is_head[1:] |= sorted_key[1:] != sorted_key[:-1]
+        heads = np.flatnonzero(is_head)
+        tails = np.append(heads[1:], self._size)
+
+        # Groups are ordered by their first row, as Records does.
+        group_indices = sorted(
+            (order[head:tail] for head, tail in zip(heads, tails)),
+            key=lambda indices: indices[0])
+        for indices in group_indices:
+            k = tuple(int(key[indices[0]]) for key in keys)
+            # The index is shared by the clones, so it must not be modified.
+            indices.flags.writeable = False
+            group[k] = indices
+
+        return group
+
+    def merge(
+        self,
+        right_records: RecordsInterface,
+        join_left_key: str,
+        join_right_key: str,
+        columns: List[str],
+        how: str,
+        *,
+        progress_label: Optional[str] = None
+    ) -> RecordsNumpyImpl:
+        Records._validate(None, columns)
+        assert how in ['inner', 'left', 'right', 'outer']
+        assert isinstance(right_records, RecordsNumpyImpl)
+        left_records = self
+
+        merge_left = how in ['left', 'outer']
+        merge_right = how in ['right', 'outer']
+
+        left_join, left_has_join = left_records._get_key(join_left_key)
+        right_join, right_has_join = right_records._get_key(join_right_key)
+
+        # Joined rows are ordered by join value, then right row, then left row,
+        # which is the order the left index is probed in.
+        joined_left, joined_right = left_records._get_join_index(join_left_key).probe(
+            right_join, right_has_join)
+
+        # Unjoined rows follow in the order of join value and side.
+        # Rows without join value are placed before the left rows of the largest join value.
+        is_left_joined = np.zeros(len(left_records), dtype=bool)
+        is_left_joined[joined_left] = True
+        is_right_joined = np.zeros(len(right_records), dtype=bool)
+        is_right_joined[joined_right] = True
+        left_only = np.flatnonzero(~is_left_joined)
+        right_only = np.flatnonzero(~is_right_joined)
+        if not merge_left:
+            left_only = left_only[:0]
+        if not merge_right:
+            right_only = right_only[:0]
+
+        maxsize = np.uint64(2**64 - 1)
+        join_values = np.concatenate([left_join[left_only], right_join[right_only]])
+        has_join_values = np.concatenate([left_has_join[left_only], right_has_join[right_only]])
+        sides = np.concatenate([
+            np.zeros(len(left_only), dtype=np.uint8),
+            np.ones(len(right_only), dtype=np.uint8),
+        ])
+        last_join_values = np.concatenate([left_join[left_has_join], right_join[right_has_join]])
+        is_last = np.zeros(len(join_values), dtype=bool)
+        if len(last_join_values) > 0:
+            is_last = has_join_values & (join_values == last_join_values.max()) & (sides == 0)
+        unjoined_order = np.lexsort((
+            sides,
+            np.where(has_join_values, join_values, maxsize),
+            is_last,
+        ))
+        unjoined_left = np.concatenate([left_only, np.full(len(right_only), -1, dtype=np.int64)])
+        unjoined_right = np.concatenate([np.full(len(left_only), -1, dtype=np.int64), right_only])
+
+        # Left values take precedence, as Records.merge does.
+        merged_records = RecordsNumpyImpl._combine(
+            right_records, np.concatenate([joined_right, unjoined_right[unjoined_order]]),
+            left_records, np.concatenate([joined_left, unjoined_left[unjoined_order]]))
+        merged_records.reindex(columns)
+
+        return merged_records
+
+    def _get_join_index(self, column: str) -> _JoinIndex:
+        if column not in self._join_indices:
+            self._join_indices[column] = _JoinIndex(*self._get_key(column))
+        return self._join_indices[column]
+
+    def merge_sequencial(
+        self,
+        right_records: RecordsInterface,
+        left_stamp_key: str,
+        right_stamp_key: str,
+        join_left_key: Optional[str],
+        join_right_key: Optional[str],
+        columns: List[str],
+        how: str,
+        *,
+        progress_label: Optional[str] = None
+    ) -> RecordsNumpyImpl:
+        Records._validate(None, columns)
+        assert how in ['inner', 'left', 'right', 'outer', 'left_use_latest']
+        assert isinstance(right_records, RecordsNumpyImpl)
+        left_records = self
+
+        merge_left = how in ['left', 'outer', 'left_use_latest']
+        bind_latest_left_record = how in ['left_use_latest']
+        merge_right = how in ['right', 'outer']
+
+        left_size = len(left_records)
+        right_size = len(right_records)
+        left_stamp, left_has_stamp = left_records._get_key(left_stamp_key)
+        right_stamp, right_has_stamp = right_records._get_key(right_stamp_key)
+        left_join, left_has_join = left_records._get_key(join_left_key)
+        right_join, right_has_join = right_records._get_key(join_right_key)
+
+        # Position of each record after concatenating left and right records
+        # and sorting them by (stamp, side). Records without stamp are placed at the end.
+        maxsize = np.uint64(2**64 - 1)
+        stamps = np.concatenate([
+            np.where(left_has_stamp, left_stamp, maxsize),
+            np.where(right_has_stamp, right_stamp, maxsize),
+        ])
+        sides = np.concatenate([
+            np.zeros(left_size, dtype=np.uint8),
+            np.ones(right_size, dtype=np.uint8),
+        ])
+        positions = np.empty(left_size + right_size, dtype=np.int64)
+        positions[np.lexsort((sides, stamps))] = np.arange(left_size + right_size)
+        left_positions = positions[:left_size]
+        right_positions = positions[left_size:]
+
+        # Bind each right record to the latest preceding left record with the same join value.
+        bound_left = self._find_preceding(
+            left_stamp, left_join, left_has_stamp & left_has_join,
+            right_stamp, right_join, right_has_stamp & right_has_join)
+
+        bound_right = np.flatnonzero(bound_left >= 0)
+        bound_right = bound_right[
+            np.lexsort((right_positions[bound_right], bound_left[bound_right]))]
+        bound_left = bound_left[bound_right]
+        is_joined = np.ones(len(bound_right), dtype=bool)
+        if not bind_latest_left_record:
+            # Only the first right record is joined to each left record.
+            is_joined[1:] = bound_left[1:] != bound_left[:-1]
+        joined_left = bound_left[is_joined]
+        joined_right = bound_right[is_joined]
+
+        left_indices = [joined_left]
+        right_indices = [joined_right]
+        anchors = [left_positions[joined_left]]
+        sub_anchors = [right_positions[joined_right]]
+
+        if merge_left:
+            has_bound = np.zeros(left_size, dtype=bool)
+            has_bound[bound_left] = True
+            left_only = np.flatnonzero(~has_bound)
+            left_indices.append(left_only)
+            right_indices.append(np.full(len(left_only), -1, dtype=np.int64))
+            anchors.append(left_positions[left_only])
+            sub_anchors.append(np.zeros(len(left_only), dtype=np.int64))
+
+        if merge_right:
+            is_right_joined = np.zeros(right_size, dtype=bool)
+            is_right_joined[joined_right] = True
+            right_only = np.flatnonzero(~is_right_joined)
+            left_indices.append(np.full(len(right_only), -1, dtype=np.int64))
+            right_indices.append(right_only)
+            anchors.append(right_positions[right_only])
+            sub_anchors.append(np.zeros(len(right_only), dtype=np.int64))
+
+        # Rows are output in the order of the sorted concatenated records.
+        order = np.lexsort((np.concatenate(sub_anchors), np.concatenate(anchors)))
+        merged_records = RecordsNumpyImpl._combine(
+            left_records, np.concatenate(left_indices)[order],
+            right_records, np.concatenate(right_indices)[order])
+        merged_records.reindex(columns)
+
+        return merged_records
+
+    def _get_key(self, column: Optional[str]) -> Tuple[np.ndarray, np.ndarray]:
+        # Values and validity of a key column. None is regarded as a valid constant key.
+        if column is None:
+            return np.zeros(self._size, dtype=np.uint64), np.ones(self._size, dtype=bool)
+        if column not in self._values:
+            return np.zeros(self._size, dtype=np.uint64), np.zeros(self._size, dtype=bool)
+        return self._get_values(column), self._get_valid(column)
+
+    @staticmethod
+    def _find_preceding(
+        left_stamp: np.ndarray,
+        left_join: np.ndarray,
+        left_active: np.ndarray,
+        right_stamp: np.ndarray,
+        right_join: np.ndarray,
+        right_active: np.ndarray,
+    ) -> np.ndarray:
+        # For each right row, find the last active left row with the same join value
+        # whose stamp is less than or equal to the right stamp. -1 if not found.
+        found_left = np.full(len(right_stamp), -1, dtype=np.int64)
+        left_rows = np.flatnonzero(left_active)
+        right_rows = np.flatnonzero(right_active)
+        if len(left_rows) == 0 or len(right_rows) == 0:
+            return found_left
+
+        # Map (join value, stamp) into a single sortable key.
+        _, group_ids = np.unique(
+            np.concatenate([left_join[left_rows], right_join[right_rows]]), return_inverse=True)
+        _, stamp_ranks = np.unique(
+            np.concatenate([left_stamp[left_rows], right_stamp[right_rows]]), return_inverse=True)
+        keys = group_ids.astype(np.int64) * (int(stamp_ranks.max()) + 1) + stamp_ranks
+        left_keys = keys[:len(left_rows)]
+        right_keys = keys[len(left_rows):]
+        left_group_ids = group_ids[:len(left_rows)]
+        right_group_ids = group_ids[len(left_rows):]
+
+        # Stable sort keeps the later row last among rows with the same key.
+        left_order = np.argsort(left_keys, kind='stable')
+        found = np.searchsorted(left_keys[left_order], right_keys, side='right') - 1
+        is_found = found >= 0
+        is_found[is_found] = \
+            left_group_ids[left_order[found[is_found]]] == right_group_ids[is_found]
+        found_left[right_rows[is_found]] = left_rows[left_order[found[is_found]]]
+        return found_left
+
+    @staticmethod
+    def _combine(
+        left_records: RecordsNumpyImpl,
+        left_indices: np.ndarray,
+        right_records: RecordsNumpyImpl,
+        right_indices: np.ndarray,
+    ) -> RecordsNumpyImpl:
+        # Build rows from pairs of left and right rows, where -1 means no row.
+        # Right values take precedence, as Record.merge does.
+        columns = Columns(left_records.columns + right_records.columns).as_list()
+        size = len(left_indices)
+        values: Dict[str, np.ndarray] = {}
+        valid: Dict[str, np.ndarray] = {}
+        for column in columns:
+            column_values = np.zeros(size, dtype=np.uint64)
+            column_valid = np.zeros(size, dtype=bool)
+            for records, indices in [(left_records, left_indices), (right_records, right_indices)]:
+                if column not in records._values:
+                    continue
+                has_row = indices >= 0
+                rows = indices[has_row]
+                row_valid = np.zeros(size, dtype=bool)
+                row_valid[has_row] = records._get_valid(column)[rows]
+                row_values = np.zeros(size, dtype=np.uint64)
+                row_values[has_row] = records._get_values(column)[rows]
+                column_values[row_valid] = row_values[row_valid]
+                column_valid |= row_valid
+            values[column] = column_values
+            valid[column] = column_valid
+
+        return RecordsNumpyImpl._from_arrays(columns, values, valid, size)
+
+    def merge_sequencial_for_addr_track(
+        self,
+        source_stamp_key: str,
+        source_key: str,
+        copy_records: RecordsInterface,
+        copy_stamp_key: str,
+        copy_from_key: str,
+        copy_to_key: str,
+        sink_records: RecordsInterface,
+        sink_stamp_key: str,
+        sink_from_key: str,
+        columns: List[str],
+        *,
+        progress_label: Optional[str] = None
+    ) -> RecordsNumpyImpl:
+        assert isinstance(copy_records, RecordsNumpyImpl)
+        assert isinstance(sink_records, RecordsNumpyImpl)
+        source_records = self
+
+        # Events are processed in reverse chronological order, as Records does.
+        # Rows without timestamp or address are ignored.
+        record_types: List[np.ndarray] = []
+        rows: List[np.ndarray] = []
+        timestamps: List[np.ndarray] = []
+        for record_type, records, stamp_key, addr_keys in [
+            (RecordType.SOURCE, source_records, source_stamp_key, [source_key]),
+            (RecordType.COPY, copy_records, copy_stamp_key, [copy_from_key, copy_to_key]),
+            (RecordType.SINK, sink_records, sink_stamp_key, [sink_from_key]),
+        ]:
+            stamp, is_valid = records._get_key(stamp_key)
+            for addr_key in addr_keys:
+                is_valid = is_valid & records._get_key(addr_key)[1]
+            valid_rows = np.flatnonzero(is_valid)
+            record_types.append(np.full(len(valid_rows), record_type, dtype=np.uint8))
+            rows.append(valid_rows)
+            timestamps.append(stamp[valid_rows])
+        order = np.argsort(~np.concatenate(timestamps), kind='stable')
+        event_types = np.concatenate(record_types)[order].tolist()
+        event_rows = np.concatenate(rows)[order].tolist()
+
+        source_addrs = source_records._get_key(source_key)[0].tolist()
+        copy_from_addrs = copy_records._get_key(copy_from_key)[0].tolist()
+        copy_to_addrs = copy_records._get_key(copy_to_key)[0].tolist()
+        sink_addrs = sink_records._get_key(sink_from_key)[0].tolist()
+
+        tracker = _AddrTracker()
+        merged_sink_rows: List[int] = []
+        merged_source_rows: List[int] = []
+        for event_type, row in zip(event_types, event_rows):
+            if event_type == RecordType.SINK:
+                tracker.add_sink(sink_addrs[row], row)
+            elif event_type == RecordType.COPY:
+                tracker.copy(copy_from_addrs[row], copy_to_addrs[row])
+            else:
+                for sink_row in tracker.pop_sinks(source_addrs[row]):
+                    merged_sink_rows.append(sink_row)
+                    merged_source_rows.append(row)
+
+        # Source values take precedence, as Record.merge does.
+        merged_records = RecordsNumpyImpl._combine(
+            sink_records, np.array(merged_sink_rows, dtype=np.int64),
+            source_records, np.array(merged_source_rows, dtype=np.int64))
+        for column in copy_records.columns:
+            if column not in merged_records.columns:
+                merged_records._append_missing_column(column)
+        merged_records.drop_columns([sink_from_key, copy_from_key, copy_to_key, copy_stamp_key])
+        merged_records.reindex(columns)
+
+        return merged_records
@@ -0,0 +1,134 @@
+# Copyright 2021 Research Institute of Systems Planning, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+from array import array
+from typing import cast, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .interface import RecordsInterface
+from .record_factory import RecordFactory, RecordsFactory
+from .record_numpy_impl import RecordsNumpyImpl
+from ..exceptions import InvalidArgumentError
+
+
+class RecordsBuffer:
+    """
+    Columnar append buffer of records.
+
+    Rows are appended as integer values into a growable uint64 array,
+    so no record object is created for each row.
+    None is buffered as a missing value.
+    The buffered rows are moved to records in bulk by flush.
+
+    """
+
+    def __init__(self, columns: List[str]) -> None:
+        self._columns = list(columns)
+        self._buffer = array('Q')
+        self._missing: Set[Tuple[int, int]] = set()
+
+    @property
+    def columns(self) -> List[str]:
+        """
+        Get column names.
+
+        Returns
+        -------
+        List[str]
+            Column names in the order of the appended values.
+
+        """
+        return list(self._columns)
+
+    def __len__(self) -> int:
+        return len(self._buffer) // len(self._columns)
+
+    def append(self, *values: Optional[int]) -> None:
+        """
+        Append a row.
+
+        Parameters
+        ----------
+        values : Optional[int]
+            Values of the row in the column order.
+
+        """
+        if len(values) != len(self._columns):
+            raise InvalidArgumentError(
+                f'Number of values does not match the columns. {values}, {self._columns}')
+        ints: Tuple[int, ...]
+        if None in values:
+            row = len(self)
+            self._missing.update((row, i) for i, value in enumerate(values) if value is None)
+            ints = tuple(0 if value is None else value for value in values)
+        else:
+            ints = cast(Tuple[int, ...], values)
+        self._buffer.extend(ints)
+
+    def extend(self, other: RecordsBuffer) -> None:
+        """
+        Append the rows of other buffer.
+
+        Parameters
+        ----------
+        other : RecordsBuffer
+            Buffer with the same columns.
+
+        """
+        if other._columns != self._columns:
+            raise InvalidArgumentError(
+                f'Columns do not match. {other._columns}, {self._columns}')
+        offset = len(self)
+        self._missing.update((offset + row, i) for row, i in other._missing)
+        self._buffer.extend(other._buffer)
+
+    def flush(self, records: RecordsInterface) -> None:
+        """
+        Move the buffered rows to records.
+
+        Parameters
+        ----------
+        records : RecordsInterface
+            Records to which the rows are appended.
+
+        """
+        size = len(self)
+        if size == 0:
+            return
+
+        buffered: RecordsInterface
+        if isinstance(records, RecordsNumpyImpl):
+            table = np.frombuffer(self._buffer, dtype=np.uint64).reshape(size, -1)
+            valid = {c: np.ones(size, dtype=bool) for c in self._columns}
+            for row, i in self._missing:
+                valid[self._columns[i]][row] = False
+            buffered = RecordsNumpyImpl.from_arrays(
+                self.columns,
+                {c: table[:, i].copy() for i, c in enumerate(self._columns)},
+                valid)
+        else:
+            rows = [
+                dict(zip(self._columns, row))
+                for row in zip(*[iter(self._buffer)] * len(self._columns))
+            ]
+            for row, i in self._missing:
+                del rows[row][self._columns[i]]
+            buffered = RecordsFactory.create_instance(
+                [RecordFactory.create_instance(row) for row in rows], self.columns)
+        records.concat(buffered)
+        self._buffer = array('Q')
+        self._missing = set()
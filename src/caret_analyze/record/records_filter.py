@@ -0,0 +1,280 @@
+# Copyright 2021 Research Institute of Systems Planning, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+from abc import ABCMeta, abstractmethod
+from typing import Callable, Collection, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .interface import RecordInterface
+from ..exceptions import InvalidArgumentError
+
+# Get the values and the valid mask of a column.
+ColumnGetter = Callable[[str], Tuple[np.ndarray, np.ndarray]]
+
+# Values out of [0, _UINT64_MAX] are not held by the columns.
+_UINT64_MAX = 2**64 - 1
+
+
+class RecordsFilter(metaclass=ABCMeta):
+    """
+    Condition of records.filter_by.
+
+    Conditions are combined with & and |.
+    A condition is also a callable for records.filter_if,
+    which is used by the implementations holding rows.
+
+    Examples
+    --------
+    >>> records.filter_by(
+    ...     Equals('callback_object', callback_object) &
+    ...     IsIn('publisher_handle', publisher_handles))
+
+    """
+
+    def __and__(self, other: RecordsFilter) -> RecordsFilter:
+        return And(self, other)
+
+    def __or__(self, other: RecordsFilter) -> RecordsFilter:
+        return Or(self, other)
+
+    @property
+    @abstractmethod
+    def columns(self) -> Set[str]:
+        """
+        Get columns used by the condition.
+
+        Returns
+        -------
+        Set[str]
+            Column names.
+
+        """
+        pass
+
+    def validate(self, columns: List[str]) -> None:
+        """
+        Validate the condition for records.
+
+        Parameters
+        ----------
+        columns : List[str]
+            Columns of the records.
+
+        Raises
+        ------
+        InvalidArgumentError
+            Occurs when the condition uses unknown columns.
+
+        """
+        unknown_columns = self.columns - set(columns)
+        if len(unknown_columns) > 0:
+            raise InvalidArgumentError(f'Unknown columns: {unknown_columns}')
+
+    @abstractmethod
+    def __call__(self, record: RecordInterface) -> bool:
+        """
+        Evaluate the condition for a record.
+
+        Parameters
+        ----------
+        record : RecordInterface
+            Record to evaluate.
+
+        Returns
+        -------
+        bool
+            True if the record satisfies the condition.
+
+        """
+        pass
+
+    @abstractmethod
+    def evaluate(self, get_column: ColumnGetter, size: int) -> np.ndarray:
+        """
+        Evaluate the condition for columns.
+
+        Parameters
+        ----------
+        get_column : ColumnGetter
+            Function to get the values and the valid mask of a column.
+        size : int
+            Number of rows.
+
+        Returns
+        -------
+        numpy.ndarray
+            Bool mask of the rows satisfying the condition.
+
+        """
+        pass
+
+
+class Equals(RecordsFilter):
+    """
+    Condition that the column value is equal to the value.
+
+    None matches the rows without the column value.
+
+    """
+
+    def __init__(self, column: str, value: Optional[int]) -> None:
+        self._column = column
+        self._value = value
+
+    @property
+    def columns(self) -> Set[str]:
+        return {self._column}
+
+    def __call__(self, record: RecordInterface) -> bool:
+        return record.data.get(self._column) == self._value
+
+    def evaluate(self, get_column: ColumnGetter, size: int) -> np.ndarray:
+        values, valid = get_column(self._column)
+        if self._value is None:
+            return ~valid
+        if self._value < 0 or self._value > _UINT64_MAX:
+            return np.zeros(size, dtype=bool)
+        return valid & (values == np.uint64(self._value))
+
+
+class IsIn(RecordsFilter):
+    """
+    Condition that the column value is one of the values.
+
+    None in the values matches the rows without the column value.
+
+    """
+
+    def __init__(self, column: str, values: Collection[Optional[int]]) -> None:
+        self._column = column
+        self._values = set(values)
+
+    @property
+    def columns(self) -> Set[str]:
+        return {self._column}
+
+    def __call__(self, record: RecordInterface) -> bool:
+        return record.data.get(self._column) in self._values
+
+    def evaluate(self, get_column: ColumnGetter, size: int) -> np.ndarray:
+        values, valid = get_column(self._column)
+        targets = np.array(
+            [v for v in self._values if v is not None and 0 <= v <= _UINT64_MAX], dtype=np.uint64)
+        mask = valid & np.isin(values, targets)
+        if None in self._values:
+            mask |= ~valid
+        return mask
+
+
+class InRange(RecordsFilter):
+    """
+    Condition that the column value is in [lower, upper].
+
+    A bound of None is not checked.
+
+    """
+
+    def __init__(
+        self,
+        column: str,
+        lower: Optional[int] = None,
+        upper: Optional[int] = None
+    ) -> None:
+        self._column = column
+        self._lower = lower
+        self._upper = upper
+
+    @property
+    def columns(self) -> Set[str]:
+        return {self._column}
+
+    def __call__(self, record: RecordInterface) -> bool:
+        value = record.data.get(self._column)
+        if value is None:
+            return False
+        if self._lower is not None and value < self._lower:
+            return False
+        if self._upper is not None and value > self._upper:
+            return False
+        return True
+
+    def evaluate(self, get_column: ColumnGetter, size: int) -> np.ndarray:
+        values, valid = get_column(self._column)
+        mask = valid.copy()
+        if self._lower is not None:
+            if self._lower > _UINT64_MAX:
+                return np.zeros(size, dtype=bool)
+            mask &= values >= np.uint64(max(self._lower, 0))
+        if self._upper is not None:
+            if self._upper < 0:
+                return np.zeros(size, dtype=bool)
+            mask &= values <= np.uint64(min(self._upper, _UINT64_MAX))
+        return mask
+
+
+class IsNull(RecordsFilter):
+    """Condition that the record has no value of the column."""
+
+    def __init__(self, column: str) -> None:
+        self._column = column
+
+    @property
+    def columns(self) -> Set[str]:
+        return {self._column}
+
+    def __call__(self, record: RecordInterface) -> bool:
+        return record.data.get(self._column) is None
+
+    def evaluate(self, get_column: ColumnGetter, size: int) -> np.ndarray:
+        _, valid = get_column(self._column)
+        return ~valid
+
+
+class And(RecordsFilter):
+    """Condition that both conditions are satisfied."""
+
+    def __init__(self, left: RecordsFilter, right: RecordsFilter) -> None:
+        self._left = left
+        self._right = right
+
+    @property
+    def columns(self) -> Set[str]:
+        return self._left.columns | self._right.columns
+
+    def __call__(self, record: RecordInterface) -> bool:
+        return self._left(record) and self._right(record)
+
+    def evaluate(self, get_column: ColumnGetter, size: int) -> np.ndarray:
+        return self._left.evaluate(get_column, size) & self._right.evaluate(get_column, size)
+
+
+class Or(RecordsFilter):
+    """Condition that either of the conditions is satisfied."""
+
+    def __init__(self, left: RecordsFilter, right: RecordsFilter) -> None:
+        self._left = left
+        self._right = right
+
+    @property
+    def columns(self) -> Set[str]:
+        return self._left.columns | self._right.columns
+
+    def __call__(self, record: RecordInterface) -> bool:
+        return self._left(record) or self._right(record)
+
+    def evaluate(self, get_column: ColumnGetter, size: int) -> np.ndarray:
+        return self._left.evaluate(get_column, size) | self._right.evaluate(get_column, size)
@@ -34,6 +34,7 @@ from .path_base import PathBase
 from .publisher import Publisher
 from .subscription import Subscription
 from .timer import Timer
+from .trace_comparison import compare_path_latencies
 from .variable_passing import VariablePassing
 
 __all__ = [
@@ -52,4 +53,5 @@ __all__ = [
     'Timer',
     'Subscription',
     'VariablePassing',
+    'compare_path_latencies',
 ]
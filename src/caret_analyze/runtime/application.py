@@ -27,7 +27,7 @@ from .executor import Executor
 from .node import Node
 from .path import Path
 from ..architecture import Architecture
-from ..common import Summarizable, Summary, Util
+from ..common import Progress, Summarizable, Summary, Util
 from ..exceptions import Error, InvalidArgumentError, UnsupportedTypeError
 from ..infra.infra_base import InfraBase
 from ..infra.interface import RecordsProvider, RuntimeDataProvider
@@ -71,7 +71,8 @@ class Application(Summarizable):
         else:
             raise UnsupportedTypeError('')
 
-        loaded = RuntimeLoaded(architecture, provider)
+        with Progress.stage('RuntimeLoaded'):
+            loaded = RuntimeLoaded(architecture, provider)
 
         self._nodes: List[Node] = loaded.nodes
         self._executors: List[Executor] = loaded.executors
@@ -112,7 +112,8 @@ class PathBase(metaclass=ABCMeta):
         if remove_dropped is False and treat_drop_as_delay:
             records.bind_drop_as_delay()
 
-        df = records.to_dataframe()
+        # The records are a clone, and the selection of column_names below copies the columns.
+        df = records.to_dataframe(copy=False)
         for column in column_names:
             if column in df.columns:
                 continue
@@ -0,0 +1,142 @@
+# Copyright 2021 Research Institute of Systems Planning, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from logging import getLogger
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .application import Application
+from ..architecture import Architecture
+from ..exceptions import InvalidArgumentError, InvalidRecordsError
+from ..infra.lttng.lttng import Lttng
+
+logger = getLogger(__name__)
+
+SUMMARY_COLUMNS = ['count', 'min', 'mean', 'median', 'p90', 'p99', 'max']
+
+PathSummary = Dict[str, Dict[str, float]]
+
+
+def compare_path_latencies(
+    architecture: Architecture,
+    trace_dirs: Sequence[str],
+    path_names: Sequence[str],
+    *,
+    jobs: Optional[int] = None,
+    **lttng_kwargs: Any,
+) -> pd.DataFrame:
+    """
+    Summarize path latencies of multiple traces.
+
+    Each trace is loaded in a separate process with the shared architecture,
+    and only the latency summaries are returned to the caller.
+
+    Parameters
+    ----------
+    architecture : Architecture
+        Architecture shared by all traces. The named paths must be added.
+    trace_dirs : Sequence[str]
+        Trace directories to compare.
+    path_names : Sequence[str]
+        Names of the paths to summarize.
+    jobs : Optional[int]
+        Number of processes. All cores are used if None.
+    lttng_kwargs : Any
+        Keyword arguments passed to Lttng, e.g. event_filters or use_cache.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Latency summary [ns] indexed by trace directory and path name.
+        Paths which no message went through have count 0 and NaN statistics.
+
+    Raises
+    ------
+    InvalidArgumentError
+        Occurs when jobs is less than 1 or the path is not defined.
+
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if jobs < 1:
+        raise InvalidArgumentError(f'jobs must be 1 or more. jobs: {jobs}')
+    for path_name in path_names:
+        if path_name not in architecture.path_names:
+            raise InvalidArgumentError(f'Failed to find path. path_name: {path_name}')
+
+    args = [(architecture, trace_dir, list(path_names), lttng_kwargs)
+            for trace_dir in trace_dirs]
+    jobs = min(jobs, len(args))
+    if jobs <= 1:
+        summaries = [_summarize_trace(*arg) for arg in args]
+    else:
+        with ProcessPoolExecutor(jobs) as executor:
+            summaries = list(executor.map(_summarize_trace, *zip(*args)))
+
+    rows: List[List[float]] = []
+    index = []
+    for trace_dir, summary in zip(trace_dirs, summaries):
+        for path_name in path_names:
+            index.append((trace_dir, path_name))
+            rows.append([summary[path_name][c] for c in SUMMARY_COLUMNS])
+
+    return pd.DataFrame(
+        rows,
+        index=pd.MultiIndex.from_tuples(index, names=['trace_dir', 'path_name']),
+        columns=SUMMARY_COLUMNS)
+
+
+def _summarize_trace(
+    architecture: Architecture,
+    trace_dir: str,
+    path_names: List[str],
+    lttng_kwargs: Dict[str, Any],
+) -> PathSummary:
+    lttng = Lttng(trace_dir, **lttng_kwargs)
+    app = Application(architecture, lttng)
+
+    summary: PathSummary = {}
+    for path_name in path_names:
+        path = app.get_path(path_name)
+        try:
+            _, latency_ns = path.to_timeseries(remove_dropped=True)
+        except InvalidRecordsError:
+            logger.warning(f'No latency was calculated. trace: {trace_dir}, path: {path_name}')
+            latency_ns = np.array([], dtype='int64')
+        summary[path_name] = _summarize_latency(latency_ns)
+    return summary
+
+
+def _summarize_latency(latency_ns: np.ndarray) -> Dict[str, float]:
+    if len(latency_ns) == 0:
+        summary = {c: float('nan') for c in SUMMARY_COLUMNS}
+        summary['count'] = 0
+        return summary
+
+    p50, p90, p99 = np.percentile(latency_ns, [50, 90, 99])
+    return {
+        'count': len(latency_ns),
+        'min': float(np.min(latency_ns)),
+        'mean': float(np.mean(latency_ns)),
+        'median': float(p50),
+        'p90': float(p90),
+        'p99': float(p99),
+        'max': float(np.max(latency_ns)),
+    }
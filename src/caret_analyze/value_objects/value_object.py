@@ -14,33 +14,58 @@
 
 import inspect
 
-from typing import Any, Dict
+from typing import Any, ClassVar, Dict, Optional, Tuple
 
 
 class ValueObject():
-    """Value object base class."""
+    """
+    Value object base class.
+
+    Equality and hash are defined by the public attributes.
+    The public attribute names are collected once per class,
+    and the hash is cached in each instance since value objects are immutable.
+
+    """
+
+    _fields: ClassVar[Dict[type, Tuple[str, ...]]] = {}
+    __hash: Optional[int] = None
 
     def __eq__(self, right):
+        if self is right:
+            return True
         if type(self) != type(right):
             return False
+        if self.__hash is not None and right.__hash is not None and \
+                self.__hash != right.__hash:
+            return False
 
-        for attr in self.__generate_public_attrs():
+        for attr in self._get_fields():
             # assert getattr(self,  attr) == getattr(right, attr)
             if getattr(self,  attr) != getattr(right, attr):
                 return False
         return True
 
     def __hash__(self):
+        if self.__hash is not None:
+            return self.__hash
+
         hash_value = 17
 
         hash_value += hash_value * 31 + hash(self.__class__)
 
-        for attr in self.__generate_public_attrs():
+        for attr in self._get_fields():
             v = getattr(self,  attr)
             hash_value += hash_value * 31 + hash(v)
 
+        self.__hash = hash_value
         return hash_value
 
+    def __getstate__(self):
+        # String hashes differ between processes, so the cached hash is not pickled.
+        state = self.__dict__.copy()
+        state.pop('_ValueObject__hash', None)
+        return state
+
     def __str__(self) -> str:
         from yaml import dump
         d = self._to_dict()
@@ -48,7 +73,7 @@ class ValueObject():
 
     def _to_dict(self) -> Dict:
         d: Dict[Any, Any] = {}
-        for attr in self.__generate_public_attrs():
+        for attr in self._get_fields():
             value = getattr(self, attr)
             if isinstance(value, ValueObject):
                 d[attr] = value._to_dict()
@@ -59,6 +84,13 @@ class ValueObject():
                     d[attr] = value
         return d
 
+    def _get_fields(self) -> Tuple[str, ...]:
+        fields = ValueObject._fields.get(type(self))
+        if fields is None:
+            fields = tuple(self.__generate_public_attrs())
+            ValueObject._fields[type(self)] = fields
+        return fields
+
     def __generate_public_attrs(self):
         attrs = inspect.getmembers(self)
 
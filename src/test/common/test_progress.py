@@ -0,0 +1,83 @@
+# Copyright 2021 Research Institute of Systems Planning, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+from caret_analyze.common import Progress
+from caret_analyze.record import merge, Record, RecordsFactory
+
+
+class TestProgress:
+
+    def test_stage_disabled(self, mocker):
+        mocker.patch.object(Progress, 'instrument', False)
+        mocker.patch.object(Progress, '_stages', [])
+
+        with Progress.stage('stage') as stage:
+            stage.rows = 1
+        assert Progress.accumulate('accumulated') is None
+        assert len(Progress.report()) == 0
+
+    def test_stage(self, mocker, tmp_path):
+        mocker.patch.object(Progress, 'instrument', True)
+        mocker.patch.object(Progress, '_stages', [])
+
+        with Progress.stage('outer') as stage:
+            with Progress.stage('inner'):
+                pass
+            accumulator = Progress.accumulate('accumulated')
+            assert accumulator is not None
+            f = accumulator.wrap(lambda x: x * 2)
+            assert [f(1), f(2)] == [2, 4]
+            accumulator.close()
+            with Progress.stage('alloc'):
+                buffer = b'\x01' * (64 * 2**20)
+            stage.rows = 3
+
+        report = Progress.report()
+        assert len(buffer) > 0
+        assert list(report['name']) == ['outer', 'inner', 'accumulated', 'alloc']
+        assert list(report['depth']) == [0, 1, 1, 1]
+        assert list(report['rows'])[0] == 3
+        assert list(report['rows'])[2] == 2
+        assert (report['wall_time'] >= 0).all()
+        assert (report['process_peak_rss'] > 0).all()
+        # Only the stage which allocates the memory grows the RSS.
+        rss_delta = dict(zip(report['name'], report['rss_delta']))
+        assert rss_delta['alloc'] >= 32 * 2**20
+        assert rss_delta['inner'] < 32 * 2**20
+
+        path = tmp_path / 'trace.json'
+        Progress.export_chrome_trace(str(path))
+        trace = json.loads(path.read_text())
+        assert {e['name'] for e in trace['traceEvents']} == \
+            {'outer', 'inner', 'accumulated', 'alloc'}
+        assert all(e['ph'] == 'X' for e in trace['traceEvents'])
+
+        Progress.clear()
+        assert len(Progress.report()) == 0
+
+    def test_merge(self, mocker):
+        mocker.patch.object(Progress, 'instrument', True)
+        mocker.patch.object(Progress, '_stages', [])
+
+        left = RecordsFactory.create_instance(
+            [Record({'key': 1, 'a': 1}), Record({'key': 2, 'a': 2})], ['key', 'a'])
+        right = RecordsFactory.create_instance(
+            [Record({'key_': 1, 'b': 3})], ['key_', 'b'])
+        merge(left, right, 'key', 'key_', ['key', 'a', 'key_', 'b'], 'inner')
+
+        report = Progress.report()
+        assert list(report['name']) == ['merge']
+        assert list(report['rows']) == [1]
@@ -51,3 +51,37 @@ class TestLttngInfo:
         data.callback_group_add_service(0, 0, 0)
         data.callback_group_add_client(0, 0, 0)
         data.finalize()
+
+    def test_concat(self):
+        data = Ros2DataModel()
+        data.add_node(0, 1, 0, 0, 'name', 'ns')
+        data.add_callback_start_instance(0, 1, False)
+        data.finalize()
+
+        other = Ros2DataModel()
+        other.add_node(0, 2, 1, 0, 'name_', 'ns')
+        other.add_callback_start_instance(1, 2, False)
+        other.add_callback_end_instance(2, 2)
+        other.finalize()
+
+        data.concat(other)
+        assert list(data.nodes.index) == [1, 2]
+        assert len(data.timers) == 0
+        assert data.callback_start_instances.get_column_series('callback_start_timestamp') \
+            == [0, 1]
+        assert len(data.callback_end_instances) == 1
+
+    def test_drop_events_before(self):
+        data = Ros2DataModel()
+        data.add_node(0, 1, 0, 0, 'name', 'ns')
+        data.add_callback_start_instance(0, 1, False)
+        data.add_callback_start_instance(2, 1, False)
+        data.add_dds_write_instance(5, 1, 0)
+        data.add_dds_write_instance(5, 3, 0)
+        data.finalize()
+
+        data.drop_events_before(2)
+        assert len(data.nodes) == 1
+        assert data.callback_start_instances.get_column_series('callback_start_timestamp') \
+            == [2]
+        assert data.dds_write_instances.get_column_series('dds_write_timestamp') == [3]
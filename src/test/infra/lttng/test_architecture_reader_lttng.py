@@ -161,3 +161,11 @@ class TestArchitectureReaderLttng:
 
         cbgs = reader.get_callback_groups(node_)
         assert cbgs == [cbg]
+
+    def test_architecture_only(self, mocker):
+        lttng_mock = mocker.Mock(spec=Lttng)
+        lttng_cls_mock = mocker.patch(
+            'caret_analyze.infra.lttng.lttng.Lttng', return_value=lttng_mock)
+        ArchitectureReaderLttng('trace_dir')
+        lttng_cls_mock.assert_called_once_with(
+            'trace_dir', validate=False, architecture_only=True)
@@ -82,6 +82,35 @@ class TestEventCounter:
         df = EventCounter._build_count_df(data)
         assert list(df['size']) == [1] * len(df)
 
+    def test_count_by_handle(self, mocker):
+        data = Ros2DataModel()
+        data.add_node(0, 1, 0, 0, 'node', '/ns')
+        data.add_publisher(2, 0, 1, 0, '/topic', 0)
+        data.add_rcl_publish_instance(0, 0, 2, 0)
+        data.add_rcl_publish_instance(0, 1, 2, 0)
+        data.add_rcl_publish_instance(0, 2, 3, 0)
+        data.finalize()
+
+        counter = EventCounter(data, validate=False)
+        assert counter._count_df is None
+
+        count_df = counter.get_count(['trace_point', 'node_name', 'topic_name'])
+        assert count_df.loc[('ros2:rcl_publish', '/ns/node', '/topic'), 'size'] == 2
+        assert count_df.loc[('ros2:rcl_publish', '-', '-'), 'size'] == 1
+        assert count_df.loc[('ros2_caret:dds_write', '-', '-'), 'size'] == 0
+
+    def test_count_concat(self, mocker):
+        data = Ros2DataModel()
+        data.add_callback_start_instance(0, 0, False)
+        data.finalize()
+        other = Ros2DataModel()
+        other.add_callback_start_instance(1, 0, False)
+        other.finalize()
+        data.concat(other)
+
+        count_df = EventCounter(data, validate=False).get_count(['trace_point'])
+        assert count_df.loc['ros2:callback_start', 'size'] == 2
+
     def test_validation_without_ld_preload(
         self,
         mocker,
@@ -123,3 +152,21 @@ class TestEventCounter:
         logger.propagate = True
 
         EventCounter(data)
+
+    def test_skipped_counts(self, mocker):
+        data = Ros2DataModel()
+        data.add_callback_start_instance(0, 0, False)
+        data.finalize()
+
+        skipped_counts = {'ros2_caret:dds_write': 3, 'ros2:rclcpp_intra_publish': 2}
+        counter = EventCounter(data, validate=False, skipped_counts=skipped_counts)
+        count_df = counter.get_count(['trace_point'])
+        assert count_df.loc['ros2:callback_start', 'size'] == 1
+        assert count_df.loc['ros2:callback_start', 'skipped'] == 0
+        assert count_df.loc['ros2_caret:dds_write', 'size'] == 0
+        assert count_df.loc['ros2_caret:dds_write', 'skipped'] == 3
+
+        # Skipped trace points are treated as recorded in the validation.
+        EventCounter(data, skipped_counts=skipped_counts)
+        with pytest.raises(InvalidTraceFormatError):
+            EventCounter(data, skipped_counts={'ros2_caret:dds_write': 3})
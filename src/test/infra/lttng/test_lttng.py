@@ -12,12 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from concurrent.futures import ThreadPoolExecutor
 
+from caret_analyze.exceptions import InvalidArgumentError
 from caret_analyze.infra.lttng import Lttng
 from caret_analyze.infra.lttng.event_counter import EventCounter
+from caret_analyze.infra.lttng.lttng import InitEventPassFilter, LttngEventFilter
 from caret_analyze.infra.lttng.lttng_info import LttngInfo
 from caret_analyze.infra.lttng.records_source import RecordsSource
 from caret_analyze.infra.lttng.ros2_tracing.data_model import DataModel, Ros2DataModel
+from caret_analyze.infra.lttng.ros2_tracing.processor import Ros2Handler
 from caret_analyze.infra.lttng.value_objects import (PublisherValueLttng,
                                                      SubscriptionCallbackValueLttng,
                                                      TimerCallbackValueLttng)
@@ -25,6 +29,9 @@ from caret_analyze.record.interface import RecordsInterface
 from caret_analyze.value_objects import ExecutorValue
 from caret_analyze.value_objects.node import NodeValue
 
+import pytest
+from tracetools_analysis.processor import RequiredEventNotFound
+
 
 class TestLttng:
 
@@ -239,3 +246,281 @@ class TestLttng:
         assert lttng.events == events
         assert lttng_.events == events_
         assert lttng.events != lttng_.events
+
+    def test_parse_lttng_data_single_pass(self, mocker):
+        reader_mock = mocker.MagicMock()
+        reader_mock.__iter__.return_value = iter([])
+        reader_mock.begin_time = 1
+        reader_mock.end_time = 2
+        reader_cls_mock = mocker.patch(
+            'caret_analyze.infra.lttng.lttng.CtfEventReader', return_value=reader_mock)
+        mocker.patch.object(Ros2Handler, 'required_events', return_value=set())
+
+        data, events = Lttng._parse_lttng_data('trace_dir', False, [])
+
+        reader_cls_mock.assert_called_once_with('trace_dir', None, None, None)
+        assert events is None
+        assert isinstance(data, Ros2DataModel)
+        assert Lttng._last_trace_begin_time == 1
+        assert Lttng._last_trace_end_time == 2
+
+    def test_parse_lttng_data_streaming(self, mocker):
+        events = [
+            {'_name': 'ros2:callback_start', '_timestamp': int(i*1e9)}
+            for i in range(4)
+        ]
+        reader_mock = mocker.MagicMock()
+        reader_mock.__iter__.side_effect = lambda: iter(events)
+        reader_mock.query_range.return_value = (0, int(3e9))
+        mocker.patch(
+            'caret_analyze.infra.lttng.lttng.CtfEventReader', return_value=reader_mock)
+        handle_mock = mocker.patch.object(Ros2Handler, 'handle')
+        mocker.patch.object(Ros2Handler, 'required_events', return_value=set())
+
+        strip_filter = LttngEventFilter.strip_filter(1, 1)
+        _, stored = Lttng._parse_lttng_data('trace_dir', False, [strip_filter], True)
+
+        assert stored == events[1:3]
+        assert handle_mock.call_count == 2
+
+        _, stored = Lttng._parse_lttng_data('trace_dir', False, [], False)
+        assert stored is None
+        assert handle_mock.call_count == 6
+
+    def test_parse_lttng_data_parallel(self, mocker):
+        events = [
+            {'_name': 'ros2:callback_start', '_timestamp': int(i*1e8), 'callback': i % 3}
+            for i in range(40)
+        ]
+
+        mocker.patch(
+            'caret_analyze.infra.lttng.lttng.CtfEventReader', _reader_mock_class(events))
+        mocker.patch('caret_analyze.infra.lttng.lttng.ProcessPoolExecutor', ThreadPoolExecutor)
+        mocker.patch.object(Ros2Handler, 'required_events', return_value=set())
+
+        strip_filter = LttngEventFilter.strip_filter(0.45, 0.45)
+        expect, _ = Lttng._parse_lttng_data('trace_dir', False, [strip_filter])
+        data, stored = Lttng._parse_lttng_data('trace_dir', False, [strip_filter], jobs=3)
+
+        assert stored is None
+        assert len(data.callback_start_instances) == 30
+        assert data.callback_start_instances.equals(expect.callback_start_instances)
+
+    def test_parse_lttng_data_event_names(self, mocker):
+        events = [
+            {'_name': 'ros2:rcl_init', '_timestamp': 0},
+            {'_name': 'ros2:callback_start', '_timestamp': 1},
+            {'_name': 'ros2:rcl_node_init', '_timestamp': 2},
+            {'_name': 'ros2:callback_end', '_timestamp': 3},
+        ]
+        handled = []
+        mocker.patch.object(
+            Ros2Handler, 'handle', side_effect=lambda event: handled.append(event))
+
+        event_names = {'ros2:rcl_init', 'ros2:rcl_node_init'}
+        Lttng._parse_lttng_data(events, False, [], event_names=event_names)
+        assert handled == [events[0], events[2]]
+
+        handled.clear()
+        mocker.patch(
+            'caret_analyze.infra.lttng.lttng.CtfEventReader', _reader_mock_class(events))
+        Lttng._parse_lttng_data('trace_dir', False, [], event_names=event_names)
+        assert handled == [events[0], events[2]]
+        assert Lttng._last_skipped_counts == {'ros2:callback_start': 1, 'ros2:callback_end': 1}
+
+        Lttng._parse_lttng_data('trace_dir', False, [])
+        assert Lttng._last_skipped_counts is None
+
+    def test_get_event_names(self):
+        init_events = InitEventPassFilter.INIT_EVENTS
+        assert Lttng._get_event_names(None, False) is None
+        assert Lttng._get_event_names(None, True) == init_events
+        assert Lttng._get_event_names('callback', False) == \
+            init_events | Lttng.TRACE_POINT_SETS['callback']
+        assert Lttng._get_event_names(['ros2:callback_start'], False) == \
+            init_events | {'ros2:callback_start'}
+        with pytest.raises(InvalidArgumentError):
+            Lttng._get_event_names('unknown', False)
+
+    def test_architecture_only(self, mocker):
+        parse_mock = mocker.patch.object(
+            Lttng, '_parse_lttng_data', return_value=(Ros2DataModel(), None))
+        mocker.patch('caret_analyze.infra.lttng.lttng_info.LttngInfo')
+        mocker.patch('caret_analyze.infra.lttng.records_source.RecordsSource')
+        mocker.patch('caret_analyze.infra.lttng.event_counter.EventCounter')
+
+        Lttng('trace_dir', architecture_only=True)
+        assert parse_mock.call_args[0][-1] == InitEventPassFilter.INIT_EVENTS
+
+        Lttng('trace_dir')
+        assert parse_mock.call_args[0][-1] is None
+
+    def test_append_chunks(self, mocker):
+        chunks = {
+            'chunk_0': [
+                {'_name': 'ros2:callback_start', '_timestamp': 1, 'callback': 1,
+                 'is_intra_process': 0},
+            ],
+            'chunk_1': [
+                {'_name': 'ros2:callback_end', '_timestamp': 2, 'callback': 1},
+                {'_name': 'ros2:callback_start', '_timestamp': 3, 'callback': 1,
+                 'is_intra_process': 0},
+            ],
+        }
+
+        def create_reader(trace_dir, *args):
+            return _reader_mock_class(chunks[trace_dir])(trace_dir, *args)
+        mocker.patch('caret_analyze.infra.lttng.lttng.CtfEventReader', side_effect=create_reader)
+        mocker.patch.object(Ros2Handler, 'required_events', return_value=set())
+
+        lttng = Lttng('chunk_0', validate=False)
+        assert len(lttng._data.callback_start_instances) == 1
+        assert len(lttng._data.callback_end_instances) == 0
+        source = lttng._source
+
+        lttng.append_chunks('chunk_1')
+        assert len(lttng._data.callback_start_instances) == 2
+        assert len(lttng._data.callback_end_instances) == 1
+        assert lttng._source is not source
+        assert Lttng._last_load_dir == 'chunk_0'
+        assert Lttng._last_trace_end_time == 3
+
+    def test_follow(self, mocker):
+        events = [
+            {'_name': 'ros2:callback_start', '_timestamp': int(1e9), 'callback': 1,
+             'is_intra_process': 0},
+            {'_name': 'ros2:callback_end', '_timestamp': int(2e9), 'callback': 1},
+            {'_name': 'ros2:callback_start', '_timestamp': int(3e9), 'callback': 1,
+             'is_intra_process': 0},
+            {'_name': 'ros2:callback_end', '_timestamp': int(4e9), 'callback': 1},
+        ]
+        flushed_end = [int(3e9)]
+
+        class ReaderMock(_reader_mock_class(events)):
+            def query_flushed_end(self):
+                return flushed_end[0]
+        mocker.patch('caret_analyze.infra.lttng.lttng.CtfEventReader', ReaderMock)
+        mocker.patch.object(Ros2Handler, 'required_events', return_value=set())
+
+        lttng = Lttng('trace_dir', validate=False, follow=True, retention=2.5)
+        assert len(lttng._data.callback_start_instances) == 1
+        assert len(lttng._data.callback_end_instances) == 1
+        assert lttng.poll() == 0
+
+        flushed_end[0] = int(5e9)
+        assert lttng.poll() == 2
+        assert lttng._data.callback_start_instances.get_column_series(
+            'callback_start_timestamp') == [int(3e9)]
+        assert lttng._data.callback_end_instances.get_column_series(
+            'callback_end_timestamp') == [int(4e9)]
+        assert Lttng._last_trace_end_time == int(5e9)
+
+        lttng = Lttng('trace_dir', validate=False)
+        with pytest.raises(InvalidArgumentError):
+            lttng.poll()
+
+    def test_follow_required_events(self, mocker):
+        events = [
+            {'_name': 'ros2:rcl_init', '_timestamp': int(1e9), 'context_handle': 1,
+             'version': '4.1.0', 'vpid': 1},
+            {'_name': 'ros2:callback_start', '_timestamp': int(2e9), 'callback': 1,
+             'is_intra_process': 0},
+        ]
+        flushed_end = [0]
+
+        class ReaderMock(_reader_mock_class(events)):
+            def query_flushed_end(self):
+                return flushed_end[0]
+        mocker.patch('caret_analyze.infra.lttng.lttng.CtfEventReader', ReaderMock)
+
+        # No event is flushed yet, so the required events are checked on poll.
+        lttng = Lttng('trace_dir', validate=False, follow=True)
+        flushed_end[0] = int(1.5e9)
+        assert lttng.poll() == 1
+        flushed_end[0] = int(3e9)
+        assert lttng.poll() == 1
+
+        events.pop(0)
+        flushed_end[0] = 0
+        lttng = Lttng('trace_dir', validate=False, follow=True)
+        flushed_end[0] = int(3e9)
+        with pytest.raises(RequiredEventNotFound):
+            lttng.poll()
+
+    @pytest.mark.parametrize('jobs', [1, 3])
+    def test_parse_lttng_data_required_events(self, mocker, jobs):
+        events = [
+            {'_name': 'ros2:callback_start', '_timestamp': int(i*1e8)}
+            for i in range(1, 10)
+        ]
+        mocker.patch(
+            'caret_analyze.infra.lttng.lttng.CtfEventReader', _reader_mock_class(events))
+        mocker.patch('caret_analyze.infra.lttng.lttng.ProcessPoolExecutor', ThreadPoolExecutor)
+        mocker.patch.object(Ros2Handler, 'handle')
+
+        with pytest.raises(RequiredEventNotFound):
+            Lttng._parse_lttng_data('trace_dir', False, [], jobs=jobs)
+        Lttng._parse_lttng_data('trace_dir', False, [], jobs=jobs, check_required_events=False)
+
+        events.insert(0, {'_name': 'ros2:rcl_init', '_timestamp': 0})
+        Lttng._parse_lttng_data('trace_dir', False, [], jobs=jobs)
+
+    @pytest.mark.parametrize('jobs', [1, 3])
+    def test_parse_lttng_data_window(self, mocker, jobs):
+        events = [{'_name': 'ros2:rcl_init', '_timestamp': 0}]
+        events += [
+            {'_name': 'ros2:callback_start', '_timestamp': int(i*1e8)}
+            for i in range(1, 40)
+        ]
+        node_init = {'_name': 'ros2:rcl_node_init', '_timestamp': int(2.5e9)}
+        events.append(node_init)
+        events.sort(key=lambda event: event['_timestamp'])
+        trace_end = events[-1]['_timestamp']
+        assert trace_end == int(3.9e9)
+
+        mocker.patch(
+            'caret_analyze.infra.lttng.lttng.CtfEventReader', _reader_mock_class(events))
+        mocker.patch('caret_analyze.infra.lttng.lttng.ProcessPoolExecutor', ThreadPoolExecutor)
+        handled = []
+        mocker.patch.object(
+            Ros2Handler, 'handle', side_effect=lambda event: handled.append(event))
+
+        Lttng._parse_lttng_data('trace_dir', False, [], jobs=jobs, window=(1.0, 2.0))
+
+        # The init events out of the window are also handled.
+        expect = [events[0]] + [
+            event for event in events
+            if int(1e9) <= event['_timestamp'] < int(2e9)
+        ] + [node_init]
+        assert handled == expect
+        assert Lttng._last_trace_begin_time == 0
+        assert Lttng._last_trace_end_time == trace_end
+
+
+def _reader_mock_class(events):
+    class ReaderMock:
+        def __init__(self, trace_dir, begin=None, end=None, event_names=None):
+            self._events = [
+                event for event in events
+                if (begin is None or begin <= event['_timestamp']) and
+                (end is None or event['_timestamp'] < end)
+            ]
+            self._event_names = event_names
+            self.event_count = 0
+            self.skipped_counts = {}
+            self.begin_time = 0
+            self.end_time = events[-1]['_timestamp']
+
+        def query_range(self):
+            return 0, events[-1]['_timestamp']
+
+        def __iter__(self):
+            for event in self._events:
+                name = event['_name']
+                if self._event_names is not None and name not in self._event_names:
+                    self.skipped_counts[name] = self.skipped_counts.get(name, 0) + 1
+                    continue
+                self.event_count += 1
+                yield event
+
+    return ReaderMock
@@ -0,0 +1,178 @@
+# Copyright 2021 Research Institute of Systems Planning, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+from caret_analyze.infra.lttng import Lttng
+from caret_analyze.infra.lttng.lttng import LttngEventFilter
+from caret_analyze.infra.lttng.lttng_info import LttngInfo
+from caret_analyze.infra.lttng.records_source import RecordsSource
+from caret_analyze.infra.lttng.ros2_tracing.data_model import Ros2DataModel
+from caret_analyze.infra.lttng.ros2_tracing.processor import Ros2Handler
+from caret_analyze.infra.lttng.trace_cache import DataModelCache, RecordsCache
+from caret_analyze.record import Record, Records, RecordsFactory, RecordsNumpyImpl
+
+import numpy as np
+import pandas as pd
+
+
+def create_trace_dir(tmp_path) -> str:
+    trace_dir = tmp_path / 'trace'
+    trace_dir.mkdir()
+    (trace_dir / 'metadata').write_text('metadata')
+    (trace_dir / 'channel0_0').write_bytes(b'\x00' * 16)
+    return str(trace_dir)
+
+
+def create_data() -> Ros2DataModel:
+    data = Ros2DataModel()
+    data.add_node(1, 2, 3, 4, 'node', '/')
+    data.add_callback_start_instance(10, 100, False)
+    data.add_callback_start_instance(20, 100, True)
+    data.add_callback_end_instance(15, 100)
+    data.finalize()
+    return data
+
+
+class TestDataModelCache:
+
+    def test_save_load(self, tmp_path):
+        trace_dir = create_trace_dir(tmp_path)
+        data = create_data()
+
+        cache = DataModelCache(trace_dir, [])
+        assert cache.load() is None
+        cache.save(data, {'begin_time': 1, 'end_time': 2})
+        assert os.path.isfile(cache.path)
+        with np.load(cache.path, allow_pickle=False) as npz:
+            assert 'callback_start_instances.0.values' in npz.files
+
+        loaded = DataModelCache(trace_dir, []).load()
+        assert loaded is not None
+        data_, info = loaded
+        assert info == {'begin_time': 1, 'end_time': 2}
+        pd.testing.assert_frame_equal(data_.nodes, data.nodes)
+        assert data_.callback_start_instances.columns == data.callback_start_instances.columns
+        assert data_.callback_start_instances.equals(data.callback_start_instances)
+        assert data_.callback_end_instances.equals(data.callback_end_instances)
+        assert len(data_.dds_write_instances) == 0
+        assert data_.event_counts == data.event_counts
+
+    def test_key(self, tmp_path):
+        trace_dir = create_trace_dir(tmp_path)
+        cache = DataModelCache(trace_dir, [])
+        cache.save(create_data(), {'begin_time': 1, 'end_time': 2})
+
+        assert DataModelCache(trace_dir, []).path == cache.path
+        assert DataModelCache(
+            trace_dir, [LttngEventFilter.strip_filter(1, None)]).path != cache.path
+        assert DataModelCache(
+            trace_dir, [LttngEventFilter.strip_filter(1, None)]).path != DataModelCache(
+            trace_dir, [LttngEventFilter.strip_filter(2, None)]).path
+
+        with open(os.path.join(trace_dir, 'channel0_0'), 'ab') as f:
+            f.write(b'\x00')
+        modified = DataModelCache(trace_dir, [])
+        assert modified.path != cache.path
+        assert modified.load() is None
+
+    def test_parse_lttng_data(self, tmp_path, mocker):
+        trace_dir = create_trace_dir(tmp_path)
+        reader_mock = mocker.MagicMock()
+        reader_mock.__iter__.return_value = iter([])
+        reader_mock.begin_time = 1
+        reader_mock.end_time = 2
+        reader_cls_mock = mocker.patch(
+            'caret_analyze.infra.lttng.lttng.CtfEventReader', return_value=reader_mock)
+        mocker.patch.object(Ros2Handler, 'required_events', return_value=set())
+
+        Lttng._parse_lttng_data(trace_dir, False, [], use_cache=True)
+        assert reader_cls_mock.call_count == 1
+
+        Lttng._last_trace_begin_time = None
+        Lttng._last_trace_end_time = None
+        data, events = Lttng._parse_lttng_data(trace_dir, False, [], use_cache=True)
+        assert reader_cls_mock.call_count == 1
+        assert isinstance(data, Ros2DataModel)
+        assert events is None
+        assert Lttng._last_trace_begin_time == 1
+        assert Lttng._last_trace_end_time == 2
+
+        Lttng._parse_lttng_data(trace_dir, False, [], store_events=True, use_cache=True)
+        assert reader_cls_mock.call_count == 2
+
+
+class TestRecordsCache:
+
+    def test_save_load(self, tmp_path):
+        trace_dir = create_trace_dir(tmp_path)
+        records = Records(
+            [
+                Record({'a': 1, 'b': 2}),
+                Record({'b': 3}),
+                Record(),
+            ],
+            ['a', 'b']
+        )
+
+        cache = RecordsCache(trace_dir, [])
+        assert cache.load('records') is None
+        cache.save('records', records)
+
+        loaded = RecordsCache(trace_dir, []).load('records')
+        assert loaded is not None
+        assert loaded.columns == ['a', 'b']
+        assert loaded.equals(records)
+        assert RecordsCache(trace_dir, []).load('other') is None
+
+    def test_save_load_numpy(self, tmp_path, mocker):
+        mocker.patch.object(RecordsFactory, 'use_numpy_impl', True)
+        trace_dir = create_trace_dir(tmp_path)
+        records = RecordsFactory.create_instance(
+            [Record({'a': 1, 'b': 2}), Record({'b': 3})], ['a', 'b'])
+
+        RecordsCache(trace_dir, []).save('records', records)
+        loaded = RecordsCache(trace_dir, []).load('records')
+        assert isinstance(loaded, RecordsNumpyImpl)
+        assert loaded.equals(records)
+
+    def test_load_object_arrays(self, tmp_path):
+        trace_dir = create_trace_dir(tmp_path)
+        cache = RecordsCache(trace_dir, [])
+        cache.save('records', Records([Record({'a': 1})], ['a']))
+
+        # Object arrays need unpickling, which may execute code, so the cache is discarded.
+        path = cache._get_path('records_records')
+        with np.load(path) as npz:
+            arrays = {key: npz[key] for key in npz.files}
+        arrays['records.0.values'] = np.array([1], dtype=object)
+        with open(path, 'wb') as f:
+            np.savez(f, **arrays)
+        assert RecordsCache(trace_dir, []).load('records') is None
+
+    def test_records_source(self, tmp_path, mocker):
+        trace_dir = create_trace_dir(tmp_path)
+        info_mock = mocker.Mock(spec=LttngInfo)
+        cache = RecordsCache(trace_dir, [])
+
+        data = create_data()
+        expect = RecordsSource(data, info_mock, cache).callback_records
+        assert len(expect) == 1
+
+        # Records are loaded from the cache without composing them from the data model.
+        records = RecordsSource(Ros2DataModel(), info_mock, cache).callback_records
+        assert records.equals(expect)
+
+        records = RecordsSource(Ros2DataModel(), info_mock).callback_records
+        assert len(records) == 0
@@ -0,0 +1,80 @@
+# Copyright 2021 Research Institute of Systems Planning, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from caret_analyze.exceptions import InvalidArgumentError
+from caret_analyze.infra.lttng.ros2_tracing.data_model import Ros2DataModel
+from caret_analyze.infra.lttng.trace_snapshot import TraceSnapshot
+from caret_analyze.record import Record, RecordsFactory
+from caret_analyze.record.record_numpy_impl import RecordsNumpyImpl
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def create_data() -> Ros2DataModel:
+    data = Ros2DataModel()
+    data.add_node(1, 2, 3, 4, 'node', '/')
+    data.add_callback_start_instance(10, 100, False)
+    data.add_callback_start_instance(20, 100, True)
+    data.add_callback_end_instance(15, 100)
+    data.finalize()
+    return data
+
+
+class TestTraceSnapshot:
+
+    @pytest.mark.parametrize('use_numpy_impl', [False, True])
+    def test_save_load(self, tmp_path, mocker, use_numpy_impl):
+        mocker.patch.object(RecordsFactory, 'use_numpy_impl', use_numpy_impl)
+        data = create_data()
+        records = RecordsFactory.create_instance(
+            [Record({'a': 1, 'b': 2}), Record({'a': 3})], ['a', 'b'])
+        info = {'begin_time': 1, 'end_time': 2, 'event_names': None, 'skipped_counts': None}
+
+        path = str(tmp_path / 'snapshot')
+        assert not TraceSnapshot.is_snapshot(path)
+        TraceSnapshot(path).save(data, {'records': records}, info)
+        assert TraceSnapshot.is_snapshot(path)
+
+        data_, records_, info_ = TraceSnapshot(path).load()
+        assert info_ == info
+        pd.testing.assert_frame_equal(data_.nodes, data.nodes)
+        assert data_.callback_start_instances.equals(data.callback_start_instances)
+        assert data_.callback_end_instances.equals(data.callback_end_instances)
+        assert len(data_.dds_write_instances) == 0
+        assert data_.event_counts == data.event_counts
+        assert records_['records'].equals(records)
+        if use_numpy_impl:
+            loaded = records_['records']
+            assert isinstance(loaded, RecordsNumpyImpl)
+            assert isinstance(loaded._values['a'], np.memmap)
+
+        # The snapshot is not changed by the loaded records.
+        records_['records'].filter_if(lambda record: record.get('a') == 1)
+        _, records_, _ = TraceSnapshot(path).load()
+        assert len(records_['records']) == 2
+
+    def test_overwrite(self, tmp_path):
+        path = tmp_path / 'snapshot'
+        TraceSnapshot(str(path)).save(create_data(), {}, {})
+        TraceSnapshot(str(path)).save(create_data(), {}, {'begin_time': 1})
+        assert TraceSnapshot(str(path)).load()[2] == {'begin_time': 1}
+
+        not_snapshot = tmp_path / 'trace'
+        not_snapshot.mkdir()
+        with pytest.raises(InvalidArgumentError):
+            TraceSnapshot(str(not_snapshot)).save(create_data(), {}, {})
+        with pytest.raises(InvalidArgumentError):
+            TraceSnapshot(str(not_snapshot)).load()
@@ -401,6 +401,101 @@ class TestRecords:
             assert records_.columns == ['stamp', 'aaa']
             assert records.columns == ['stamp']
 
+    def test_clone_copy_on_write(self):
+        def create_records_py() -> Records:
+            return Records(
+                [
+                    Record({'stamp': 0, 'value': 1}),
+                    Record({'stamp': 1, 'value': 2}),
+                ], ['stamp', 'value']
+            )
+
+        for records_type in [Records, RecordsCppImpl]:
+            if records_type == RecordsCppImpl and not CppImplEnabled:
+                continue
+
+            def create_records() -> RecordsInterface:
+                if records_type == RecordsCppImpl:
+                    return to_cpp_records(create_records_py())
+                return create_records_py()
+
+            records = create_records()
+            cloned = records.clone()
+            cloned.rename_columns({'value': 'value_'})
+            cloned.filter_if(lambda record: record.get('stamp') == 0)
+            assert cloned.columns == ['stamp', 'value_']
+            assert len(cloned) == 1
+            assert records.equals(create_records())
+
+            cloned = records.clone()
+            records.drop_columns(['value'])
+            records.append(Record({'stamp': 2}))
+            assert cloned.equals(create_records())
+
+            concatenated = records_type(None, ['stamp', 'value'])
+            concatenated.concat(cloned)
+            concatenated.drop_columns(['value'])
+            assert cloned.equals(create_records())
+
+    def test_clone_copy_rows_lazily(self):
+        rows = [
+            Record({'stamp': 0}),
+            Record({'stamp': 1, 'value': 2}),
+        ]
+        records = Records(rows, ['stamp', 'value'])
+        cloned = records.clone()
+
+        # Only the rows changed by the clone are copied.
+        cloned.bind_drop_as_delay()
+        assert [record.data for record in cloned.data] == \
+            [{'stamp': 0, 'value': 2}, {'stamp': 1, 'value': 2}]
+        assert rows[0].data == {'stamp': 0}
+        assert cloned.data[0] is not rows[0]
+        assert cloned.data[1] is rows[1]
+        assert records._shared
+
+        # Once the clone has copied all of its rows, the source changes its rows in place.
+        cloned.append_column('tmp', [3, 4])
+        assert cloned.data[1] is not rows[1]
+        assert not records._shared
+        records.append_column('tmp', [5, 6])
+        assert records.data[0] is rows[0]
+        assert [record.data for record in cloned.data] == \
+            [{'stamp': 0, 'value': 2, 'tmp': 3}, {'stamp': 1, 'value': 2, 'tmp': 4}]
+
+    def test_rename_drop_columns_deferred(self):
+        rows = [
+            Record({'stamp': 0, 'value': 1, 'tmp': 2}),
+            Record({'stamp': 1, 'value': 3, 'tmp': 4}),
+        ]
+        records = Records(rows, ['stamp', 'value', 'tmp'])
+        cloned = records.clone()
+
+        records.rename_columns({'value': 'value_'})
+        records.drop_columns(['tmp'])
+        records.rename_columns({'stamp': 'value'})
+        assert records.columns == ['value', 'value_']
+        assert len(records) == 2
+        # The rows are not changed until they are accessed.
+        assert rows[0].data == {'stamp': 0, 'value': 1, 'tmp': 2}
+
+        expect = Records(
+            [
+                Record({'value': 0, 'value_': 1}),
+                Record({'value': 1, 'value_': 3}),
+            ], ['value', 'value_']
+        )
+        assert records.equals(expect)
+        assert [record.data for record in records.data] == \
+            [{'value': 0, 'value_': 1}, {'value': 1, 'value_': 3}]
+        assert cloned.columns == ['stamp', 'value', 'tmp']
+        assert cloned.data[1].data == {'stamp': 1, 'value': 3, 'tmp': 4}
+
+        records.append(Record({'value': 2}))
+        assert len(records) == 3
+        with pytest.raises(ValueError):
+            records.rename_columns({'tmp': 'tmp_'})
+
     def test_filter_if(self):
         key = 'stamp'
 
@@ -510,6 +605,11 @@ class TestRecords:
             df = records.to_dataframe()
             assert df.equals(expect_df)
 
+        df = Records(None, ['a', 'b']).to_dataframe()
+        assert list(df.columns) == ['a', 'b']
+        assert list(df.dtypes) == ['Int64', 'Int64']
+        assert len(df) == 0
+
     def test_iter(self):
         records_py: Records = Records(
             [
@@ -664,6 +764,62 @@ class TestRecords:
             for k, v in group_cpp.items():
                 assert v.equals(expect_cpp[k])
 
+    def test_take_groups(self):
+        records_py = Records(
+            [
+                Record({'a': 0, 'b': 1}),
+                Record({'a': 5, 'b': 2}),
+                Record({'b': 3}),
+                Record({'a': 0, 'b': 4}),
+            ],
+            ['a', 'b']
+        )
+        expect = Records(
+            [
+                Record({'a': 5, 'b': 2}),
+                Record({'a': 0, 'b': 1}),
+                Record({'a': 0, 'b': 4}),
+            ],
+            ['a', 'b']
+        )
+
+        for records_type in [Records, RecordsCppImpl]:
+            if records_type == RecordsCppImpl and not CppImplEnabled:
+                continue
+            records = records_py.clone()
+            if records_type == RecordsCppImpl:
+                records = to_cpp_records(records_py)
+
+            taken = records.take_groups(['a'], [(5,), (1,), (0,)])
+            assert taken.equals(expect if records_type == Records else to_cpp_records(expect))
+            assert records.take_groups(['a'], []).columns == ['a', 'b']
+            assert len(records.take_groups(['a'], [(1,)])) == 0
+
+            # The taken rows are not changed by the records, and vice versa.
+            taken.append_column('c', [0, 1, 2])
+            records.append(Record({'a': 5, 'b': 5}))
+            assert len(records.take_groups(['a'], [(5,)])) == 2
+            assert records.columns == ['a', 'b']
+            assert records_py.data[1].data == {'a': 5, 'b': 2}
+
+    def test_take_groups_index(self, mocker):
+        records = Records(
+            [
+                Record({'a': 0, 'b': 1}),
+                Record({'a': 5, 'b': 2}),
+            ],
+            ['a', 'b']
+        )
+        records.take_groups(['a'], [(0,)])
+        get_with_default_mock = mocker.patch.object(Record, 'get_with_default')
+        assert len(records.take_groups(['a'], [(5,)])) == 1
+        assert records.groupby(['a']).keys() == {(0,), (5,)}
+        get_with_default_mock.assert_not_called()
+
+        records.rename_columns({'a': 'a_'})
+        mocker.stopall()
+        assert len(records.take_groups(['a_'], [(5,)])) == 1
+
     def test_groupby_2key(self):
         records_py = Records(
             [
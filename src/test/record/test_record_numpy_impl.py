@@ -0,0 +1,548 @@
+# Copyright 2021 Research Institute of Systems Planning, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from copy import deepcopy
+import random
+
+from caret_analyze.exceptions import InvalidArgumentError
+from caret_analyze.record import RecordsFactory
+from caret_analyze.record.record import merge, Record, Records, RecordsInterface
+from caret_analyze.record.record_numpy_impl import RecordsNumpyImpl
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def to_numpy_records(records: Records) -> RecordsNumpyImpl:
+    return RecordsNumpyImpl(deepcopy(records.data), records.columns)
+
+
+def to_py_records(records: RecordsInterface) -> Records:
+    return Records([Record(record.data) for record in records.data], records.columns)
+
+
+def assert_same(records_numpy: RecordsInterface, records_py: RecordsInterface) -> None:
+    assert isinstance(records_numpy, RecordsNumpyImpl)
+    assert to_py_records(records_numpy).equals(records_py)
+    assert records_numpy.columns == records_py.columns
+
+
+def random_records(
+    columns, size: int, seed: int, max_value: int = 10, missing_rate: float = 0.2
+) -> Records:
+    rand = random.Random(seed)
+    records = Records(None, columns)
+    for _ in range(size):
+        records.append(Record({
+            column: rand.randint(0, max_value)
+            for column in columns
+            if rand.random() >= missing_rate
+        }))
+    return records
+
+
+class TestRecordsNumpyImpl:
+
+    def test_init(self):
+        RecordsNumpyImpl()
+        with pytest.raises(InvalidArgumentError):
+            RecordsNumpyImpl([Record({'a': 1})], None)
+
+        with pytest.raises(InvalidArgumentError):
+            RecordsNumpyImpl(None, ['a', 'a'])
+
+    def test_from_arrays(self):
+        records = RecordsNumpyImpl.from_arrays(
+            ['a', 'b'],
+            {'a': np.array([0, 1], dtype=np.uint64), 'b': np.array([2, 3])},
+            {'b': np.array([True, False])})
+        assert records.columns == ['a', 'b']
+        assert [r.data for r in records.data] == [{'a': 0, 'b': 2}, {'a': 1}]
+
+        values, valid = records.get_column_arrays('b')
+        assert values.dtype == np.uint64 and values[0] == 2
+        assert valid.tolist() == [True, False]
+        assert not values.flags.writeable
+        with pytest.raises(InvalidArgumentError):
+            records.get_column_arrays('c')
+
+        with pytest.raises(InvalidArgumentError):
+            RecordsNumpyImpl.from_arrays(['a', 'b'], {'a': np.array([0])})
+        with pytest.raises(InvalidArgumentError):
+            RecordsNumpyImpl.from_arrays(['a', 'b'], {'a': np.array([0]), 'b': np.array([])})
+
+    def test_data(self):
+        records_py = Records(
+            [
+                Record({'value': 0, 'stamp': 1}),
+                Record({'stamp': 18446744073709551615}),
+                Record(),
+            ],
+            ['value', 'stamp']
+        )
+        records = to_numpy_records(records_py)
+
+        assert len(records) == 3
+        assert records.columns == ['value', 'stamp']
+        assert [r.data for r in records.data] == [r.data for r in records_py.data]
+        assert records.get_column_series('stamp') == [1, 18446744073709551615, None]
+
+    def test_append(self):
+        records = RecordsNumpyImpl(None, ['value', 'stamp'])
+        for i in range(100):
+            records.append(Record({'value': i, 'stamp': i + 1}))
+        records.append(Record({'stamp': 1}))
+
+        assert len(records) == 101
+        assert records.get_row_series(100).data == {'stamp': 1}
+        assert records.get_row_series(99).data == {'value': 99, 'stamp': 100}
+
+        with pytest.raises(InvalidArgumentError):
+            records.append(Record({'unknown': 1}))
+
+    def test_concat(self):
+        left = RecordsNumpyImpl([Record({'a': 0}), Record({'a': 1})], ['a'])
+        right_py = Records([Record({'b': 3}), Record({'b': 4})], ['b'])
+
+        records = RecordsNumpyImpl(None, ['a', 'b'])
+        records.concat(left)
+        records.concat(to_numpy_records(right_py))
+        records.concat(right_py)
+        assert [r.data for r in records.data] == \
+            [{'a': 0}, {'a': 1}, {'b': 3}, {'b': 4}, {'b': 3}, {'b': 4}]
+
+        with pytest.raises(InvalidArgumentError):
+            left.concat(right_py)
+
+    def test_drop_columns(self):
+        records = RecordsNumpyImpl(
+            [Record({'stamp': 0, 'value': 1}), Record({'stamp': 2})], ['stamp', 'value'])
+
+        records.drop_columns(['value', 'unknown'])
+        assert records.columns == ['stamp']
+        assert [r.data for r in records.data] == [{'stamp': 0}, {'stamp': 2}]
+
+        with pytest.raises(InvalidArgumentError):
+            records.drop_columns('stamp')  # type: ignore
+
+    def test_rename_columns(self):
+        records = RecordsNumpyImpl(
+            [Record({'stamp': 0, 'aaa': 1}), Record()], ['stamp', 'aaa'])
+
+        records.rename_columns({'aaa': 'aaa_', 'stamp': 'stamp_'})
+        assert records.columns == ['stamp_', 'aaa_']
+        assert [r.data for r in records.data] == [{'stamp_': 0, 'aaa_': 1}, {}]
+
+        with pytest.raises(InvalidArgumentError):
+            records.rename_columns({'aaa_': 'stamp_', 'stamp_': 'stamp__'})
+
+    def test_rename_unknown_column(self):
+        records_py = Records([Record({'stamp': 0, 'aaa': 1})], ['stamp', 'aaa'])
+        records = to_numpy_records(records_py)
+
+        # Unknown columns raise the same error as Records, and no column is renamed.
+        for records_ in [records_py, records]:
+            with pytest.raises(ValueError):
+                records_.rename_columns({'aaa': 'aaa_', 'unknown': 'unknown_'})
+            assert records_.columns == ['stamp', 'aaa']
+        assert_same(records, records_py)
+
+    def test_clone(self):
+        records = RecordsNumpyImpl([Record({'stamp': 0})], ['stamp'])
+
+        records_ = records.clone()
+        records_.append_column('aaa', [9])
+        records_.append(Record({'stamp': 1}))
+        assert records.columns == ['stamp']
+        assert len(records) == 1
+
+    def test_clone_copy_on_write(self):
+        records = RecordsNumpyImpl(
+            [Record({'stamp': 0, 'value': 1}), Record({'stamp': 1})], ['stamp', 'value'])
+        records.append(Record({'stamp': 2, 'value': 3}))
+        expect = to_py_records(records)
+
+        cloned = records.clone()
+        assert cloned._values['stamp'] is records._values['stamp']
+        cloned.append(Record({'stamp': 3}))
+        cloned.rename_columns({'value': 'value_'})
+        cloned.bind_drop_as_delay()
+        assert_same(records, expect)
+
+        cloned = records.clone()
+        records.append(Record({'stamp': 4}))
+        records.sort('stamp', ascending=False)
+        records.drop_columns(['value'])
+        assert_same(cloned, expect)
+
+    def test_append_column(self):
+        records = RecordsNumpyImpl([Record(), Record()], [])
+        records.append_column('value', [0, None])
+
+        assert records.columns == ['value']
+        assert [r.data for r in records.data] == [{'value': 0}, {}]
+
+        with pytest.raises(InvalidArgumentError):
+            records.append_column('value_', [0])
+
+    def test_filter_if(self):
+        records = RecordsNumpyImpl(
+            [Record({'stamp': 0}), Record({'stamp': 1}), Record({'stamp': 2})], ['stamp'])
+
+        records.filter_if(lambda record: record.get('stamp') == 1)
+        assert records.columns == ['stamp']
+        assert [r.data for r in records.data] == [{'stamp': 1}]
+
+        records.filter_if(lambda _: False)
+        assert len(records) == 0
+
+    def test_get_series(self):
+        records = RecordsNumpyImpl(
+            [Record({'a': 0, 'b': 1}), Record({'b': 3})], ['a', 'b'])
+
+        assert records.get_column_series('a') == [0, None]
+        assert records.get_row_series(1).equals(Record({'b': 3}))
+
+        with pytest.raises(InvalidArgumentError):
+            records.get_column_series('c')
+        with pytest.raises(InvalidArgumentError):
+            records.get_row_series(2)
+
+    def test_equals(self):
+        records = RecordsNumpyImpl([Record({'a': 0}), Record()], ['a', 'b'])
+
+        assert records.equals(records.clone())
+        assert not records.equals(RecordsNumpyImpl([Record({'a': 0}), Record()], ['b', 'a']))
+        assert not records.equals(
+            RecordsNumpyImpl([Record({'a': 0}), Record({'a': 0})], ['a', 'b']))
+        assert not records.equals(Records([Record({'a': 0}), Record()], ['a', 'b']))
+
+    def test_reindex(self):
+        records = RecordsNumpyImpl([Record({'a': 1, 'b': 3})], ['b', 'a'])
+
+        records.reindex(['a', 'b'])
+        assert records.columns == ['a', 'b']
+
+        with pytest.raises(InvalidArgumentError):
+            records.reindex(['a', 'b', 'c'])
+
+    @pytest.mark.parametrize('seed', range(5))
+    def test_sort(self, seed):
+        records_py = random_records(['a', 'b', 'c'], 50, seed, missing_rate=0)
+
+        for sub_key in [None, 'b']:
+            for ascending in [True, False]:
+                expect = deepcopy(records_py)
+                expect.sort('a', sub_key=sub_key, ascending=ascending)
+                records = to_numpy_records(records_py)
+                records.sort('a', sub_key=sub_key, ascending=ascending)
+                assert_same(records, expect)
+
+        with pytest.raises(InvalidArgumentError):
+            to_numpy_records(records_py).sort('unknown')
+
+    @pytest.mark.parametrize('seed', range(5))
+    def test_sort_column_order(self, seed):
+        records_py = random_records(['a', 'b', 'c'], 50, seed)
+
+        for ascending in [True, False]:
+            for put_none_at_top in [True, False]:
+                expect = deepcopy(records_py)
+                expect.sort_column_order(ascending, put_none_at_top)
+                records = to_numpy_records(records_py)
+                records.sort_column_order(ascending, put_none_at_top)
+                assert_same(records, expect)
+
+    @pytest.mark.parametrize('seed', range(5))
+    def test_bind_drop_as_delay(self, seed):
+        records_py = random_records(['sort_key', 'stamp', 'stamp_'], 50, seed, max_value=1000)
+        expect = deepcopy(records_py)
+        expect.bind_drop_as_delay()
+
+        records = to_numpy_records(records_py)
+        records.bind_drop_as_delay()
+        assert_same(records, expect)
+
+    @pytest.mark.parametrize('seed', range(5))
+    def test_groupby(self, seed):
+        records_py = random_records(['a', 'b', 'c'], 50, seed, max_value=3)
+
+        for columns in [['a'], ['a', 'b'], ['c', 'b', 'a']]:
+            expect = records_py.groupby(columns)
+            group = to_numpy_records(records_py).groupby(columns)
+
+            assert list(group.keys()) == list(expect.keys())
+            for k, v in group.items():
+                assert_same(v, expect[k])
+
+    @pytest.mark.parametrize('seed', range(5))
+    def test_take_groups(self, seed):
+        records_py = random_records(['a', 'b', 'c'], 50, seed, max_value=3)
+        records = to_numpy_records(records_py)
+
+        for columns in [['a'], ['a', 'b']]:
+            keys = list(records_py.groupby(columns).keys())[::-1] + [(10,) * len(columns)]
+            expect = Records(None, records_py.columns)
+            for k in keys:
+                expect.concat(records_py.take_groups(columns, [k]))
+
+            assert_same(records.take_groups(columns, keys), expect)
+            assert tuple(columns) in records._group_indices
+
+        records.append(Record({'a': 10}))
+        assert records._group_indices == {}
+        assert len(records.take_groups(['a'], [(10,)])) == 1
+
+    def test_to_dataframe(self):
+        records_py = Records(
+            [
+                Record({'a': 0}),
+                Record({'b': 1, 'a': 3}),
+                Record({'c': 2, 'a': 5}),
+            ],
+            ['b', 'a', 'c']
+        )
+        expect_df = records_py.to_dataframe()
+
+        df = to_numpy_records(records_py).to_dataframe()
+        pd.testing.assert_frame_equal(df, expect_df, check_index_type=False)
+
+        df = RecordsNumpyImpl(None, ['a']).to_dataframe()
+        assert list(df.columns) == ['a']
+        assert len(df) == 0
+
+    def test_to_dataframe_copy(self):
+        records = to_numpy_records(
+            Records([Record({'a': 0}), Record({'a': 3, 'b': 1})], ['a', 'b']))
+        expect_df = records.to_dataframe()
+
+        df = records.to_dataframe(copy=False)
+        pd.testing.assert_frame_equal(df, expect_df)
+        assert np.shares_memory(df['a'].array._data, records._get_values('a'))
+        assert not np.shares_memory(expect_df['a'].array._data, records._get_values('a'))
+
+    @pytest.mark.parametrize('how', ['inner', 'left', 'right', 'outer'])
+    @pytest.mark.parametrize('seed', range(10))
+    @pytest.mark.parametrize('right_size', [10, 30, 50])
+    def test_merge(self, how, seed, right_size):
+        left_py = random_records(['stamp', 'value_left'], 30, seed, max_value=10)
+        right_py = random_records(['stamp_', 'value_right'], right_size, seed + 100, max_value=10)
+        columns = ['stamp', 'value_left', 'stamp_', 'value_right']
+
+        expect = merge(deepcopy(left_py), deepcopy(right_py),
+                       'value_left', 'value_right', columns, how)
+        merged = merge(to_numpy_records(left_py), to_numpy_records(right_py),
+                       'value_left', 'value_right', columns, how)
+        assert_same(merged, expect)
+
+    @pytest.mark.parametrize('how', ['inner', 'left', 'right', 'outer'])
+    @pytest.mark.parametrize('seed', range(10))
+    def test_merge_with_same_column(self, how, seed):
+        left_py = random_records(['key', 'value'], 30, seed, max_value=5)
+        right_py = random_records(['key_', 'value'], 30, seed + 100, max_value=5)
+        columns = ['key', 'value', 'key_']
+
+        expect = merge(deepcopy(left_py), deepcopy(right_py), 'key', 'key_', columns, how)
+        merged = merge(to_numpy_records(left_py), to_numpy_records(right_py),
+                       'key', 'key_', columns, how)
+        assert_same(merged, expect)
+
+    def test_merge_reuse_join_index(self):
+        left_py = random_records(['stamp', 'value_left'], 10, 0, max_value=5)
+        right_py = random_records(['stamp_', 'value_right'], 30, 1, max_value=5)
+        columns = ['stamp', 'value_left', 'stamp_', 'value_right']
+        left = to_numpy_records(left_py)
+        right = to_numpy_records(right_py)
+
+        merge(left, right, 'value_left', 'value_right', columns, 'outer')
+        index = left._join_indices['value_left']
+        merge(left, right, 'value_left', 'value_right', columns, 'inner')
+        assert left._join_indices['value_left'] is index
+
+        record = Record({'stamp': 100, 'value_left': 3})
+        left_py.append(record)
+        left.append(deepcopy(record))
+        assert 'value_left' not in left._join_indices
+
+        expect = merge(deepcopy(left_py), deepcopy(right_py),
+                       'value_left', 'value_right', columns, 'outer')
+        merged = merge(left, right, 'value_left', 'value_right', columns, 'outer')
+        assert_same(merged, expect)
+
+    @pytest.mark.parametrize('how', ['inner', 'left', 'right', 'outer', 'left_use_latest'])
+    @pytest.mark.parametrize('seed', range(10))
+    def test_merge_sequencial(self, how, seed):
+        left_py = random_records(['stamp', 'value_left'], 30, seed, max_value=5)
+        right_py = random_records(['stamp_', 'value_right'], 30, seed + 100, max_value=5)
+        columns = ['stamp', 'value_left', 'stamp_', 'value_right']
+
+        expect = deepcopy(left_py).merge_sequencial(
+            deepcopy(right_py), 'stamp', 'stamp_', 'value_left', 'value_right', columns, how)
+        left = to_numpy_records(left_py)
+        right = to_numpy_records(right_py)
+        merged = left.merge_sequencial(
+            right, 'stamp', 'stamp_', 'value_left', 'value_right', columns, how)
+        assert_same(merged, expect)
+        assert left.columns == ['stamp', 'value_left']
+        assert right.columns == ['stamp_', 'value_right']
+
+    @pytest.mark.parametrize('how', ['inner', 'left', 'right', 'outer', 'left_use_latest'])
+    @pytest.mark.parametrize('seed', range(10))
+    def test_merge_sequencial_without_key(self, how, seed):
+        left_py = random_records(['stamp', 'other'], 30, seed, max_value=20)
+        right_py = random_records(['stamp_', 'other_'], 30, seed + 100, max_value=20)
+        columns = ['stamp', 'other', 'stamp_', 'other_']
+
+        expect = deepcopy(left_py).merge_sequencial(
+            deepcopy(right_py), 'stamp', 'stamp_', None, None, columns, how)
+        merged = to_numpy_records(left_py).merge_sequencial(
+            to_numpy_records(right_py), 'stamp', 'stamp_', None, None, columns, how)
+        assert_same(merged, expect)
+
+    @pytest.mark.parametrize('how', ['inner', 'left', 'right', 'outer', 'left_use_latest'])
+    @pytest.mark.parametrize('seed', range(10))
+    def test_merge_sequencial_with_same_key(self, how, seed):
+        left_py = random_records(['stamp', 'value'], 30, seed, max_value=5)
+        right_py = random_records(['stamp_', 'value'], 30, seed + 100, max_value=5)
+        columns = ['stamp', 'value', 'stamp_']
+
+        expect = deepcopy(left_py).merge_sequencial(
+            deepcopy(right_py), 'stamp', 'stamp_', 'value', 'value', columns, how)
+        merged = to_numpy_records(left_py).merge_sequencial(
+            to_numpy_records(right_py), 'stamp', 'stamp_', 'value', 'value', columns, how)
+        assert_same(merged, expect)
+
+    def test_merge_sequencial_validate_columns(self):
+        left = RecordsNumpyImpl([Record({'stamp': 0})], ['stamp'])
+        right = RecordsNumpyImpl([Record({'stamp_': 1})], ['stamp_'])
+
+        with pytest.raises(InvalidArgumentError):
+            left.merge_sequencial(right, 'stamp', 'stamp_', None, None, ['stamp'], 'inner')
+        with pytest.raises(InvalidArgumentError):
+            left.merge_sequencial(
+                right, 'stamp', 'stamp_', None, None, ['stamp', 'stamp_', 'stamp'], 'inner')
+
+    def test_merge_sequencial_for_addr_track(self):
+        source_py = Records(
+            [
+                Record({'source_addr': 1, 'source_stamp': 0}),
+                Record({'source_addr': 1, 'source_stamp': 10}),
+                Record({'source_addr': 3, 'source_stamp': 20}),
+            ],
+            ['source_addr', 'source_stamp']
+        )
+        copy_py = Records(
+            [
+                Record({'addr_from': 1, 'addr_to': 13, 'copy_stamp': 1}),
+                Record({'addr_from': 3, 'addr_to': 13, 'copy_stamp': 21}),
+            ],
+            ['addr_from', 'addr_to', 'copy_stamp']
+        )
+        sink_py = Records(
+            [
+                Record({'sink_addr': 13, 'sink_stamp': 2}),
+                Record({'sink_addr': 1, 'sink_stamp': 3}),
+                Record({'sink_addr': 13, 'sink_stamp': 23}),
+            ],
+            ['sink_addr', 'sink_stamp']
+        )
+        args = ('source_stamp', 'source_addr')
+        kwargs = {
+            'copy_stamp_key': 'copy_stamp', 'copy_from_key': 'addr_from',
+            'copy_to_key': 'addr_to', 'sink_stamp_key': 'sink_stamp',
+            'sink_from_key': 'sink_addr', 'columns': ['source_addr', 'source_stamp', 'sink_stamp'],
+        }
+
+        expect = source_py.merge_sequencial_for_addr_track(
+            *args, copy_records=copy_py, sink_records=sink_py, **kwargs)
+        merged = to_numpy_records(source_py).merge_sequencial_for_addr_track(
+            *args, copy_records=to_numpy_records(copy_py),
+            sink_records=to_numpy_records(sink_py), **kwargs)
+        assert_same(merged, expect)
+
+    @pytest.mark.parametrize('seed', range(20))
+    def test_merge_sequencial_for_addr_track_random(self, seed):
+        rand = random.Random(seed)
+
+        def random_addr_records(columns, stamp_column, size):
+            return Records(
+                [
+                    Record({
+                        **{column: rand.randint(0, 5) for column in columns},
+                        stamp_column: rand.randint(0, 50)
+                    })
+                    for _ in range(size)
+                ],
+                columns + [stamp_column]
+            )
+
+        source_py = random_addr_records(['source_addr'], 'source_stamp', 20)
+        copy_py = random_addr_records(['addr_from', 'addr_to'], 'copy_stamp', 20)
+        sink_py = random_addr_records(['sink_addr'], 'sink_stamp', 20)
+        args = ('source_stamp', 'source_addr')
+        kwargs = {
+            'copy_stamp_key': 'copy_stamp', 'copy_from_key': 'addr_from',
+            'copy_to_key': 'addr_to', 'sink_stamp_key': 'sink_stamp',
+            'sink_from_key': 'sink_addr', 'columns': ['source_addr', 'source_stamp', 'sink_stamp'],
+        }
+
+        expect = source_py.merge_sequencial_for_addr_track(
+            *args, copy_records=copy_py, sink_records=sink_py, **kwargs)
+        merged = to_numpy_records(source_py).merge_sequencial_for_addr_track(
+            *args, copy_records=to_numpy_records(copy_py),
+            sink_records=to_numpy_records(sink_py), **kwargs)
+        assert_same(merged, expect)
+
+    @pytest.mark.parametrize('in_flight', [1, 10, 100])
+    def test_merge_sequencial_for_addr_track_1khz(self, in_flight):
+        # Three publishers at 1 kHz for one second. Each message is copied once before
+        # reaching the sink, and about in_flight / 2 messages per publisher are in flight.
+        source_py = Records(None, ['source_addr', 'source_stamp'])
+        copy_py = Records(None, ['addr_from', 'addr_to', 'copy_stamp'])
+        sink_py = Records(None, ['sink_addr', 'sink_stamp'])
+        period = 1000000
+        latency = in_flight * period // 2 + 20
+        for publisher in range(3):
+            for i in range(1000):
+                stamp = i * period + publisher * 1000
+                addr = publisher * 10000 + i % in_flight
+                copy_addr = addr + 1000
+                source_py.append(Record({'source_addr': addr, 'source_stamp': stamp}))
+                copy_py.append(
+                    Record({'addr_from': addr, 'addr_to': copy_addr, 'copy_stamp': stamp + 10}))
+                sink_py.append(Record({'sink_addr': copy_addr, 'sink_stamp': stamp + latency}))
+        args = ('source_stamp', 'source_addr')
+        kwargs = {
+            'copy_stamp_key': 'copy_stamp', 'copy_from_key': 'addr_from',
+            'copy_to_key': 'addr_to', 'sink_stamp_key': 'sink_stamp',
+            'sink_from_key': 'sink_addr', 'columns': ['source_addr', 'source_stamp', 'sink_stamp'],
+        }
+
+        expect = source_py.merge_sequencial_for_addr_track(
+            *args, copy_records=copy_py, sink_records=sink_py, **kwargs)
+        merged = to_numpy_records(source_py).merge_sequencial_for_addr_track(
+            *args, copy_records=to_numpy_records(copy_py),
+            sink_records=to_numpy_records(sink_py), **kwargs)
+        assert len(merged) == 3000
+        assert_same(merged, expect)
+
+
+class TestRecordsFactory:
+
+    def test_create_instance(self, mocker):
+        mocker.patch.object(RecordsFactory, 'use_numpy_impl', True)
+        records = RecordsFactory.create_instance(None, ['a'])
+        assert isinstance(records, RecordsNumpyImpl)
+        assert records.columns == ['a']
@@ -0,0 +1,72 @@
+# Copyright 2021 Research Institute of Systems Planning, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from caret_analyze.exceptions import InvalidArgumentError
+from caret_analyze.record import RecordsBuffer
+from caret_analyze.record.record import Record, Records
+from caret_analyze.record.record_numpy_impl import RecordsNumpyImpl
+
+import pytest
+
+
+class TestRecordsBuffer:
+
+    @pytest.mark.parametrize('records_cls', [Records, RecordsNumpyImpl])
+    def test_flush(self, records_cls):
+        records = records_cls([Record({'a': 0, 'b': 1})], ['a', 'b'])
+        buffer = RecordsBuffer(['a', 'b'])
+        buffer.append(2, 3)
+        buffer.append(4, 2**64 - 1)
+        assert len(buffer) == 2
+
+        buffer.flush(records)
+        expect = Records(
+            [Record({'a': 0, 'b': 1}), Record({'a': 2, 'b': 3}), Record({'a': 4, 'b': 2**64 - 1})],
+            ['a', 'b'])
+        assert Records(list(records.data), records.columns).equals(expect)
+        assert len(buffer) == 0
+
+        buffer.flush(records)
+        assert len(records) == 3
+
+    @pytest.mark.parametrize('records_cls', [Records, RecordsNumpyImpl])
+    def test_flush_missing(self, records_cls):
+        records = records_cls(None, ['a', 'b'])
+        buffer = RecordsBuffer(['a', 'b'])
+        buffer.append(0, None)
+        other = RecordsBuffer(['a', 'b'])
+        other.append(1, 2)
+        other.append(None, 3)
+        buffer.extend(other)
+
+        buffer.flush(records)
+        expect = Records(
+            [Record({'a': 0}), Record({'a': 1, 'b': 2}), Record({'b': 3})], ['a', 'b'])
+        assert Records(list(records.data), records.columns).equals(expect)
+
+    def test_extend(self):
+        buffer = RecordsBuffer(['a', 'b'])
+        buffer.append(0, 1)
+        other = RecordsBuffer(['a', 'b'])
+        other.append(2, 3)
+        buffer.extend(other)
+        assert len(buffer) == 2
+
+        with pytest.raises(InvalidArgumentError):
+            buffer.extend(RecordsBuffer(['a']))
+
+    def test_append_invalid(self):
+        buffer = RecordsBuffer(['a', 'b'])
+        with pytest.raises(InvalidArgumentError):
+            buffer.append(0)
@@ -0,0 +1,85 @@
+# Copyright 2021 Research Institute of Systems Planning, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from copy import deepcopy
+import random
+
+from caret_analyze.exceptions import InvalidArgumentError
+from caret_analyze.record import (Equals, InRange, IsIn, IsNull, Record, Records,
+                                  RecordsFilter, RecordsNumpyImpl)
+
+import pytest
+
+
+def random_records(size: int, seed: int) -> Records:
+    rand = random.Random(seed)
+    records = Records(None, ['a', 'b'])
+    for _ in range(size):
+        records.append(Record({
+            column: rand.randint(0, 5)
+            for column in ['a', 'b']
+            if rand.random() >= 0.2
+        }))
+    return records
+
+
+# Conditions and the equivalent expressions of the values of a and b.
+CONDITIONS = [
+    (Equals('a', 3), lambda a, b: a == 3),
+    (Equals('a', -1), lambda a, b: False),
+    (Equals('a', None), lambda a, b: a is None),
+    (Equals('a', 2**64), lambda a, b: False),
+    (IsIn('a', [1, 4]), lambda a, b: a in [1, 4]),
+    (IsIn('a', [2, None]), lambda a, b: a in [2, None]),
+    (IsIn('a', [3, 2**64]), lambda a, b: a == 3),
+    (InRange('a', 1, 3), lambda a, b: a is not None and 1 <= a <= 3),
+    (InRange('a', lower=4), lambda a, b: a is not None and a >= 4),
+    (InRange('a', upper=-1), lambda a, b: False),
+    (InRange('a', lower=2**64), lambda a, b: False),
+    (InRange('a', 2, 2**64), lambda a, b: a is not None and a >= 2),
+    (IsNull('b'), lambda a, b: b is None),
+    (Equals('a', 3) & IsNull('b'), lambda a, b: a == 3 and b is None),
+    (InRange('a', upper=1) | IsIn('b', [5]),
+     lambda a, b: (a is not None and a <= 1) or b == 5),
+    ((Equals('a', 0) | Equals('a', 5)) & InRange('b', 2, 4),
+     lambda a, b: a in [0, 5] and b is not None and 2 <= b <= 4),
+]
+
+
+class TestRecordsFilter:
+
+    @pytest.mark.parametrize('condition, expression', CONDITIONS)
+    @pytest.mark.parametrize('seed', range(3))
+    def test_filter_by(self, condition: RecordsFilter, expression, seed: int):
+        records = random_records(50, seed)
+        expect = [
+            record.data for record in records.data
+            if expression(record.data.get('a'), record.data.get('b'))
+        ]
+
+        records_py = deepcopy(records)
+        records_py.filter_by(condition)
+        assert [record.data for record in records_py.data] == expect
+
+        records_numpy = RecordsNumpyImpl(deepcopy(records.data), records.columns)
+        records_numpy.filter_by(condition)
+        assert [record.data for record in records_numpy.data] == expect
+        assert records_numpy.columns == ['a', 'b']
+
+    def test_unknown_column(self):
+        records = random_records(10, 0)
+        for records_ in [records, RecordsNumpyImpl(records.data, records.columns)]:
+            with pytest.raises(InvalidArgumentError):
+                records_.filter_by(Equals('a', 0) & IsNull('c'))
+            assert len(records_) == 10
@@ -0,0 +1,69 @@
+# Copyright 2021 Research Institute of Systems Planning, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from caret_analyze.architecture.architecture import Architecture
+from caret_analyze.exceptions import InvalidArgumentError, InvalidRecordsError
+from caret_analyze.runtime.application import Application
+from caret_analyze.runtime.path import Path
+from caret_analyze.runtime.trace_comparison import compare_path_latencies
+
+import numpy as np
+import pytest
+
+
+class TestComparePathLatencies:
+
+    def test_summary(self, mocker):
+        arch_mock = mocker.Mock(spec=Architecture)
+        mocker.patch.object(arch_mock, 'path_names', ('path', 'lost_path'))
+
+        lttng_mock = mocker.patch('caret_analyze.runtime.trace_comparison.Lttng')
+        app_mock = mocker.Mock(spec=Application)
+        mocker.patch('caret_analyze.runtime.trace_comparison.Application',
+                     return_value=app_mock)
+
+        path_mock = mocker.Mock(spec=Path)
+        mocker.patch.object(path_mock, 'to_timeseries',
+                            return_value=(np.array([0, 1, 2]), np.array([10, 20, 30])))
+        lost_path_mock = mocker.Mock(spec=Path)
+        mocker.patch.object(lost_path_mock, 'to_timeseries', side_effect=InvalidRecordsError(''))
+        mocker.patch.object(
+            app_mock, 'get_path',
+            side_effect=lambda name: path_mock if name == 'path' else lost_path_mock)
+
+        df = compare_path_latencies(
+            arch_mock, ['trace_a', 'trace_b'], ['path', 'lost_path'], jobs=1, use_cache=True)
+
+        lttng_mock.assert_any_call('trace_a', use_cache=True)
+        lttng_mock.assert_any_call('trace_b', use_cache=True)
+        assert list(df.index) == [
+            ('trace_a', 'path'), ('trace_a', 'lost_path'),
+            ('trace_b', 'path'), ('trace_b', 'lost_path'),
+        ]
+        assert df.loc[('trace_a', 'path'), 'count'] == 3
+        assert df.loc[('trace_a', 'path'), 'min'] == 10
+        assert df.loc[('trace_a', 'path'), 'median'] == 20
+        assert df.loc[('trace_a', 'path'), 'max'] == 30
+        assert df.loc[('trace_b', 'lost_path'), 'count'] == 0
+        assert np.isnan(df.loc[('trace_b', 'lost_path'), 'mean'])
+
+    def test_invalid_argument(self, mocker):
+        arch_mock = mocker.Mock(spec=Architecture)
+        mocker.patch.object(arch_mock, 'path_names', ('path',))
+
+        with pytest.raises(InvalidArgumentError):
+            compare_path_latencies(arch_mock, ['trace'], ['unknown'])
+
+        with pytest.raises(InvalidArgumentError):
+            compare_path_latencies(arch_mock, ['trace'], ['path'], jobs=-1)
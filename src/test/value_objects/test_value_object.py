@@ -99,3 +99,25 @@ class TestValueObject:
 
         a = SampleClassC(1, '2', 3)
         assert str(a) == dump({'p': 3, 'v': {'i': 1, 's': '2'}})
+
+    def test_fields(self):
+        a = SampleClassA(1, '1', 1)
+        assert a._get_fields() == ('i', 's')
+        assert SampleClassC(1, '1', 1)._get_fields() == ('p', 'v')
+
+    def test_hash_cached(self, mocker):
+        a = SampleClassA(1, '1', 1)
+        expect = hash(a)
+        i_mock = mocker.patch.object(
+            SampleClassA, 'i', new_callable=mocker.PropertyMock, return_value=2)
+        assert hash(a) == expect
+        i_mock.assert_not_called()
+
+    def test_pickle(self):
+        import pickle
+        a = SampleClassC(1, '2', 3)
+        hash(a)
+        b = pickle.loads(pickle.dumps(a))
+        assert '_ValueObject__hash' not in vars(b)
+        assert a == b
+        assert hash(a) == hash(b)